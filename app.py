@@ -1,12 +1,17 @@
+import os
+import time
+
 import streamlit as st
-from datetime import datetime
-from PIL import Image
+from datetime import datetime, timedelta
 
-from core.config import BIN_MAP, STATIC_TIPS
-from core.inference import run_model
-from core.gemini_client import get_disposal_tips
+from core import metrics
+from core.config import BIN_MAP, REVIEW_CONF, SIMILARITY_ENABLED, STATIC_TIPS
+from core.inference import (
+    cache_stats, decode_image, engine_stats, remember_scan, run_model, similarity_stats, startup_report, warm_up,
+)
+from core.gemini_client import get_disposal_tips_async
 from core.hardware import actuate_sort
-from utils.storage import append_scan, load_scans, clear_scans
+from utils.storage import RECENT_LIMIT, append_scan, clear_scans, scan_page, scan_rollups, scan_stats
 
 
 # ------- Layout & Component Improvements -----
@@ -40,6 +45,14 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Load weights + run a dummy inference in the background while the UI renders
+warm_up()
+
+# Prometheus scrape endpoint, e.g. EWIZARD_METRICS_PORT=9108 -> :9108/metrics
+if os.getenv("EWIZARD_METRICS_PORT"):
+    metrics.enable()
+    metrics.start_http_server(int(os.environ["EWIZARD_METRICS_PORT"]))
+
 # ---------------- Page setup ----------------
 st.set_page_config(page_title="E-Wizard", page_icon="🪄", layout="wide")
 st.title("🪄 E-Wizard")
@@ -53,13 +66,62 @@ use_gemini = st.sidebar.toggle("Enable Gemini guidance", value=True)
 use_servo = st.sidebar.toggle("Enable servo sorting", value=False)
 dev_mode = st.sidebar.toggle("Developer mode", value=False)
 demo_mode = st.sidebar.toggle("🧪 Demo Mode (manual)", value=False)
-conf_thresh = st.sidebar.slider("Confidence threshold", 0.0, 1.0, 0.25, 0.05)
-
+conf_thresh = st.sidebar.slider("Confidence threshold", 0.0, 1.0, REVIEW_CONF, 0.05)
+
+
+if dev_mode:
+    # Stage timings are only collected while someone is looking (or scraping)
+    metrics.enable()
+    with st.sidebar.expander("⏱️ Metrics", expanded=False):
+        snap = metrics.snapshot()
+        if snap["spans"]:
+            st.dataframe(
+                [{"stage": name, **{k: round(v, 2) for k, v in s.items()}} for name, s in snap["spans"].items()],
+                hide_index=True,
+                use_container_width=True,
+            )
+        else:
+            st.caption("No stage timings yet — run a scan.")
+        if snap["counters"]:
+            st.write(snap["counters"])
+        c1, c2 = st.columns(2)
+        c1.download_button("Prometheus", metrics.prometheus_text(), file_name="ewizard.prom", mime="text/plain")
+        if c2.button("Reset"):
+            metrics.reset()
 
 st.sidebar.divider()
 if st.sidebar.button("🗑️ Clear scan history"):
     clear_scans()
+    st.session_state.history_pages = 1
     st.sidebar.success("History cleared!")
+# ---------------- Guidance (off the critical path) ----------------
+def start_guidance(label: str):
+    # Runs on a worker thread while we sort + log; None when Gemini is off
+    if not use_gemini:
+        return None
+    return get_disposal_tips_async(label)
+
+
+def resolve_guidance(future, label: str) -> str:
+    tips = None
+    if future is not None:
+        try:
+            with st.spinner("Generating disposal guidance..."), metrics.span("guidance_wait"):
+                tips = future.result()
+        except Exception as e:
+            tips = f"Gemini error: {e}"
+    if tips is None:
+        tips = STATIC_TIPS.get(label, STATIC_TIPS["unknown"])
+    return tips
+
+
+def report_timings(timings: dict):
+    st.caption(
+        f"Scan → sorted + logged in {timings['sorted_ms']:.0f} ms · "
+        f"guidance ready after {timings['guidance_ms']:.0f} ms"
+    )
+
+
 # ---------------- Session state ----------------
 if "last_scan" not in st.session_state:
     st.session_state.last_scan = None
@@ -67,20 +129,38 @@ if "pending_override" not in st.session_state:
     st.session_state.pending_override = False
 
 # ---------------- Load history ----------------
-df = load_scans()
+stats = scan_stats()
+by_label = stats["by_label"]
 
 # ---------------- Hero stats ----------------
 c1, c2, c3, c4 = st.columns(4)
-total = int(len(df))
-components = int(df["label"].isin(["cpu", "ram_stick"]).sum()) if total else 0
-storage = int((df["label"] == "flash_drive").sum()) if total else 0
-unk = int((df["label"] == "unknown").sum()) if total else 0
+total = stats["total"]
+components = by_label.get("cpu", 0) + by_label.get("gpu", 0) + by_label.get("ram_stick", 0)
+storage = by_label.get("flash_drive", 0)
+unk = by_label.get("unknown", 0)
 
 c1.metric("Total items", total)
-c2.metric("Components (CPU/RAM)", components)
+c2.metric("Components (CPU/GPU/RAM)", components)
 c3.metric("Storage (Flash drives)", storage)
 c4.metric("Unknown", unk)
 
+# ---------------- Trends (precomputed rollups, see utils/rollups.py) ----------------
+with st.expander("📈 Trends", expanded=False):
+    now = datetime.now()
+    hourly = scan_rollups("hour", since=(now - timedelta(hours=48)).isoformat(timespec="hours"))
+    daily = scan_rollups("day", since=(now - timedelta(days=30)).date().isoformat())
+    if len(daily) == 0:
+        st.caption("No scans in the last 30 days.")
+    else:
+        label_cols = [c for c in daily.columns if c not in ("bucket", "count", "mean_confidence", "review_rate", "override_rate")]
+        t1, t2 = st.columns(2)
+        t1.caption("Items per hour (last 48 h)")
+        t1.bar_chart(hourly.set_index("bucket")["count"])
+        t2.caption("Label mix per day (last 30 days)")
+        t2.bar_chart(daily.set_index("bucket")[label_cols])
+        st.caption("Manual-review and override rate per day")
+        st.line_chart(daily.set_index("bucket")[["review_rate", "override_rate"]])
+
 st.divider()
 
 # ---------------- Main layout ----------------
@@ -93,14 +173,15 @@ with left:
     if input_mode == "Camera":
         cam = st.camera_input("Take a photo")
         if cam is not None:
-            image = Image.open(cam).convert("RGB")
+            image = decode_image(cam)
     else:
         up = st.file_uploader("Upload an image", type=["jpg", "jpeg", "png"])
         if up is not None:
-            image = Image.open(up).convert("RGB")
+            image = decode_image(up)
 
     if image is not None:
-        st.image(image, use_container_width=True)
+        # BGR straight from the decoder; no RGB copy just for display
+        st.image(image, channels="BGR", use_container_width=True)
     else:
         st.info("Provide an image to scan an item.")
 
@@ -111,45 +192,39 @@ with right:
     # ---------------- Demo Mode (manual trigger) ----------------
     if demo_mode:
         st.info("Demo Mode is ON: click a button to simulate a detection (no Pi connection).")
-        b1, b2, b3, b4 = st.columns(4)
+        b1, b2, b3, b4, b5 = st.columns(5)
 
         chosen = None
         if b1.button("CPU"):
             chosen = ("cpu", 0.95)
-        if b2.button("RAM"):
+        if b2.button("GPU"):
+            chosen = ("gpu", 0.95)
+        if b3.button("RAM"):
             chosen = ("ram_stick", 0.95)
-        if b3.button("Flash Drive"):
+        if b4.button("Flash Drive"):
             chosen = ("flash_drive", 0.95)
-        if b4.button("Unknown"):
+        if b5.button("Unknown"):
             chosen = ("unknown", 0.40)
 
         if chosen is not None:
+            t_start = time.perf_counter()
             label, conf = chosen
             low_conf = (label == "unknown") or (conf < conf_thresh)
             bin_name = BIN_MAP.get(label, BIN_MAP["unknown"])
 
-            # Guidance
-            tips = None
-            if use_gemini:
-                try:
-                    with st.spinner("Generating disposal guidance..."):
-                        tips = get_disposal_tips(label)
-                except Exception as e:
-                    tips = f"Gemini error: {e}"
-            if tips is None:
-                tips = STATIC_TIPS.get(label, STATIC_TIPS["unknown"])
+            # Guidance runs in the background while we sort + log
+            tips_future = start_guidance(label)
 
             # Optional servo (only if you want to demo servo from laptop)
             if use_servo and (not low_conf):
-                with st.spinner("Sorting item..."):
-                    actuate_sort(bin_name)
+                actuate_sort(bin_name, label)  # queued; the servo thread moves it
 
             # Save last scan + log it
             st.session_state.last_scan = {
                 "label": label,
                 "confidence": conf,
                 "bin": bin_name,
-                "tips": tips,
+                "tips": None,
                 "raw": {"demo_mode": True},
                 "low_conf": low_conf,
             }
@@ -161,6 +236,7 @@ with right:
                 "bin": bin_name,
                 "overridden": False,
             })
+            timings = {"sorted_ms": (time.perf_counter() - t_start) * 1000}
 
             st.success("Demo scan logged!")
             m1, m2 = st.columns(2)
@@ -169,7 +245,13 @@ with right:
             st.write("**Bin:**", bin_name)
 
             st.subheader("♻️ Disposal Guidance")
+            tips = resolve_guidance(tips_future, label)
+            timings["guidance_ms"] = (time.perf_counter() - t_start) * 1000
+            st.session_state.last_scan["tips"] = tips
+            st.session_state.last_scan["timings"] = timings
             st.write(tips)
+            if dev_mode:
+                report_timings(timings)
 
         # Stop here so the normal scan flow doesn't run under demo mode
         st.stop()
@@ -180,13 +262,16 @@ with right:
 
 
     if scan and image is not None:
-        with st.spinner("Running detection..."):
+        t_start = time.perf_counter()
+        metrics.inc("scans")
+        with st.spinner("Running detection..."), metrics.span("detect"):
             # run_model returns (label, conf, annotated_img_or_None, raw_optional)
             label, conf, annotated, raw = run_model(image)
             st.session_state.pending_override = True
 
         low_conf = conf < conf_thresh
         if low_conf:
+            metrics.inc("low_confidence")
             label = "unknown"
             st.warning("Low confidence — sending to Manual Review. You can override below.")
         else:
@@ -200,61 +285,55 @@ with right:
         override_label = None
         if st.session_state.pending_override and label == "unknown":
             st.subheader("Manual override")
-            cA, cB, cC = st.columns(3)
+            cA, cB, cC, cD = st.columns(4)
             if cA.button("Mark as CPU"):
                 override_label = "cpu"
-            if cB.button("Mark as RAM"):
+            if cB.button("Mark as GPU"):
+                override_label = "gpu"
+            if cC.button("Mark as RAM"):
                 override_label = "ram_stick"
-            if cC.button("Mark as Flash Drive"):
+            if cD.button("Mark as Flash Drive"):
                 override_label = "flash_drive"
 
             if override_label is not None:
                 label = override_label
                 bin_name = BIN_MAP.get(label, BIN_MAP["unknown"])
                 was_overridden = True
+                metrics.inc("overrides")
                 st.success(f"Override applied: {label} → {bin_name}")
                 st.session_state.pending_override = False
 
-        # Gemini or fallback
-        tips = None
+        # Gemini or fallback, generated in the background while we sort + log
+        tips_future = start_guidance(label)
 
         st.session_state.last_scan = {
         "label": label,
         "confidence": conf,
         "bin": bin_name,
-        "tips": tips,  # this will be filled after Gemini runs
+        "tips": None,  # this will be filled after Gemini runs
         "raw": raw, 
         "low_conf": low_conf,
         }
-        
-        if use_gemini:
-            try:
-                with st.spinner("Generating disposal guidance..."):
-                    tips = get_disposal_tips(label)
-            except Exception as e:
-                tips = f"Gemini error: {e}"
-
-        if tips is None:
-            tips = STATIC_TIPS.get(label, STATIC_TIPS["unknown"])
-
-        st.session_state.last_scan["tips"] = tips
-        st.session_state.last_scan["label"] = label
-        st.session_state.last_scan["bin"] = bin_name
-
 
         # Servo actuation (optional)
         if use_servo and (not low_conf):
-            with st.spinner("Sorting item..."):
-                actuate_sort(bin_name)
+            actuate_sort(bin_name, label)  # queued; the servo thread moves it
 
         # Log scan
-        append_scan({
-            "timestamp": datetime.now().isoformat(timespec="seconds"),
-            "label": label,
-            "confidence": float(conf),
-            "bin": bin_name,
-            "overridden": was_overridden,
-        })
+        with metrics.span("log"):
+            append_scan({
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "label": label,
+                "confidence": float(conf),
+                "bin": bin_name,
+                "overridden": was_overridden,
+            })
+        # Overrides and high-confidence labels (not ones that were themselves
+        # reused) feed the similarity index; see SIMILARITY_MIN_CONF
+        if SIMILARITY_ENABLED and not (raw and "similar" in raw):
+            remember_scan(image, label, float(conf), overridden=was_overridden)
+        timings = {"sorted_ms": (time.perf_counter() - t_start) * 1000}
+        metrics.observe("scan_to_sorted", timings["sorted_ms"] / 1000)
 
         # Display results
         st.success("Scan complete!")
@@ -264,6 +343,8 @@ with right:
         st.write("**Bin:**", bin_name)
         if was_overridden:
             st.caption("Label was manually overridden by user")
+        if raw and "similar" in raw:
+            st.caption(f"Matched a recently confirmed scan (similarity {raw['similar']['similarity']:.3f}); detection skipped")
 
         if raw and "top" in raw and raw["top"]["class_name"] is not None:
             st.caption(
@@ -272,7 +353,7 @@ with right:
             )
 
         if annotated is not None:
-            st.image(annotated, caption="YOLO annotated output", use_container_width=True)
+            st.image(annotated, caption="YOLO annotated output", channels="BGR", use_container_width=True)
 
         st.subheader("♻️ Disposal Guidance")
 
@@ -288,12 +369,33 @@ with right:
                     st.markdown(f"### {title.strip()}")
                     st.markdown(body)
 
+        tips = resolve_guidance(tips_future, label)
+        timings["guidance_ms"] = (time.perf_counter() - t_start) * 1000
+        st.session_state.last_scan["tips"] = tips
+        st.session_state.last_scan["timings"] = timings
         render_guidance(tips)
+        if dev_mode:
+            report_timings(timings)
 
 
         if dev_mode and raw is not None:
             st.subheader("Raw detections (dev)")
             st.write(raw)
+            cs = cache_stats()
+            st.caption(f"Result cache: {cs['hits']} hits / {cs['misses']} misses, {cs['entries']} entries ({cs['bytes'] / 1e6:.1f} MB)")
+            st.caption("Startup: " + ", ".join(f"{k} {v:.2f}s" for k, v in startup_report().items()))
+            if SIMILARITY_ENABLED:
+                ss = similarity_stats()
+                agreement = f", {ss['agreement']:.0%} agreement on {ss['verified']} checks" if "agreement" in ss else ""
+                st.caption(f"Similarity index: {ss['hits']}/{ss['lookups']} hits ({ss['hit_rate']:.0%}), "
+                           f"{ss['entries']} entries{agreement}")
+            es = engine_stats()
+            if es is not None:
+                st.caption(
+                    f"Engine server: queue {es['queue_depth']}/{es['max_queue']}, "
+                    f"avg batch {es['avg_batch_frames']:.1f}, rejected {es['rejected']}, "
+                    "latency " + ", ".join(f"{k} {v:.0f}ms" for k, v in es["total_ms"].items())
+                )
 
     else:
         st.caption("Results will appear here after you scan an item.")
@@ -301,8 +403,25 @@ with right:
 st.divider()
 
 st.subheader("Recent scans")
-df = load_scans()
+# Only the visible pages are read (newest first); "Load more" adds one page
+if "history_pages" not in st.session_state:
+    st.session_state.history_pages = 1
+pages, cursor = [], None
+for _ in range(st.session_state.history_pages):
+    page, cursor = scan_page(cursor, RECENT_LIMIT)
+    pages.append(page)
+    if cursor is None:
+        break
+if len(pages) == 1:
+    df = pages[0]
+else:
+    import pandas as pd
+
+    df = pd.concat(pages, ignore_index=True)
 if len(df) == 0:
     st.caption("No scans yet.")
 else:
-    st.dataframe(df.sort_values("timestamp", ascending=False).head(25), use_container_width=True)
\ No newline at end of file
+    st.dataframe(df, use_container_width=True)
+    if cursor is not None and st.button("Load more"):
+        st.session_state.history_pages += 1
+        st.rerun()
\ No newline at end of file
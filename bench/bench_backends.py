@@ -0,0 +1,152 @@
+"""
+Latency and accuracy across inference backends.
+
+    python -m bench.bench_backends --data ml/ewaste.yaml [--imgsz 320] [--threads 4]
+
+Compares the PyTorch weights with their ONNX fp32 export and int8 variant
+(produce them first with `python -m core.backends export` / `quantize`).
+Latency is measured through core.backends on the photos in images/.
+Accuracy is scored on the same code path: every backend's predict() runs over
+the held-out split named in --data (YOLO layout, labels/ next to images/) and
+its boxes are matched against the ground-truth labels for mAP50 / mAP50-95.
+"""
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from core import backends
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def latency_ms(backend, frames, repeat: int):
+    backend.predict(frames[:1], conf=0.25)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        for f in frames:
+            t0 = time.perf_counter()
+            backend.predict([f], conf=0.25)
+            samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+
+def val_split(data: str):
+    """[(image path, (n, 5) array of class, x1, y1, x2, y2 in pixels)] for the val split of a dataset YAML."""
+    import yaml
+
+    with open(data) as f:
+        cfg = yaml.safe_load(f)
+    root = cfg.get("path") or os.path.dirname(os.path.abspath(data))
+    images_dir = os.path.join(root, cfg["val"])
+    out = []
+    for path in sorted(glob.glob(os.path.join(images_dir, "*"))):
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        h, w = img.shape[:2]
+        # YOLO layout: .../images/x.jpg is labelled by .../labels/x.txt
+        label_path = os.path.splitext(f"{os.sep}labels{os.sep}".join(path.rsplit(f"{os.sep}images{os.sep}", 1)))[0] + ".txt"
+        rows = np.loadtxt(label_path, ndmin=2) if os.path.exists(label_path) else np.zeros((0, 5))
+        rows = rows[:, :5].reshape(-1, 5)
+        cls, cx, cy, bw, bh = rows.T
+        boxes = np.stack([cls, (cx - bw / 2) * w, (cy - bh / 2) * h, (cx + bw / 2) * w, (cy + bh / 2) * h], axis=1)
+        out.append((path, boxes))
+    return out
+
+
+def _iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (n, 4) and (m, 4) xyxy boxes."""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def _average_precision(tp: np.ndarray, conf: np.ndarray, n_gt: int) -> float:
+    """All-point interpolated AP (the COCO / ultralytics definition)."""
+    if n_gt == 0 or not len(tp):
+        return 0.0
+    order = np.argsort(-conf, kind="stable")
+    hits = np.cumsum(tp[order])
+    recall = np.concatenate([[0.0], hits / n_gt, [1.0]])
+    precision = np.concatenate([[1.0], hits / np.arange(1, len(hits) + 1), [0.0]])
+    precision = np.flip(np.maximum.accumulate(np.flip(precision)))
+    step = np.flatnonzero(recall[1:] != recall[:-1])
+    return float(np.sum((recall[step + 1] - recall[step]) * precision[step + 1]))
+
+
+def accuracy(backend, split, imgsz: int, conf: float = 0.001):
+    """mAP50 and mAP50-95 of backend.predict() against the ground-truth boxes."""
+    tps, confs, classes, n_gt = [], [], [], {}
+    for path, gt in split:
+        det = backend.predict([cv2.imread(path)], conf=conf, imgsz=imgsz)[0]
+        for k in gt[:, 0].astype(int):
+            n_gt[k] = n_gt.get(k, 0) + 1
+        tp = np.zeros((len(det), len(IOU_THRESHOLDS)), dtype=bool)
+        if len(det) and len(gt):
+            iou = _iou(det.xyxy, gt[:, 1:])
+            iou[det.cls[:, None] != gt[None, :, 0].astype(int)] = 0
+            # Greedy matching, most confident detection first, each label used once per threshold
+            for j, t in enumerate(IOU_THRESHOLDS):
+                taken = np.zeros(len(gt), dtype=bool)
+                for i in np.argsort(-det.conf, kind="stable"):
+                    cand = np.where(taken, 0, iou[i])
+                    best = int(cand.argmax())
+                    if cand[best] >= t:
+                        taken[best] = tp[i, j] = True
+        tps.append(tp)
+        confs.append(det.conf)
+        classes.append(det.cls)
+    if not n_gt:
+        return float("nan"), float("nan")
+    tp, conf_all, cls_all = np.concatenate(tps), np.concatenate(confs), np.concatenate(classes)
+    ap = np.array([
+        [_average_precision(tp[cls_all == k, j], conf_all[cls_all == k], n) for j in range(len(IOU_THRESHOLDS))]
+        for k, n in sorted(n_gt.items())
+    ])
+    return float(ap[:, 0].mean()), float(ap.mean())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--weights", default="ml/best.pt")
+    ap.add_argument("--data", default=None, help="dataset YAML with a held-out val split (enables mAP)")
+    ap.add_argument("--imgsz", type=int, default=320)
+    ap.add_argument("--threads", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    frames = [cv2.imread(p) for p in sorted(glob.glob("images/*"))]
+    frames = [f for f in frames if f is not None]
+    split = val_split(args.data) if args.data else None
+
+    stem = os.path.splitext(args.weights)[0]
+    candidates = [
+        ("torch", args.weights),
+        ("onnx fp32", stem + ".onnx"),
+        ("onnx int8", stem + "-int8.onnx"),
+    ]
+
+    print(f"{'backend':<10} {'p50 ms':>8} {'p95 ms':>8} {'mAP50':>7} {'mAP50-95':>9}")
+    for name, weights in candidates:
+        if not os.path.exists(weights):
+            print(f"{name:<10} (missing {weights})")
+            continue
+        kind = "torch" if name == "torch" else "onnx"
+        backend = backends.create(weights, kind, threads=args.threads, imgsz=args.imgsz)
+        p50, p95 = latency_ms(backend, frames, args.repeat)
+        m50 = m = float("nan")
+        if split:
+            m50, m = accuracy(backend, split, args.imgsz)
+        print(f"{name:<10} {p50:>8.1f} {p95:>8.1f} {m50:>7.3f} {m:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
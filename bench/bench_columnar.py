@@ -0,0 +1,112 @@
+"""
+Scan-history load times: full CSV parse vs. the Parquet store.
+
+    python -m bench.bench_columnar [--rows 1000000] [--days 90]
+
+Builds a synthetic history in a temporary directory, migrates it into the
+columnar store, then times the same queries against both backends.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from utils import columnar
+from utils.scanlog import ScanLog
+
+COLUMNS = ["timestamp", "label", "confidence", "bin", "overridden"]
+LABELS = {
+    "cpu": "🧩 Components (CPU/RAM)",
+    "ram_stick": "🧩 Components (CPU/RAM)",
+    "flash_drive": "💾 Storage (USB/Flash Drives)",
+    "unknown": "❓ Unknown / Manual Review",
+}
+
+
+def synth_rows(n: int, days: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    step = days * 86400 / n
+    labels = list(LABELS)
+    for i in range(n):
+        label = rng.choice(labels)
+        yield {
+            "timestamp": (start + timedelta(seconds=int(i * step))).isoformat(timespec="seconds"),
+            "label": label,
+            "confidence": round(rng.random(), 4),
+            "bin": LABELS[label],
+            "overridden": rng.random() < 0.02,
+        }
+
+
+def timed(fn, repeat: int = 3):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def csv_query(path, since=None, until=None, labels=None, columns=None):
+    df = pd.read_csv(path)
+    if since is not None or until is not None or labels is not None:
+        ts = pd.to_datetime(df["timestamp"])
+        mask = pd.Series(True, index=df.index)
+        if since is not None:
+            mask &= ts >= pd.Timestamp(since)
+        if until is not None:
+            mask &= ts < pd.Timestamp(until)
+        if labels is not None:
+            mask &= df["label"].isin(labels)
+        df = df[mask]
+    return df[columns or COLUMNS]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--days", type=int, default=90)
+    args = ap.parse_args()
+
+    if not columnar.available():
+        raise SystemExit("pyarrow is not installed: pip install pyarrow")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "scans.csv")
+        log = ScanLog(csv_path, COLUMNS)
+        batch = []
+        for row in synth_rows(args.rows, args.days):
+            batch.append(row)
+            if len(batch) == 50_000:
+                log.append(batch)
+                batch = []
+        log.append(batch)
+        log.close()
+
+        store = columnar.ColumnarStore(os.path.join(tmp, "scans_parquet"), csv_path)
+        t_mig, _ = timed(store.migrate, repeat=1)
+        print(f"rows={args.rows} days={args.days} migrate={t_mig:.2f}s")
+
+        day = datetime(2026, 1, 1) + timedelta(days=args.days // 2)
+        queries = {
+            "full history": {},
+            "one day": {"since": day, "until": day + timedelta(days=1)},
+            "one week, cpu only": {"since": day, "until": day + timedelta(days=7), "labels": ["cpu"]},
+            "all, label column": {"columns": ["label"]},
+        }
+        print(f"{'query':<22} {'csv s':>8} {'parquet s':>10} {'rows':>9}")
+        for name, q in queries.items():
+            t_csv, df_csv = timed(lambda: csv_query(csv_path, **q))
+            t_pq, df_pq = timed(lambda: store.load(**q))
+            assert len(df_csv) == len(df_pq), (name, len(df_csv), len(df_pq))
+            print(f"{name:<22} {t_csv:>8.3f} {t_pq:>10.3f} {len(df_pq):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Load generator for the engine server, entirely on localhost.
+
+    python -m bench.bench_engine_server                   # real engine (EWIZARD_WEIGHTS)
+    python -m bench.bench_engine_server --synthetic 40,6  # no weights: 40 ms + 6 ms/frame
+    python -m bench.bench_engine_server --address unix:/tmp/ewizard-engine.sock  # running server
+
+For each concurrency level, N client threads send single-frame predict
+requests back to back for --seconds. Reported per level: client-side latency
+percentiles, throughput, "busy" rejections, and the server's average batch
+size and queue-wait p95. Unless --address is given, the sweep runs twice:
+with micro-batching and with --max-batch 1 (one request per model call).
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from core.backends import Detections
+from core.engine_server import EngineBusy, EngineServer, RemoteEngine, _percentiles
+
+
+class SyntheticEngine:
+    """Sleeps like a model whose cost is a fixed part plus a per-frame part."""
+
+    name = "synthetic"
+    weights = "-"
+    names = {0: "CPU", 1: "GPU", 2: "RAM", 3: "USB_Drive"}
+
+    def __init__(self, base_ms: float, per_frame_ms: float):
+        self.base = base_ms / 1000
+        self.per_frame = per_frame_ms / 1000
+
+    def predict(self, frames, conf=0.05, imgsz=None):
+        time.sleep(self.base + self.per_frame * len(frames))
+        empty = np.zeros((0,), dtype=np.float32)
+        return [Detections(np.zeros((0, 4), np.float32), empty, empty.astype(np.intp), self.names, f) for f in frames]
+
+    def info(self):
+        return {"backend": self.name, "weights": self.weights, "names": self.names}
+
+
+def run_level(client: RemoteEngine, frame, clients: int, seconds: float):
+    latencies, busy = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def worker():
+        mine, rejected = [], 0
+        while time.monotonic() < stop_at:
+            t0 = time.perf_counter()
+            try:
+                client.predict([frame], conf=0.25)
+            except EngineBusy:
+                rejected += 1
+                continue
+            mine.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(mine)
+            busy[0] += rejected
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, busy[0], time.perf_counter() - t0
+
+
+def sweep(address: str, levels, seconds: float, frame):
+    client = RemoteEngine(address)
+    client.predict([frame])  # warm-up
+    print(f"{'clients':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>7} {'busy':>5} {'batch':>6} {'wait p95':>9}")
+    for n in levels:
+        before = client.server_stats()
+        latencies, busy, elapsed = run_level(client, frame, n, seconds)
+        after = client.server_stats()
+        pct = _percentiles(latencies)
+        batches = after["batches"] - before["batches"]
+        batch = (after["avg_batch_frames"] * after["batches"] - before["avg_batch_frames"] * before["batches"]) / batches if batches else 0.0
+        print(f"{n:>7} {pct.get('p50', 0):>8.1f} {pct.get('p95', 0):>8.1f} {pct.get('p99', 0):>8.1f} "
+              f"{len(latencies) / elapsed:>7.1f} {busy:>5} {batch:>6.2f} {after['wait_ms'].get('p95', 0):>9.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--address", default=None, help="benchmark an already running server")
+    ap.add_argument("--synthetic", default=None, help="BASE_MS,PER_FRAME_MS model instead of real weights")
+    ap.add_argument("--clients", default="1,2,4,8,16")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--size", default="640x480", help="frame WxH")
+    ap.add_argument("--max-batch", type=int, default=8)
+    ap.add_argument("--max-wait-ms", type=float, default=5.0)
+    ap.add_argument("--max-queue", type=int, default=64)
+    args = ap.parse_args()
+
+    w, h = (int(v) for v in args.size.split("x"))
+    frame = np.random.default_rng(0).integers(0, 255, (h, w, 3), dtype=np.uint8)
+    levels = [int(n) for n in args.clients.split(",")]
+
+    if args.address:
+        sweep(args.address, levels, args.seconds, frame)
+        return
+
+    if args.synthetic:
+        base, per_frame = (float(v) for v in args.synthetic.split(","))
+        engine = SyntheticEngine(base, per_frame)
+    else:
+        from core.engine import Engine
+
+        engine = Engine()
+
+    for label, max_batch in (("micro-batched", args.max_batch), ("unbatched", 1)):
+        address = "unix:" + os.path.join(tempfile.mkdtemp(), "engine.sock")
+        server = EngineServer(engine, address, max_batch=max_batch,
+                              max_wait=args.max_wait_ms / 1000, max_queue=args.max_queue)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"\n{label} (max_batch={max_batch}, {engine.name})")
+        try:
+            sweep(address, levels, args.seconds, frame)
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
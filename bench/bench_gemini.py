@@ -0,0 +1,45 @@
+"""
+Gemini client behavior against the local stub: latency, retries, deadline.
+
+    python -m bench.bench_gemini
+
+Each scenario bypasses the tips cache and reports per-call latency, how many
+HTTP requests / TCP connections the stub saw, and whether the call returned
+Gemini output or fell back to STATIC_TIPS.
+"""
+import statistics
+import time
+
+from bench.stub_gemini import StubGemini
+from core import gemini_client
+from core.config import STATIC_TIPS
+
+SCENARIOS = [
+    # name, stub kwargs, deadline (s)
+    ("healthy", {"latency": 0.02}, 2.0),
+    ("first call 503 then ok", {"latency": 0.02, "fail_first": 1}, 2.0),
+    ("20% 429s", {"latency": 0.02, "error_rate": 0.2, "error_status": 429}, 2.0),
+    ("slow upstream (1.5s)", {"latency": 1.5}, 0.5),
+    ("always 500", {"error_rate": 1.0, "error_status": 500}, 2.0),
+]
+
+
+def main(calls: int = 10):
+    gemini_client.GEMINI_API_KEY = gemini_client.GEMINI_API_KEY or "stub"
+    print(f"{'scenario':<24} {'p50 ms':>8} {'max ms':>8} {'reqs':>5} {'conns':>5} {'static':>6}")
+    for name, kwargs, deadline in SCENARIOS:
+        with StubGemini(**kwargs) as stub:
+            gemini_client.GEMINI_BASE_URL = stub.url
+            gemini_client._session = None  # fresh pool per scenario
+            samples, static = [], 0
+            for _ in range(calls):
+                t0 = time.perf_counter()
+                tips, _ = gemini_client._request_tips("cpu", gemini_client.DEFAULT_LOCATION, time.monotonic() + deadline)
+                samples.append((time.perf_counter() - t0) * 1000)
+                static += tips == STATIC_TIPS["cpu"]
+            print(f"{name:<24} {statistics.median(samples):>8.1f} {max(samples):>8.1f} "
+                  f"{stub.requests:>5} {stub.connections:>5} {static:>6}")
+
+
+if __name__ == "__main__":
+    main()
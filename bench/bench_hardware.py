@@ -0,0 +1,84 @@
+"""
+Servo scheduling on the simulated backend: the old blocking move vs.
+ServoController.
+
+    python -m bench.bench_hardware [--items 200] [--interval 0.25] [--repeat-p 0.5]
+
+Items arrive every --interval seconds; each is the same label as the previous
+one with probability --repeat-p (a run of RAM sticks, say). "blocking" calls
+servo.move() + the old fixed 0.15 s sleep on the caller's thread, like
+live_demo_pi2 did; "controller" queues each item and reports how long the
+caller was held, the ack latency, and how many moves were coalesced.
+"""
+import argparse
+import random
+import time
+
+from core.config import SERVO_ANGLES
+from core.hardware import ServoController, SimulatedServo
+
+
+def labels(n: int, repeat_p: float, seed: int = 0):
+    rng = random.Random(seed)
+    names = list(SERVO_ANGLES)
+    out = [rng.choice(names)]
+    while len(out) < n:
+        out.append(out[-1] if rng.random() < repeat_p else rng.choice(names))
+    return out
+
+
+def blocking(items, interval):
+    servo = SimulatedServo()
+    held = []
+    t_start = time.perf_counter()
+    for label in items:
+        t0 = time.perf_counter()
+        servo.move(SERVO_ANGLES[label])
+        time.sleep(0.15)
+        held.append(time.perf_counter() - t0)
+        time.sleep(max(0.0, interval - held[-1]))
+    return sorted(held), time.perf_counter() - t_start, servo.moves
+
+
+def controller(items, interval, dwell):
+    servo = SimulatedServo()
+    ctl = ServoController(servo, dwell=dwell, queue_size=len(items))
+    held, cmds = [], []
+    t_start = time.perf_counter()
+    for label in items:
+        t0 = time.perf_counter()
+        cmds.append(ctl.submit(label))
+        held.append(time.perf_counter() - t0)
+        time.sleep(interval)
+    for c in cmds:
+        c.wait()
+    total = time.perf_counter() - t_start
+    stats = ctl.stats()
+    ctl.close()
+    return sorted(held), total, stats
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=200)
+    ap.add_argument("--interval", type=float, default=0.25, help="seconds between items")
+    ap.add_argument("--repeat-p", type=float, default=0.5)
+    ap.add_argument("--dwell", type=float, default=0.15)
+    args = ap.parse_args()
+
+    items = labels(args.items, args.repeat_p)
+
+    held, total, moves = blocking(items, args.interval)
+    print(f"blocking:   caller held p50 {held[len(held) // 2] * 1000:6.1f} ms, "
+          f"max {held[-1] * 1000:6.1f} ms; {moves} moves; all sorted after {total:5.2f}s")
+
+    held, total, s = controller(items, args.interval, args.dwell)
+    print(f"controller: caller held p50 {held[len(held) // 2] * 1000:6.3f} ms, "
+          f"max {held[-1] * 1000:6.3f} ms; {s['moved']} moves, {s['coalesced']} coalesced; "
+          f"all sorted after {total:5.2f}s")
+    print(f"            ack p50 {s.get('ack_p50_ms', 0):.0f} ms, p95 {s.get('ack_p95_ms', 0):.0f} ms, "
+          f"servo busy {s['busy']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Detection throughput: per-image run_model vs. batched run_model_batch, and
+the per-frame cost of annotation / raw payload options.
+
+    python -m bench.bench_inference [--n 64] [--batch-size 16]
+
+Uses the photos in images/ (repeated to --n frames) and ml/best.pt. The
+result cache is bypassed so every call reaches the model.
+"""
+import argparse
+import glob
+import os
+import time
+
+from PIL import Image
+
+from core.inference import load_model, run_model, run_model_batch
+
+IMAGES_DIR = "images"
+
+
+def load_images(n: int):
+    paths = sorted(
+        p for p in glob.glob(os.path.join(IMAGES_DIR, "*"))
+        if p.lower().endswith((".jpg", ".jpeg", ".png"))
+    )
+    if not paths:
+        raise SystemExit(f"No images found in {IMAGES_DIR}/")
+    base = [Image.open(p).convert("RGB") for p in paths]
+    return [base[i % len(base)] for i in range(n)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=64)
+    ap.add_argument("--batch-size", type=int, default=16)
+    args = ap.parse_args()
+
+    images = load_images(args.n)
+    load_model()
+    run_model(images[0], cache=False)  # warm-up
+
+    t0 = time.perf_counter()
+    single = [run_model(im, cache=False) for im in images]
+    t_single = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batched = run_model_batch(images, batch_size=args.batch_size, cache=False)
+    t_batch = time.perf_counter() - t0
+
+    agree = sum(a[0] == b[0] for a, b in zip(single, batched))
+    print(f"images={args.n} batch_size={args.batch_size}")
+    print(f"per-image: {args.n / t_single:8.1f} img/s")
+    print(f"batched:   {args.n / t_batch:8.1f} img/s  ({t_single / t_batch:.2f}x)")
+    print(f"label agreement: {agree}/{args.n}")
+
+    print("\nrun_model options (ms/frame):")
+    options = [
+        ("annotate=True  raw=full", {"annotate": True, "raw": "full"}),
+        ("annotate=lazy  raw=top ", {"annotate": "lazy", "raw": "top"}),
+        ("annotate=False raw=none", {"annotate": False, "raw": "none"}),
+    ]
+    baseline = None
+    for name, kw in options:
+        t0 = time.perf_counter()
+        for im in images:
+            run_model(im, cache=False, **kw)
+        ms = (time.perf_counter() - t0) * 1000 / args.n
+        baseline = ms if baseline is None else baseline
+        print(f"  {name}: {ms:7.2f}  (saves {baseline - ms:5.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Allocation profile of the scan ingestion path, upload bytes -> model input ->
+annotated output, without the model itself.
+
+    python -m bench.bench_ingest [--size 1920x1080] [--repeat 20]
+
+"before" replays the original chain (PIL decode + convert in app.py, convert +
+np.array + cvtColor in run_model, cvtColor + fromarray for the annotation);
+"after" is decode_image() -> BGR array -> Detections.plot(). Allocations are
+measured with tracemalloc (numpy / OpenCV buffers are traced); PIL keeps its
+pixels outside the Python allocator, so PIL images created by a stage are
+added from their size. One full frame is W*H*3 bytes.
+"""
+import argparse
+import io
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from core.backends import Detections
+from core.inference import _to_bgr, decode_image
+
+
+def _pil_bytes(*images) -> int:
+    return sum(im.width * im.height * len(im.getbands()) for im in images)
+
+
+def before(data: bytes, dets):
+    decoded = Image.open(io.BytesIO(data))
+    decoded.load()
+    app_img = decoded.convert("RGB")                        # app.py
+    rgb = np.array(app_img.convert("RGB"))                  # run_model
+    frame = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+    det = Detections(*dets, frame)
+    plotted = det.plot()
+    out = Image.fromarray(cv2.cvtColor(plotted, cv2.COLOR_BGR2RGB))
+    return _pil_bytes(decoded, app_img, out) + _pil_bytes(app_img)  # second convert()
+
+
+def after(data: bytes, dets):
+    frame = decode_image(data)
+    det = Detections(*dets, frame)
+    det.plot()
+    return 0
+
+
+def profile(fn, data, dets, repeat):
+    fn(data, dets)  # warm-up (lazy imports, OpenCV init)
+    tracemalloc.start()
+    total, pil = 0, 0
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        before_snap = tracemalloc.get_traced_memory()[0]
+        pil += fn(data, dets)
+        total += tracemalloc.get_traced_memory()[1] - before_snap
+    elapsed = (time.perf_counter() - t0) / repeat
+    tracemalloc.stop()
+    return total / repeat + pil / repeat, elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Scan ingestion allocation profile.")
+    ap.add_argument("--size", default="1920x1080", help="WxH of the synthetic photo")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    w, h = (int(v) for v in args.size.split("x"))
+    rng = np.random.default_rng(0)
+    photo = cv2.GaussianBlur(rng.integers(0, 255, (h, w, 3), dtype=np.uint8), (21, 21), 0)
+    data = cv2.imencode(".jpg", photo, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+    dets = (
+        np.array([[w * 0.2, h * 0.2, w * 0.6, h * 0.7]], dtype=np.float32),
+        np.array([0.91], dtype=np.float32),
+        np.array([0], dtype=np.intp),
+        {0: "CPU"},
+    )
+    frame_bytes = w * h * 3
+
+    # Sanity: both paths hand the model the same pixels
+    ref = _to_bgr(Image.open(io.BytesIO(data)).convert("RGB"))
+    assert np.array_equal(ref, decode_image(data))
+
+    print(f"{w}x{h} JPEG ({len(data) / 1e3:.0f} kB), one frame = {frame_bytes / 1e6:.1f} MB")
+    print(f"{'path':<8} {'MB/scan':>8} {'frames':>7} {'ms/scan':>8}")
+    for name, fn in (("before", before), ("after", after)):
+        nbytes, seconds = profile(fn, data, dets, args.repeat)
+        print(f"{name:<8} {nbytes / 1e6:>8.1f} {nbytes / frame_bytes:>7.1f} {seconds * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Overhead of core.metrics instrumentation, disabled vs. enabled.
+
+    python -m bench.bench_metrics [--n 1000000]
+"""
+import argparse
+import time
+
+from core import metrics
+
+
+def per_call_ns(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def bare():
+    pass
+
+
+def with_span():
+    with metrics.span("stage"):
+        pass
+
+
+def with_inc():
+    metrics.inc("counter")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    base = per_call_ns(bare, args.n)
+    print(f"{'':<10} {'span ns':>9} {'inc ns':>9}  (over an empty call)")
+    for on in (False, True):
+        metrics.enable(on)
+        span = per_call_ns(with_span, args.n) - base
+        inc = per_call_ns(with_inc, args.n) - base
+        print(f"{'enabled' if on else 'disabled':<10} {span:>9.0f} {inc:>9.0f}")
+    print()
+    print(metrics.prometheus_text().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
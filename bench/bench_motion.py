@@ -0,0 +1,101 @@
+"""
+Fixed every-3rd-frame inference vs. motion-gated scheduling on a recorded clip.
+
+    python -m bench.bench_motion --clip belt.mp4 [--weights ml/best.pt]
+
+Frames are replayed at the clip's FPS. For each strategy we report how many
+frames went through YOLO, the share of wall time spent in inference (a proxy
+for CPU load), and the detection latency on new items: for every run of
+frames where the always-on reference detects something (conf >= 0.5) after
+an empty stretch, the delay until the strategy first detects it.
+"""
+import argparse
+import time
+
+import cv2
+from ultralytics import YOLO
+
+from core.motion import InferenceScheduler
+
+CONF = 0.5
+
+
+def load_clip(path):
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 15.0
+    frames = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.resize(frame, (320, 240)))
+    cap.release()
+    return frames, fps
+
+
+def detected(model, frame) -> bool:
+    r = model.predict(frame, conf=0.25, imgsz=320, verbose=False)[0]
+    return r.boxes is not None and len(r.boxes) > 0 and float(r.boxes.conf.max()) >= CONF
+
+
+def simulate(model, frames, fps, should_run, record=None):
+    """Replay frames on a virtual clock; inference time advances the clock."""
+    hits = [False] * len(frames)
+    busy = 0.0
+    clock = 0.0
+    runs = 0
+    for i, frame in enumerate(frames):
+        clock = max(clock, i / fps)
+        if not should_run(i, frame, clock):
+            continue
+        t0 = time.perf_counter()
+        hits[i] = detected(model, frame)
+        dt = time.perf_counter() - t0
+        busy += dt
+        clock += dt
+        runs += 1
+        if record:
+            record(dt)
+    return hits, runs, busy / max(clock, len(frames) / fps)
+
+
+def onsets(reference):
+    return [i for i, hit in enumerate(reference) if hit and (i == 0 or not reference[i - 1])]
+
+
+def latency_ms(reference, hits, fps):
+    out = []
+    for start in onsets(reference):
+        j = next((k for k in range(start, len(hits)) if hits[k]), None)
+        if j is not None:
+            out.append((j - start) / fps * 1000)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clip", required=True)
+    ap.add_argument("--weights", default="ml/best.pt")
+    args = ap.parse_args()
+
+    model = YOLO(args.weights)
+    frames, fps = load_clip(args.clip)
+    reference = [detected(model, f) for f in frames]
+    print(f"{len(frames)} frames @ {fps:.0f} fps, {len(onsets(reference))} item arrivals")
+
+    scheduler = InferenceScheduler()
+    strategies = {
+        "every 3rd frame": (lambda i, f, t: (i + 1) % 3 == 0, None),
+        "motion-gated": (lambda i, f, t: scheduler.should_run(f, now=t), scheduler.record),
+    }
+    print(f"{'strategy':<16} {'inferences':>10} {'busy %':>7} {'lat p50 ms':>10} {'missed':>6}")
+    for name, (should_run, record) in strategies.items():
+        hits, runs, busy = simulate(model, frames, fps, should_run, record)
+        lat = sorted(latency_ms(reference, hits, fps))
+        p50 = lat[len(lat) // 2] if lat else float("nan")
+        missed = len(onsets(reference)) - len(lat)
+        print(f"{name:<16} {runs:>10} {busy * 100:>6.1f}% {p50:>10.0f} {missed:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Similarity short-circuit on a stream of re-photographed items.
+
+    python -m bench.bench_similarity                     # real engine (EWIZARD_WEIGHTS)
+    python -m bench.bench_similarity --synthetic 120     # no weights: 120 ms model, labels from file names
+    python -m bench.bench_similarity --thresholds 0.95,0.97,0.99 --scans 500
+
+Each photo in images/ stands for one item model (its file name gives the true
+label: CPU1.JPG -> cpu). The stream draws --scans drop-offs from them, each a
+fresh re-shot: random shift / scale / rotation, exposure and sensor noise.
+Full inference runs once per frame up front (timed), which gives both the
+model's label and the per-frame cost of a miss.
+
+Then, per threshold, every scan goes through the index first. A hit reuses
+the stored label; a miss pays lookup + inference and is confirmed into the
+index the way the app does it: the model's label, or an override with the true
+label when the model answered "unknown". Reported per threshold: hit rate,
+hit accuracy against full inference on the same frame and against the true
+label, mean / p50 latency per scan versus always running the model, and the
+lookup cost.
+"""
+import argparse
+import glob
+import os
+import random
+import time
+
+import numpy as np
+
+from core.similarity import SimilarityIndex, embed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGES_DIR = os.path.join(ROOT, "images")
+
+
+def true_label(path: str) -> str:
+    name = os.path.basename(path).lower()
+    for prefix, label in (("cpu", "cpu"), ("gpu", "gpu"), ("ram", "ram_stick"), ("flash", "flash_drive"), ("usb", "flash_drive")):
+        if name.startswith(prefix):
+            return label
+    return "unknown"
+
+
+def sources(size: int):
+    import cv2
+
+    out = []
+    for p in sorted(glob.glob(os.path.join(IMAGES_DIR, "*"))):
+        if not p.lower().endswith((".jpg", ".jpeg", ".png")):
+            continue
+        img = cv2.imread(p, cv2.IMREAD_COLOR)
+        scale = size / max(img.shape[:2])
+        if scale < 1:
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        out.append((img, true_label(p)))
+    if not out:
+        raise SystemExit(f"No images found in {IMAGES_DIR}")
+    return out
+
+
+def reshoot(img: np.ndarray, rng: random.Random, nrng: np.random.Generator) -> np.ndarray:
+    """The same item photographed again: a little moved, tilted, brighter or darker, noisier."""
+    import cv2
+
+    h, w = img.shape[:2]
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), rng.uniform(-6, 6), rng.uniform(0.92, 1.08))
+    m[:, 2] += (rng.uniform(-0.05, 0.05) * w, rng.uniform(-0.05, 0.05) * h)
+    out = cv2.warpAffine(img, m, (w, h), borderMode=cv2.BORDER_REFLECT)
+    out = cv2.convertScaleAbs(out, alpha=rng.uniform(0.85, 1.15), beta=rng.uniform(-15, 15))
+    noise = nrng.normal(0, 4, out.shape)
+    return np.clip(out + noise, 0, 255).astype(np.uint8)
+
+
+def full_inference(frames, synthetic_ms):
+    """(model label, seconds) per frame."""
+    if synthetic_ms is not None:
+        return [(truth, synthetic_ms / 1000) for _, truth in frames]
+    from core.inference import run_model, warm_up
+
+    warm_up(background=False)
+    out = []
+    for frame, _ in frames:
+        t0 = time.perf_counter()
+        label, _, _, _ = run_model(frame, annotate=False, raw="none", cache=False, similar=False)
+        out.append((label, time.perf_counter() - t0))
+    return out
+
+
+def simulate(frames, inferred, threshold):
+    index = SimilarityIndex(capacity=2048, threshold=threshold, verify_every=0)
+    costs, lookups = [], []
+    hits = agree = correct = 0
+    for (frame, truth), (model_label, model_s) in zip(frames, inferred):
+        t0 = time.perf_counter()
+        vec = embed(frame)
+        match = index.query(vec)
+        lookup = time.perf_counter() - t0
+        lookups.append(lookup)
+        if match is not None:
+            hits += 1
+            agree += match.label == model_label
+            correct += match.label == truth
+            costs.append(lookup)
+            continue
+        costs.append(lookup + model_s)
+        if model_label != "unknown":
+            index.add(vec, model_label, 0.9)
+        elif truth != "unknown":
+            index.add(vec, truth, 1.0, "override")
+    costs.sort()
+    lookups.sort()
+    return {
+        "hits": hits,
+        "agree": agree,
+        "correct": correct,
+        "mean_ms": sum(costs) / len(costs) * 1000,
+        "p50_ms": costs[len(costs) // 2] * 1000,
+        "lookup_p50_ms": lookups[len(lookups) // 2] * 1000,
+        "entries": len(index),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scans", type=int, default=300)
+    ap.add_argument("--size", type=int, default=960, help="longest side of the camera frames")
+    ap.add_argument("--thresholds", default="0.95,0.97,0.99")
+    ap.add_argument("--synthetic", type=float, default=None, metavar="MS",
+                    help="skip the model: each inference costs MS and returns the file-name label")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng, nrng = random.Random(args.seed), np.random.default_rng(args.seed)
+    items = sources(args.size)
+    frames = []
+    for _ in range(args.scans):
+        img, truth = rng.choice(items)
+        frames.append((reshoot(img, rng, nrng), truth))
+
+    inferred = full_inference(frames, args.synthetic)
+    base = sorted(s for _, s in inferred)
+    model_agrees = sum(m == t for (_, t), (m, _) in zip(frames, inferred))
+    print(f"{args.scans} scans of {len(items)} items; full inference every time: "
+          f"mean {sum(base) / len(base) * 1000:.1f} ms, p50 {base[len(base) // 2] * 1000:.1f} ms, "
+          f"model matches the true label on {model_agrees / len(frames):.1%}")
+    print(f"{'threshold':>9} {'hit rate':>9} {'vs model':>9} {'vs truth':>9} {'mean ms':>9} {'p50 ms':>8} {'saved':>7} {'lookup ms':>10}")
+    for threshold in (float(t) for t in args.thresholds.split(",")):
+        r = simulate(frames, inferred, threshold)
+        h = r["hits"] or 1
+        saved = 1 - r["mean_ms"] / (sum(base) / len(base) * 1000)
+        print(f"{threshold:>9.3f} {r['hits'] / len(frames):>9.1%} {r['agree'] / h:>9.1%} {r['correct'] / h:>9.1%} "
+              f"{r['mean_ms']:>9.1f} {r['p50_ms']:>8.1f} {saved:>7.1%} {r['lookup_p50_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
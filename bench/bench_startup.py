@@ -0,0 +1,70 @@
+"""
+Cold-start report: module import times and first-scan latency.
+
+    python -m bench.bench_startup
+
+Import times are measured in fresh interpreters so nothing is cached.
+First-scan latency is measured twice, also in fresh interpreters: once cold,
+and once after warm_up() has finished (what a kiosk user sees when the UI
+rendered before they pressed Scan).
+"""
+import json
+import subprocess
+import sys
+
+MODULES = [
+    "utils.storage",
+    "core.inference",
+    "core.gemini_client",
+    "streamlit",
+    "pandas",
+    "cv2",
+    "ultralytics",
+]
+
+IMPORT_SNIPPET = """
+import sys, time
+t0 = time.perf_counter()
+import {module}
+heavy = [m for m in ("torch", "ultralytics", "cv2", "pandas") if m in sys.modules]
+print(time.perf_counter() - t0, ",".join(heavy))
+"""
+
+SCAN_SNIPPET = """
+import glob, json, time
+from PIL import Image
+from core import inference
+img = Image.open(sorted(glob.glob("images/*"))[0]).convert("RGB")
+if {warm}:
+    inference.warm_up(background=False)
+t0 = time.perf_counter()
+inference.run_model(img, cache=False)
+print(json.dumps({{"first_scan_s": time.perf_counter() - t0, **inference.startup_report()}}))
+"""
+
+
+def run(snippet: str) -> str:
+    out = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()[-1]
+
+
+def main():
+    print(f"{'module':<20} {'import s':>9}  heavy deps pulled in")
+    for module in MODULES:
+        try:
+            secs, _, heavy = run(IMPORT_SNIPPET.format(module=module)).partition(" ")
+        except subprocess.CalledProcessError:
+            print(f"{module:<20} {'n/a':>9}")
+            continue
+        print(f"{module:<20} {float(secs):>9.3f}  {heavy.strip() or '-'}")
+
+    print()
+    for warm in (False, True):
+        report = json.loads(run(SCAN_SNIPPET.format(warm=warm)))
+        name = "after warm_up" if warm else "cold"
+        details = ", ".join(f"{k}={v:.3f}s" for k, v in report.items())
+        print(f"first scan ({name}): {details}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Append latency of the scan log at growing history sizes.
+
+    python -m bench.bench_storage [--max-rows 1000000]
+
+Pre-fills a temporary log to each size with one bulk write, then times
+single-row appends. Latency should stay flat regardless of history size.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from utils.scanlog import ScanLog
+
+COLUMNS = ["timestamp", "label", "confidence", "bin", "overridden"]
+ROW = {
+    "timestamp": "2026-02-06T23:01:16",
+    "label": "ram_stick",
+    "confidence": 0.95,
+    "bin": "🧩 Components (CPU/RAM)",
+    "overridden": False,
+}
+
+
+def fill(log: ScanLog, n: int):
+    chunk = [ROW] * 10_000
+    while n > 0:
+        log.append(chunk[:n])
+        n -= min(n, len(chunk))
+    log.flush()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--max-rows", type=int, default=1_000_000)
+    ap.add_argument("--appends", type=int, default=2000)
+    args = ap.parse_args()
+
+    sizes = [s for s in (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000) if s <= args.max_rows]
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>10} {'p50 us':>9} {'p95 us':>9} {'max us':>9} {'file MB':>8}")
+        for size in sizes:
+            path = os.path.join(tmp, f"scans_{size}.csv")
+            log = ScanLog(path, COLUMNS)
+            fill(log, size)
+
+            samples = []
+            for _ in range(args.appends):
+                t0 = time.perf_counter()
+                log.append([ROW])
+                samples.append((time.perf_counter() - t0) * 1e6)
+            log.close()
+
+            samples.sort()
+            p95 = samples[int(len(samples) * 0.95)]
+            mb = os.path.getsize(path) / 1e6
+            print(f"{size:>10} {statistics.median(samples):>9.1f} {p95:>9.1f} {samples[-1]:>9.1f} {mb:>8.1f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Scan history under contention: concurrent writer and reader processes on the
+CSV log and on the SQLite backend, through the public utils.storage API.
+
+    python -m bench.bench_storage_contention [--writers 4] [--readers 2] [--rows 2000] [--history 100000]
+
+Each backend gets a fresh temporary data/ pre-filled with --history scans.
+Every writer appends --rows scans one append_scan() at a time, tagging each
+with a unique id; meanwhile readers loop over load_scans(since=...) (the
+dashboard filter), scan_page() and scan_stats(). Afterwards the history must
+hold exactly history + writers * rows scans with every tag present once.
+Reports append and read throughput and append latency percentiles.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _storage(backend: str, workdir: str):
+    os.environ["EWIZARD_STORAGE"] = backend
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    from utils import storage
+
+    return storage
+
+
+def prefill(backend, workdir, n):
+    from bench.bench_columnar import synth_rows
+
+    storage = _storage(backend, workdir)
+    storage.ensure_storage()
+    batch = []
+    for row in synth_rows(n, days=90):
+        batch.append(row)
+        if len(batch) == 50_000:
+            storage.append_scans(batch)
+            batch = []
+    storage.append_scans(batch)
+    storage.flush_scans()
+
+
+def writer(backend, workdir, wid, rows, start, out):
+    storage = _storage(backend, workdir)
+    start.wait()
+    lat = []
+    for i in range(rows):
+        row = {"timestamp": "2026-04-01T12:00:00", "label": "cpu", "confidence": 0.9,
+               "bin": f"w{wid}-{i}", "overridden": False}
+        t0 = time.perf_counter()
+        storage.append_scan(row)
+        lat.append(time.perf_counter() - t0)
+    storage.flush_scans()
+    out.put(("w", lat))
+
+
+def reader(backend, workdir, start, stop, out):
+    storage = _storage(backend, workdir)
+    start.wait()
+    reads = 0
+    while not stop.is_set():
+        storage.load_scans(since="2026-03-25")
+        storage.scan_page(None, 25)
+        storage.scan_stats()
+        reads += 3
+    out.put(("r", reads))
+
+
+def verify(backend, workdir, out):
+    storage = _storage(backend, workdir)
+    df = storage.load_scans()
+    tags = df["bin"][df["bin"].astype(str).str.startswith("w")]
+    out.put((len(df), len(tags), tags.nunique()))
+
+
+def run(backend, args):
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as workdir:
+        p = ctx.Process(target=prefill, args=(backend, workdir, args.history))
+        p.start()
+        p.join()
+
+        start, stop, out = ctx.Event(), ctx.Event(), ctx.Queue()
+        writers = [ctx.Process(target=writer, args=(backend, workdir, w, args.rows, start, out))
+                   for w in range(args.writers)]
+        readers = [ctx.Process(target=reader, args=(backend, workdir, start, stop, out))
+                   for _ in range(args.readers)]
+        for proc in writers + readers:
+            proc.start()
+        time.sleep(1.0)  # let every child finish importing
+        t0 = time.perf_counter()
+        start.set()
+        lat = []
+        for _ in writers:
+            lat.extend(out.get()[1])
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        reads = sum(out.get()[1] for _ in readers)
+        for proc in writers + readers:
+            proc.join()
+
+        p = ctx.Process(target=verify, args=(backend, workdir, out))
+        p.start()
+        total, tagged, unique = out.get()
+        p.join()
+
+    expected = args.writers * args.rows
+    lost = expected - unique
+    ok = total == args.history + expected and lost == 0 and tagged == expected
+
+    lat.sort()
+    print(f"{backend:<7} {'ok' if ok else 'FAILED':<7} rows {total:>8} (lost {lost}, duplicated {tagged - unique})  "
+          f"appends {len(lat) / elapsed:8.0f}/s  p50 {lat[len(lat) // 2] * 1000:6.2f} ms  "
+          f"p99 {lat[int(len(lat) * 0.99)] * 1000:7.2f} ms  reads {reads / elapsed:7.1f}/s")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--readers", type=int, default=2)
+    ap.add_argument("--rows", type=int, default=2000, help="appends per writer")
+    ap.add_argument("--history", type=int, default=100_000, help="scans already in the history")
+    ap.add_argument("--backend", default="csv,sqlite")
+    args = ap.parse_args()
+
+    print(f"{args.writers} writers x {args.rows} appends, {args.readers} readers, {args.history} scans of history")
+    ok = all([run(b.strip(), args) for b in args.backend.split(",")])
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
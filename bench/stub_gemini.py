@@ -0,0 +1,124 @@
+"""
+Local stand-in for the Gemini generateContent endpoint.
+
+    python -m bench.stub_gemini [--port 8765] [--latency 0.2] [--error-rate 0.1]
+
+Point the client at it with GEMINI_BASE_URL=http://127.0.0.1:8765. Latency and
+errors can be injected per server (and changed at runtime through the
+attributes of the StubGemini object when used from Python).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+REPLY = {
+    "what": "A small electronic component used in computers.",
+    "safety": "Handle with care and recycle through a certified e-waste program.",
+}
+
+
+class StubGemini:
+    def __init__(self, port: int = 0, latency: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, fail_first: int = 0, seed: int = 0,
+                 retry_after: Optional[str] = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fail_first = fail_first
+        self.retry_after = retry_after  # Retry-After header sent with error responses
+        self.requests = 0
+        self.connections = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+            # Headers and body go out in separate writes; without this, Nagle +
+            # delayed ACK add ~40 ms to every keep-alive response
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                with stub._lock:
+                    stub.requests += 1
+                    n = stub.requests
+                    fail = n <= stub.fail_first or stub._rng.random() < stub.error_rate
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if fail:
+                    body = json.dumps({"error": {"code": stub.error_status}}).encode()
+                    self.send_response(stub.error_status)
+                    if stub.retry_after is not None:
+                        self.send_header("Retry-After", stub.retry_after)
+                else:
+                    text = json.dumps(REPLY)
+                    body = json.dumps({
+                        "candidates": [{
+                            "content": {"parts": [{"text": text}]},
+                            "finishReason": "STOP",
+                        }]
+                    }).encode()
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubGemini":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--error-status", type=int, default=503)
+    args = ap.parse_args()
+
+    stub = StubGemini(args.port, args.latency, args.error_rate, args.error_status)
+    print(f"Stub Gemini listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Benchmark suite for the hot paths: detection, scan storage, disposal guidance.
+
+    python -m bench.suite                          # everything, results -> bench/results/
+    python -m bench.suite --only storage --rows 1000000
+    python -m bench.suite --compare bench/results/A.json bench/results/B.json
+
+Every case runs in a fresh interpreter inside its own temporary working
+directory (so data/ and the tips cache start empty and the real ones are never
+touched), which also makes "peak RSS" that case's own high-water mark.
+Detection uses the photos in images/; storage runs against a synthetic history
+of --rows scans; guidance talks to bench/stub_gemini.py on localhost.
+
+Per case: p50 / p95 / p99 latency (ms), throughput (items/s) and peak RSS
+(MB). Results are written as JSON together with the git commit, so two runs
+can be compared with --compare.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGES_DIR = os.path.join(ROOT, "images")
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+
+CASES = {}
+
+
+def case(name: str):
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+# ---------------- Measurement ----------------
+def percentile(ordered, p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def measure(fn, iterations: int, items: int = 1, warmup: int = 1) -> dict:
+    """Time `iterations` calls of fn(); each call handles `items` items."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "throughput": iterations * items / elapsed,
+    }
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+
+
+# ---------------- Detection ----------------
+def _images(n: int):
+    from core.inference import decode_image
+
+    paths = sorted(p for p in glob.glob(os.path.join(IMAGES_DIR, "*")) if p.lower().endswith((".jpg", ".jpeg", ".png")))
+    if not paths:
+        raise SystemExit(f"No images found in {IMAGES_DIR}")
+    frames = []
+    for p in paths:
+        with open(p, "rb") as f:
+            frames.append(decode_image(f.read()))
+    return [frames[i % len(frames)] for i in range(n)]
+
+
+@case("detection.run_model")
+def detection_run_model(args):
+    from core.inference import run_model
+
+    frames = iter(_images(args.iterations + 1))
+    return measure(lambda: run_model(next(frames), cache=False), args.iterations)
+
+
+@case("detection.run_model_batch")
+def detection_run_model_batch(args):
+    from core.inference import run_model_batch
+
+    frames = _images(args.batch_size)
+    return measure(lambda: run_model_batch(frames, batch_size=args.batch_size, cache=False),
+                   max(3, args.iterations // args.batch_size), items=len(frames))
+
+
+@case("detection.cache_hit")
+def detection_cache_hit(args):
+    from core.inference import run_model
+
+    frame = _images(1)[0]
+    return measure(lambda: run_model(frame), args.iterations * 10)
+
+
+# ---------------- Storage ----------------
+def _history(rows: int):
+    """Synthetic scan history in ./data (the case's temp working directory)."""
+    from bench.bench_columnar import synth_rows
+    from utils import storage
+
+    batch = []
+    for row in synth_rows(rows, days=90):
+        batch.append(row)
+        if len(batch) == 50_000:
+            storage.append_scans(batch)
+            batch = []
+    storage.append_scans(batch)
+    storage.flush_scans()
+    return storage
+
+
+ROW = {"timestamp": "2026-04-01T12:00:00", "label": "cpu", "confidence": 0.91, "bin": "🧩 Components (CPU/RAM)", "overridden": False}
+
+
+@case("storage.append_scan")
+def storage_append(args):
+    storage = _history(args.rows)
+    return measure(lambda: storage.append_scan(ROW), args.iterations * 10)
+
+
+@case("storage.load_scans")
+def storage_load(args):
+    storage = _history(args.rows)
+    result = measure(storage.load_scans, max(3, args.iterations // 10), items=args.rows)
+    result["rows"] = args.rows
+    return result
+
+
+@case("storage.load_scans_last_week")
+def storage_load_recent(args):
+    storage = _history(args.rows)
+    return measure(lambda: storage.load_scans(since="2026-03-25"), max(3, args.iterations // 10))
+
+
+@case("storage.scan_stats")
+def storage_stats(args):
+    storage = _history(args.rows)
+    storage.scan_stats()  # initial build; the timed calls are incremental
+
+    def step():
+        storage.append_scan(ROW)
+        storage.scan_stats()
+    return measure(step, args.iterations * 10)
+
+
+@case("storage.recent_scans")
+def storage_recent(args):
+    storage = _history(args.rows)
+    return measure(lambda: storage.recent_scans(25), args.iterations * 10)
+
+
+@case("storage.scan_page")
+def storage_page(args):
+    storage = _history(args.rows)
+    return measure(lambda: storage.scan_page(None, 25), args.iterations * 10)
+
+
+@case("storage.scan_page_10")
+def storage_page_deep(args):
+    storage = _history(args.rows)
+
+    def ten_pages():
+        cursor = None
+        for _ in range(10):
+            _, cursor = storage.scan_page(cursor, 25)
+    return measure(ten_pages, args.iterations, items=10)
+
+
+# ---------------- Guidance ----------------
+def _stub(args):
+    from bench.stub_gemini import StubGemini
+    from core import gemini_client
+
+    stub = StubGemini(latency=args.gemini_latency).start()
+    gemini_client.GEMINI_BASE_URL = stub.url
+    gemini_client.GEMINI_API_KEY = gemini_client.GEMINI_API_KEY or "stub"
+    return gemini_client
+
+
+@case("guidance.fetch")
+def guidance_fetch(args):
+    gemini = _stub(args)
+    return measure(lambda: gemini._request_tips("cpu", gemini.DEFAULT_LOCATION, time.monotonic() + 5.0),
+                   args.iterations)
+
+
+@case("guidance.cache_hit")
+def guidance_cached(args):
+    gemini = _stub(args)
+    return measure(lambda: gemini.get_disposal_tips("cpu"), args.iterations * 10)
+
+
+# ---------------- Driver ----------------
+def run_child(name: str, args) -> dict:
+    cmd = [
+        sys.executable, "-m", "bench.suite", "--child", name,
+        "--rows", str(args.rows), "--iterations", str(args.iterations),
+        "--batch-size", str(args.batch_size), "--gemini-latency", str(args.gemini_latency),
+    ]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory() as tmp:
+        out = subprocess.run(cmd, cwd=tmp, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        return {"error": (out.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def git_revision() -> dict:
+    def git(*cmd):
+        return subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "--short", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def print_results(results: dict):
+    print(f"{'case':<30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'items/s':>10} {'RSS MB':>8}")
+    for name, r in results.items():
+        if "error" in r:
+            print(f"{name:<30} error: {r['error']}")
+            continue
+        rss = f"{r['peak_rss_mb']:.0f}" if r.get("peak_rss_mb") else "-"
+        print(f"{name:<30} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['throughput']:>10.1f} {rss:>8}")
+
+
+def compare(a_path: str, b_path: str):
+    with open(a_path, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(b_path, encoding="utf-8") as f:
+        b = json.load(f)
+    print(f"{a['meta'].get('commit')} -> {b['meta'].get('commit')}")
+    print(f"{'case':<30} {'p50 ms':>19} {'p95 ms':>19} {'items/s':>21}")
+    for name in b["results"]:
+        ra, rb = a["results"].get(name, {}), b["results"][name]
+        if "p50_ms" not in ra or "p50_ms" not in rb:
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "throughput"):
+            change = (rb[key] / ra[key] - 1) * 100 if ra[key] else 0.0
+            cells.append(f"{rb[key]:>10.2f} {change:>+7.1f}%")
+        print(f"{name:<30} " + " ".join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--only", default=None, help="comma-separated case names or prefixes (detection, storage, guidance)")
+    ap.add_argument("--rows", type=int, default=100_000, help="synthetic scan history size")
+    ap.add_argument("--iterations", type=int, default=50)
+    ap.add_argument("--batch-size", type=int, default=16)
+    ap.add_argument("--gemini-latency", type=float, default=0.05, help="stub response delay (s)")
+    ap.add_argument("--out", default=None, help="JSON output path (default: bench/results/<time>-<commit>.json)")
+    ap.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.child:
+        result = CASES[args.child](args)
+        result["peak_rss_mb"] = peak_rss_mb()
+        print(json.dumps(result))
+        return
+
+    wanted = [w.strip() for w in args.only.split(",")] if args.only else None
+    names = [n for n in CASES if not wanted or any(n == w or n.startswith(w + ".") for w in wanted)]
+    results = {}
+    for name in names:
+        print(f"running {name} ...", file=sys.stderr)
+        results[name] = run_child(name, args)
+
+    print_results(results)
+    meta = {
+        **git_revision(),
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("compare", "child", "out")},
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{meta['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\nsaved {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Inference backends behind core.engine.Engine.
+
+    torch  ultralytics YOLO on the PyTorch weights (ml/best.pt)
+    onnx   ONNX Runtime on CPU with a configurable thread count, for an
+           exported fp32 model or its int8-quantized variant
+
+Both return Detections (boxes / confidences / class ids as numpy arrays plus
+an on-demand plot()), so post-processing does not care which one ran.
+
+Export and quantize once, then select with EWIZARD_BACKEND / EWIZARD_WEIGHTS:
+
+    python -m core.backends export --weights ml/best.pt --imgsz 320
+    python -m core.backends quantize --onnx ml/best.onnx --calib images/
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import glob
+import os
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class Detections:
+    """Per-image detections in original-image pixel coordinates."""
+
+    def __init__(
+        self,
+        xyxy: np.ndarray,
+        conf: np.ndarray,
+        cls: np.ndarray,
+        names: Dict[int, str],
+        orig_img: np.ndarray,
+        plotter: Optional[Callable[[], np.ndarray]] = None,
+    ):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+        self.names = names
+        self.orig_img = orig_img
+        self._plotter = plotter
+
+    def __len__(self) -> int:
+        return len(self.conf)
+
+    def plot(self) -> np.ndarray:
+        """Annotated BGR copy of the input frame."""
+        if self._plotter is not None:
+            return self._plotter()
+        import cv2
+
+        img = self.orig_img.copy()
+        for (x1, y1, x2, y2), c, k in zip(self.xyxy.astype(int), self.conf, self.cls):
+            cv2.rectangle(img, (x1, y1), (x2, y2), (0, 200, 255), 2)
+            text = f"{self.names.get(int(k), int(k))} {c:.2f}"
+            cv2.putText(img, text, (x1, max(12, y1 - 4)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 200, 255), 1, cv2.LINE_AA)
+        return img
+
+
+# ---------------- PyTorch (ultralytics) ----------------
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, weights: str, imgsz: Optional[int] = None):
+        from ultralytics import YOLO
+
+        self.weights = weights
+        self.imgsz = imgsz
+        self.model = YOLO(weights)
+        self.names = self.model.names
+
+    def predict(self, frames: Sequence[np.ndarray], conf: float, imgsz: Optional[int] = None) -> List[Detections]:
+        imgsz = imgsz or self.imgsz
+        kwargs = {"imgsz": imgsz} if imgsz else {}
+        results = self.model.predict(list(frames), conf=conf, verbose=False, **kwargs)
+        out = []
+        for r in results:
+            boxes = r.boxes
+            if boxes is None or len(boxes) == 0:
+                empty = np.zeros((0,), dtype=np.float32)
+                out.append(Detections(np.zeros((0, 4), np.float32), empty, empty.astype(np.intp), r.names, r.orig_img, r.plot))
+                continue
+            out.append(Detections(
+                boxes.xyxy.cpu().numpy(),
+                boxes.conf.cpu().numpy(),
+                boxes.cls.cpu().numpy().astype(np.intp),
+                r.names,
+                r.orig_img,
+                r.plot,
+            ))
+        return out
+
+
+# ---------------- ONNX Runtime ----------------
+def _letterbox(img: np.ndarray, size: int):
+    import cv2
+
+    h, w = img.shape[:2]
+    gain = min(size / h, size / w)
+    nh, nw = int(round(h * gain)), int(round(w * gain))
+    top, left = (size - nh) // 2, (size - nw) // 2
+    out = np.full((size, size, 3), 114, dtype=np.uint8)
+    out[top:top + nh, left:left + nw] = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return out, gain, left, top
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(
+        self,
+        weights: str,
+        threads: int = 0,
+        imgsz: Optional[int] = None,
+        iou: float = 0.7,
+        max_det: int = 300,
+    ):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+            opts.inter_op_num_threads = 1
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(weights, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.weights = weights
+        self.iou = iou
+        self.max_det = max_det
+
+        # ultralytics stores class names / imgsz in the ONNX metadata
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = {int(k): v for k, v in ast.literal_eval(meta["names"]).items()} if "names" in meta else {}
+        exported = ast.literal_eval(meta["imgsz"])[0] if "imgsz" in meta else 640
+        self.imgsz = imgsz or exported
+        shape = self.session.get_inputs()[0].shape
+        self.fixed_batch = shape[0] if isinstance(shape[0], int) else None
+        self.fixed_size = isinstance(shape[2], int)
+
+    def _infer(self, batch: np.ndarray) -> np.ndarray:
+        if self.fixed_batch and len(batch) != self.fixed_batch:
+            return np.concatenate([self.session.run(None, {self.input_name: b[None]})[0] for b in batch])
+        return self.session.run(None, {self.input_name: batch})[0]
+
+    def predict(self, frames: Sequence[np.ndarray], conf: float, imgsz: Optional[int] = None) -> List[Detections]:
+        import cv2
+
+        if not frames:
+            return []
+        # A static-shape export only accepts the size it was exported at
+        size = self.imgsz if self.fixed_size or not imgsz else imgsz
+        boxed = [_letterbox(f, size) for f in frames]
+        # BGR HWC uint8 -> RGB CHW float, one contiguous batch
+        batch = np.stack([b[0] for b in boxed])[..., ::-1].transpose(0, 3, 1, 2)
+        batch = np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+        preds = self._infer(batch)  # (B, 4 + nc, anchors)
+
+        out = []
+        for frame, (_, gain, left, top), pred in zip(frames, boxed, preds):
+            pred = pred.T
+            scores = pred[:, 4:]
+            cls = scores.argmax(1)
+            best = scores[np.arange(len(scores)), cls]
+            keep = best >= conf
+            pred, cls, best = pred[keep], cls[keep], best[keep]
+
+            cx, cy, w, h = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+            xyxy = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+            if len(xyxy):
+                # Class-aware NMS: offset boxes per class so classes never suppress each other
+                offset = cls[:, None] * 4096.0
+                shifted = xyxy + offset
+                xywh = np.concatenate([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]], axis=1)
+                idx = cv2.dnn.NMSBoxes(xywh.tolist(), best.tolist(), conf, self.iou)
+                idx = np.array(idx, dtype=np.intp).reshape(-1)[: self.max_det]
+                xyxy, cls, best = xyxy[idx], cls[idx], best[idx]
+
+            xyxy = (xyxy - [left, top, left, top]) / gain
+            fh, fw = frame.shape[:2]
+            xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, fw)
+            xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, fh)
+            out.append(Detections(xyxy.astype(np.float32), best.astype(np.float32), cls.astype(np.intp), self.names, frame))
+        return out
+
+
+# ---------------- Selection ----------------
+def create(weights: str, backend: str = "auto", threads: int = 0, imgsz: Optional[int] = None):
+    """backend: "torch", "onnx", or "auto" (by the weights file extension)."""
+    if backend == "auto":
+        backend = "onnx" if weights.endswith(".onnx") else "torch"
+    if backend == "onnx":
+        if not weights.endswith(".onnx"):
+            candidate = os.path.splitext(weights)[0] + ".onnx"
+            if not os.path.exists(candidate):
+                raise FileNotFoundError(
+                    f"{candidate} not found; run: python -m core.backends export --weights {weights}"
+                )
+            weights = candidate
+        return OnnxBackend(weights, threads=threads, imgsz=imgsz)
+    if backend == "torch":
+        return TorchBackend(weights, imgsz=imgsz)
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+# ---------------- Export / quantization ----------------
+def export_onnx(weights: str, imgsz: int = 320) -> str:
+    """Export PyTorch weights to ONNX (dynamic batch) next to the .pt file."""
+    from ultralytics import YOLO
+
+    return str(YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True))
+
+
+class _CalibrationReader:
+    """Feeds letterboxed calibration images to onnxruntime static quantization."""
+
+    def __init__(self, input_name: str, paths: List[str], imgsz: int):
+        self.input_name = input_name
+        self.paths = iter(paths)
+        self.imgsz = imgsz
+
+    def get_next(self):
+        import cv2
+
+        for path in self.paths:
+            img = cv2.imread(path)
+            if img is None:
+                continue
+            boxed = _letterbox(img, self.imgsz)[0][..., ::-1].transpose(2, 0, 1)
+            return {self.input_name: np.ascontiguousarray(boxed[None], dtype=np.float32) / 255.0}
+        return None
+
+
+def quantize_int8(onnx_path: str, calib_dir: Optional[str] = None, out_path: Optional[str] = None) -> str:
+    """
+    int8 variant of an exported model. With calibration images, activations are
+    quantized statically (QDQ, best on CPU); otherwise weights-only dynamic.
+    """
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    out_path = out_path or onnx_path.replace(".onnx", "-int8.onnx")
+    if calib_dir:
+        import onnxruntime as ort
+
+        sess = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        meta = sess.get_modelmeta().custom_metadata_map
+        imgsz = ast.literal_eval(meta["imgsz"])[0] if "imgsz" in meta else 640
+        paths = sorted(
+            p for p in glob.glob(os.path.join(calib_dir, "*"))
+            if p.lower().endswith((".jpg", ".jpeg", ".png"))
+        )
+        reader = _CalibrationReader(sess.get_inputs()[0].name, paths, imgsz)
+        quantize_static(
+            onnx_path, out_path, reader,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+    else:
+        quantize_dynamic(onnx_path, out_path, weight_type=QuantType.QUInt8)
+    return out_path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export / quantize detection weights.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    ex = sub.add_parser("export")
+    ex.add_argument("--weights", default="ml/best.pt")
+    ex.add_argument("--imgsz", type=int, default=320)
+    q = sub.add_parser("quantize")
+    q.add_argument("--onnx", default="ml/best.onnx")
+    q.add_argument("--calib", default=None, help="directory of calibration images")
+    args = ap.parse_args()
+
+    if args.command == "export":
+        print(export_onnx(args.weights, args.imgsz))
+    else:
+        print(quantize_int8(args.onnx, args.calib))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
+import os
+
 BIN_MAP = {
     "cpu": "🧩 Components (CPU/RAM)",
+    "gpu": "🧩 Components (CPU/RAM)",
     "ram_stick": "🧩 Components (CPU/RAM)",
     "flash_drive": "💾 Storage (USB/Flash Drives)",
     "unknown": "❓ Unknown / Manual Review",
@@ -9,7 +12,53 @@ BIN_MAP = {
 # Fallback tips if Gemini fails / no internet
 STATIC_TIPS = {
     "cpu": "CPU is an electronic component. Recycle via an e-waste program; do not throw in the trash.",
+    "gpu": "A graphics card is an electronic component. Recycle via an e-waste program; do not throw in the trash.",
     "ram_stick": "RAM is an electronic component. Recycle via an e-waste drop-off or certified recycler.",
     "flash_drive": "Flash drives can contain personal data. If possible, wipe or destroy data before recycling via e-waste.",
     "unknown": "Item not recognized confidently. Please use a campus e-waste drop-off or ask a volunteer for help.",
-}
\ No newline at end of file
+}
+
+
+# ---------------- Detection ----------------
+# Dataset the weights were trained on; its `names` define the class ids
+DATASET_YAML = "ml/ewaste.yaml"
+
+# YOLO class names -> app labels. Classes not listed here map to "unknown".
+CLASS_TO_LABEL = {
+    "CPU": "cpu",
+    "GPU": "gpu",
+    "RAM": "ram_stick",
+    "USB_Drive": "flash_drive",
+}
+
+# Confidence thresholds
+DETECT_CONF = 0.05   # app scans: keep weak boxes, the UI slider decides
+LIVE_CONF = 0.25     # live camera loops: boxes fed to the tracker
+REVIEW_CONF = 0.25   # app: default slider value; scans below it go to manual review
+SORT_SCORE = 1.5     # tracker: summed confidence before a servo move (~3 frames at 0.5)
+LIVE_IMGSZ = 320     # Pi camera loops run at 320x240
+
+# Servo angle per app label (single-servo Pi sorter). Labels without an
+# angle are never actuated.
+SERVO_ANGLES = {
+    "flash_drive": 45,
+    "ram_stick": 35,
+    "cpu": 180,
+}
+
+# Shared inference engine (core/engine_server.py). Empty -> load the model
+# in-process. Otherwise "unix:/path/to.sock" or "tcp:127.0.0.1:8766".
+ENGINE_ADDRESS = os.getenv("EWIZARD_ENGINE", "")
+
+# Near-duplicate short-circuit before detection (core/similarity.py): frames
+# that look like a recently confirmed scan reuse its label. Off unless
+# EWIZARD_SIMILARITY=1.
+SIMILARITY_ENABLED = os.getenv("EWIZARD_SIMILARITY", "") not in ("", "0")
+SIMILARITY_THRESHOLD = 0.95    # cosine similarity needed to reuse a label (other items score < 0.85)
+SIMILARITY_CAPACITY = 2048     # confirmed scans kept in the index
+SIMILARITY_VERIFY_EVERY = 20   # every Nth hit still runs the model, to measure agreement
+# Only labels a person stands behind are reused: manual overrides always, model
+# labels only at this confidence or above. A borderline detection that nobody
+# corrected is not a confirmation, and indexing it would copy a mistake onto
+# every look-alike for as long as it stays in the index.
+SIMILARITY_MIN_CONF = 0.85
@@ -0,0 +1,143 @@
+"""
+One inference engine for the Streamlit app and the ml/ camera loops.
+
+The engine owns model loading (through core/backends.py), the class-id ->
+class-name -> app-label mapping (checked against the dataset YAML), the
+confidence thresholds in core/config.py, and the helpers that turn raw
+detections into "the item" (top) or tracker input (items).
+
+get_engine() returns the process-wide engine: a local Engine, or -- when
+EWIZARD_ENGINE points at a running `python -m core.engine_server` -- a
+RemoteEngine with the same interface, so the app and the Pi loop can share a
+single copy of the weights on the device.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import CLASS_TO_LABEL, DATASET_YAML, DETECT_CONF, ENGINE_ADDRESS
+
+if TYPE_CHECKING:
+    from core.backends import Detections
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Backend selection (see core/backends.py): "torch", "onnx", or "auto" (by the
+# weights extension). ORT_THREADS=0 leaves the thread count to ONNX Runtime.
+WEIGHTS_PATH = os.getenv("EWIZARD_WEIGHTS", "ml/best.pt")
+BACKEND = os.getenv("EWIZARD_BACKEND", "auto")
+ORT_THREADS = int(os.getenv("EWIZARD_ORT_THREADS", "0"))
+
+
+def resolve_path(path: str) -> str:
+    """Relative paths work from the repo root and from ml/ alike."""
+    if os.path.isabs(path) or os.path.exists(path):
+        return path
+    return os.path.join(ROOT, path)
+
+
+def dataset_names(yaml_path: str = DATASET_YAML) -> Dict[int, str]:
+    import yaml
+
+    with open(resolve_path(yaml_path), "r", encoding="utf-8") as f:
+        names = yaml.safe_load(f).get("names", {})
+    if isinstance(names, list):
+        names = dict(enumerate(names))
+    return {int(k): str(v) for k, v in names.items()}
+
+
+class _EngineBase:
+    names: Dict[int, str] = {}
+    _lookup_cache: Dict[Tuple, Tuple[np.ndarray, np.ndarray]]
+
+    def label_lookups(self, names: Optional[Dict[int, str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """class id -> class name / app label, as arrays indexable by a cls array."""
+        names = self.names if names is None else names
+        key = tuple(sorted(names.items()))
+        if key not in self._lookup_cache:
+            size = max(names) + 1 if names else 0
+            class_names = np.array([str(names.get(i, i)) for i in range(size)], dtype=object)
+            labels = np.array([CLASS_TO_LABEL.get(n, "unknown") for n in class_names], dtype=object)
+            self._lookup_cache[key] = (class_names, labels)
+        return self._lookup_cache[key]
+
+    def top(self, det: "Detections") -> Optional[Tuple[str, str, float]]:
+        """(class_name, app_label, confidence) of the highest-confidence box."""
+        if len(det) == 0:
+            return None
+        class_names, labels = self.label_lookups(det.names)
+        best = int(det.conf.argmax())
+        k = det.cls[best]
+        return class_names[k], labels[k], float(det.conf[best])
+
+    def items(self, det: "Detections") -> List[Tuple[Tuple[float, ...], str, float]]:
+        """(box, app_label, confidence) per detection, e.g. for VotingTracker."""
+        if len(det) == 0:
+            return []
+        _, labels = self.label_lookups(det.names)
+        return [
+            (tuple(box), labels[k], c)
+            for box, k, c in zip(det.xyxy.tolist(), det.cls.tolist(), det.conf.tolist())
+        ]
+
+
+class Engine(_EngineBase):
+    """In-process engine around one backend instance."""
+
+    def __init__(
+        self,
+        weights: str = WEIGHTS_PATH,
+        backend: str = BACKEND,
+        threads: int = ORT_THREADS,
+        dataset_yaml: Optional[str] = DATASET_YAML,
+    ):
+        from core import backends
+
+        self._lookup_cache = {}
+        self._backend = backends.create(resolve_path(weights), backend, threads=threads)
+        self.weights = self._backend.weights
+        self.name = self._backend.name
+        self.names = dict(self._backend.names)
+
+        if dataset_yaml:
+            try:
+                expected = dataset_names(dataset_yaml)
+            except OSError:
+                expected = {}
+            if not self.names:
+                self.names = expected
+            elif expected and expected != self.names:
+                print(f"[engine] class names in {self.weights} differ from {dataset_yaml}: {self.names} vs {expected}")
+
+        unmapped = sorted(set(self.names.values()) - set(CLASS_TO_LABEL))
+        if unmapped:
+            print(f"[engine] classes without an app label (-> unknown): {unmapped}")
+
+    def predict(self, frames: Sequence[np.ndarray], conf: float = DETECT_CONF, imgsz: Optional[int] = None) -> List["Detections"]:
+        return self._backend.predict(frames, conf, imgsz=imgsz)
+
+    def info(self) -> Dict[str, object]:
+        return {"backend": self.name, "weights": self.weights, "names": self.names}
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The process-wide engine: remote if EWIZARD_ENGINE is set, else local."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if ENGINE_ADDRESS:
+                    from core.engine_server import RemoteEngine
+
+                    _engine = RemoteEngine(ENGINE_ADDRESS)
+                else:
+                    _engine = Engine()
+    return _engine
@@ -0,0 +1,448 @@
+"""
+Local inference service: one process holds the weights, the Streamlit app
+and the camera loop call it over a Unix socket (or localhost TCP).
+
+    python -m core.engine_server --address unix:/tmp/ewizard-engine.sock
+    EWIZARD_ENGINE=unix:/tmp/ewizard-engine.sock streamlit run app.py
+
+Wire format, both directions: 4-byte big-endian header length, a JSON
+header, then an optional binary payload. Requests carry raw BGR frames
+(no re-encoding); responses carry boxes / confidences / class ids, which
+RemoteEngine turns back into Detections on the client side.
+
+Concurrent predict requests (several kiosks, sessions, the camera loop) are
+gathered by MicroBatcher into one model call of up to --max-batch frames,
+waiting at most --max-wait-ms after the first request. When --max-queue
+requests are already waiting the server answers "busy" at once instead of
+queueing more work; RemoteEngine backs off and retries a few times. The
+"stats" op (python -m core.engine_server --stats) reports queue depth, batch
+sizes and wait / end-to-end latency percentiles.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.backends import Detections
+from core.config import DETECT_CONF
+from core.engine import Engine, _EngineBase
+
+DEFAULT_ADDRESS = "unix:/tmp/ewizard-engine.sock" if hasattr(socket, "AF_UNIX") else "tcp:127.0.0.1:8766"
+_HEADER = struct.Struct(">I")
+
+
+# ---------------- Framing ----------------
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    while view:
+        got = sock.recv_into(view)
+        if not got:
+            raise ConnectionError("connection closed")
+        view = view[got:]
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, header: Dict[str, Any], payload: Sequence[bytes] = ()):
+    head = json.dumps(header).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(head)) + head)
+    for chunk in payload:
+        sock.sendall(chunk)
+
+
+def recv_message(sock: socket.socket) -> Dict[str, Any]:
+    (n,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, n))
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    kind, _, rest = address.partition(":")
+    if kind == "unix":
+        return socket.AF_UNIX, rest
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    raise ValueError(f"Bad engine address {address!r}; use unix:/path or tcp:host:port")
+
+
+def _subset(det: Detections, keep: np.ndarray) -> Detections:
+    return Detections(det.xyxy[keep], det.conf[keep], det.cls[keep], det.names, det.orig_img)
+
+
+def _encode_detections(dets: List[Detections]) -> List[Dict[str, Any]]:
+    return [
+        {"xyxy": d.xyxy.tolist(), "conf": d.conf.tolist(), "cls": d.cls.tolist()}
+        for d in dets
+    ]
+
+
+# ---------------- Micro-batching ----------------
+class EngineBusy(RuntimeError):
+    """The server's request queue is full, or it is shutting down."""
+
+
+def _percentiles(samples, points=(50, 95, 99)) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000 for p in points}
+
+
+class _Request:
+    __slots__ = ("frames", "conf", "imgsz", "enqueued", "started", "done", "result", "error")
+
+    def __init__(self, frames, conf: float, imgsz: Optional[int]):
+        self.frames = frames
+        self.conf = conf
+        self.imgsz = imgsz
+        self.enqueued = time.monotonic()
+        self.started = 0.0
+        self.done = threading.Event()
+        self.result: Optional[List[Detections]] = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    Runs predict requests from many threads as a few batched model calls.
+
+    One worker thread owns the model. It takes the oldest request, then keeps
+    collecting until `max_batch` frames are gathered or `max_wait` seconds
+    have passed since that request arrived. Requests are grouped by imgsz;
+    within a group the model runs once at the lowest requested confidence and
+    each request's boxes are filtered back to its own threshold.
+    """
+
+    def __init__(self, predict, max_batch: int = 8, max_wait: float = 0.005, max_queue: int = 64):
+        self._predict = predict
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue(maxsize=max_queue)
+        # Shutdown is a flag, not a sentinel that has to fit in the bounded queue;
+        # _submit_lock orders it against enqueues so nothing is queued after the drain
+        self._closed = threading.Event()
+        self._submit_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._wait: deque = deque(maxlen=2048)
+        self._total: deque = deque(maxlen=2048)
+        self._infer: deque = deque(maxlen=512)
+        self.requests = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched_frames = 0
+        self._worker = threading.Thread(target=self._run, name="engine-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, frames: List[np.ndarray], conf: float, imgsz: Optional[int]) -> List[Detections]:
+        req = _Request(frames, conf, imgsz)
+        with self._submit_lock:
+            if self._closed.is_set():
+                raise EngineBusy("engine is shutting down")
+            try:
+                self._queue.put_nowait(req)
+            except queue.Full:
+                with self._stats_lock:
+                    self.rejected += 1
+                raise EngineBusy(f"{self.max_queue} requests already queued")
+        req.done.wait()
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def _collect(self) -> Optional[List[_Request]]:
+        first = self._queue.get()
+        if first is None:
+            return None  # close() waking an idle worker
+        batch, frames = [first], len(first.frames)
+        deadline = first.enqueued + self.max_wait
+        while frames < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                req = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if req is None:
+                break  # closing; _run stops after this batch
+            batch.append(req)
+            frames += len(req.frames)
+        return batch
+
+    def _run(self):
+        while not self._closed.is_set():
+            batch = self._collect()
+            if batch is None:
+                continue
+            groups: Dict[Optional[int], List[_Request]] = {}
+            for req in batch:
+                groups.setdefault(req.imgsz, []).append(req)
+            for imgsz, reqs in groups.items():
+                self._run_group(reqs, imgsz)
+        # Requests still queued at shutdown get an answer instead of waiting forever
+        while True:
+            try:
+                req = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if req is not None:
+                req.error = EngineBusy("engine is shutting down")
+                req.done.set()
+
+    def _run_group(self, reqs: List[_Request], imgsz: Optional[int]):
+        started = time.monotonic()
+        frames = [f for req in reqs for f in req.frames]
+        try:
+            dets = self._predict(frames, min(req.conf for req in reqs), imgsz)
+        except Exception as e:
+            for req in reqs:
+                req.error = e
+                req.done.set()
+            return
+        finished = time.monotonic()
+
+        i = 0
+        for req in reqs:
+            own = dets[i:i + len(req.frames)]
+            i += len(req.frames)
+            req.result = [d if (d.conf >= req.conf).all() else _subset(d, d.conf >= req.conf) for d in own]
+            req.done.set()
+
+        with self._stats_lock:
+            self.batches += 1
+            self.batched_frames += len(frames)
+            self.requests += len(reqs)
+            self._infer.append(finished - started)
+            for req in reqs:
+                self._wait.append(started - req.enqueued)
+                self._total.append(finished - req.enqueued)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "requests": self.requests,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "avg_batch_frames": self.batched_frames / self.batches if self.batches else 0.0,
+                "wait_ms": _percentiles(self._wait),
+                "infer_ms": _percentiles(self._infer),
+                "total_ms": _percentiles(self._total),
+            }
+
+    def close(self):
+        with self._submit_lock:
+            self._closed.set()
+        try:
+            self._queue.put_nowait(None)  # wake the worker if it is idle in get()
+        except queue.Full:
+            pass  # it is busy and checks the flag after the current batch
+        self._worker.join(timeout=5)
+
+
+# ---------------- Server ----------------
+class _UnixServer(socketserver.ThreadingUnixStreamServer if hasattr(socket, "AF_UNIX") else object):
+    daemon_threads = True
+    request_queue_size = 128  # every kiosk / session may connect at once (default is 5)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class EngineServer:
+    def __init__(
+        self,
+        engine: Engine,
+        address: str = DEFAULT_ADDRESS,
+        max_batch: int = 8,
+        max_wait: float = 0.005,
+        max_queue: int = 64,
+    ):
+        self.engine = engine
+        self.address = address
+        self.batcher = MicroBatcher(engine.predict, max_batch=max_batch, max_wait=max_wait, max_queue=max_queue)
+
+        family, addr = parse_address(address)
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        header = recv_message(self.request)
+                    except (ConnectionError, struct.error):
+                        return
+                    try:
+                        reply = server.dispatch(header, self.request)
+                    except EngineBusy as e:
+                        reply = {"ok": False, "busy": True, "error": str(e)}
+                    except Exception as e:
+                        reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                    send_message(self.request, reply)
+
+        if family == socket.AF_UNIX:
+            if os.path.exists(addr):
+                os.remove(addr)
+            self.server = _UnixServer(addr, Handler)
+        else:
+            self.server = _TCPServer(addr, Handler)
+
+    def dispatch(self, header: Dict[str, Any], sock: socket.socket) -> Dict[str, Any]:
+        op = header.get("op")
+        if op == "info":
+            return {"ok": True, **self.engine.info()}
+        if op == "stats":
+            return {"ok": True, **self.batcher.stats()}
+        if op == "predict":
+            # Read the whole payload before a possible "busy" so the stream stays in sync
+            frames = []
+            for spec in header["frames"]:
+                data = _recv_exact(sock, spec["nbytes"])
+                frames.append(np.frombuffer(data, dtype=spec["dtype"]).reshape(spec["shape"]))
+            dets = self.batcher.submit(frames, header.get("conf", DETECT_CONF), header.get("imgsz"))
+            return {"ok": True, "results": _encode_detections(dets)}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.batcher.close()
+        family, addr = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(addr):
+            os.remove(addr)
+
+
+# ---------------- Client ----------------
+class RemoteEngine(_EngineBase):
+    """Same interface as core.engine.Engine, backed by a running EngineServer."""
+
+    BUSY_RETRIES = 4
+    BUSY_BACKOFF = 0.02
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float = 30.0):
+        self.address = address
+        self.timeout = timeout
+        self._lookup_cache = {}
+        # One connection per thread, so concurrent sessions reach the server's
+        # batcher side by side instead of queueing on a shared socket
+        self._local = threading.local()
+
+        info = self._call({"op": "info"})
+        self.name = "remote:" + info["backend"]
+        self.weights = info["weights"]
+        self.names = {int(k): v for k, v in info["names"].items()}
+
+    def _connect(self) -> socket.socket:
+        family, addr = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(addr)
+        return sock
+
+    def _roundtrip(self, header: Dict[str, Any], payload: Sequence[bytes]) -> Dict[str, Any]:
+        for attempt in (0, 1):
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = self._local.sock = self._connect()
+                send_message(sock, header, payload)
+                return recv_message(sock)
+            except (OSError, ConnectionError):
+                # Server restarted: reconnect once
+                if sock is not None:
+                    sock.close()
+                self._local.sock = None
+                if attempt:
+                    raise
+
+    def _call(self, header: Dict[str, Any], payload: Sequence[bytes] = ()) -> Dict[str, Any]:
+        for attempt in range(self.BUSY_RETRIES + 1):
+            reply = self._roundtrip(header, payload)
+            if not reply.get("busy") or attempt == self.BUSY_RETRIES:
+                break
+            time.sleep(self.BUSY_BACKOFF * 2 ** attempt)
+        if reply.get("busy"):
+            raise EngineBusy(f"engine server: {reply.get('error')}")
+        if not reply.get("ok"):
+            raise RuntimeError(f"engine server: {reply.get('error')}")
+        return reply
+
+    def predict(self, frames: Sequence[np.ndarray], conf: float = DETECT_CONF, imgsz: Optional[int] = None) -> List[Detections]:
+        frames = [np.ascontiguousarray(f) for f in frames]
+        header = {
+            "op": "predict",
+            "conf": conf,
+            "imgsz": imgsz,
+            "frames": [{"shape": f.shape, "dtype": f.dtype.str, "nbytes": f.nbytes} for f in frames],
+        }
+        reply = self._call(header, [memoryview(f).cast("B") for f in frames])
+        out = []
+        for frame, r in zip(frames, reply["results"]):
+            out.append(Detections(
+                np.asarray(r["xyxy"], dtype=np.float32).reshape(-1, 4),
+                np.asarray(r["conf"], dtype=np.float32),
+                np.asarray(r["cls"], dtype=np.intp),
+                self.names,
+                frame,
+            ))
+        return out
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": self.name, "weights": self.weights, "names": self.names}
+
+    def server_stats(self) -> Dict[str, Any]:
+        reply = self._call({"op": "stats"})
+        reply.pop("ok", None)
+        return reply
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve the e-waste detector to local clients.")
+    ap.add_argument("--address", default=DEFAULT_ADDRESS)
+    ap.add_argument("--weights", default=None)
+    ap.add_argument("--backend", default=None)
+    ap.add_argument("--threads", type=int, default=None)
+    ap.add_argument("--max-batch", type=int, default=8, help="frames per model call")
+    ap.add_argument("--max-wait-ms", type=float, default=5.0, help="how long to hold a request for batching")
+    ap.add_argument("--max-queue", type=int, default=64, help="queued requests before answering busy")
+    ap.add_argument("--stats", action="store_true", help="print a running server's stats and exit")
+    args = ap.parse_args()
+
+    if args.stats:
+        print(json.dumps(RemoteEngine(args.address).server_stats(), indent=2))
+        return
+
+    kwargs = {k: v for k, v in (("weights", args.weights), ("backend", args.backend), ("threads", args.threads)) if v is not None}
+    engine = Engine(**kwargs)
+    server = EngineServer(
+        engine, args.address,
+        max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000, max_queue=args.max_queue,
+    )
+    print(f"Engine ({engine.name}, {engine.weights}) listening on {args.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
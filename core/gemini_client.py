@@ -1,14 +1,177 @@
 import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from core import metrics
+from core.config import STATIC_TIPS
+from utils.ttl_cache import SingleFlight, TTLDiskCache
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
+MODEL_NAME = "gemini-2.5-flash"
+DEFAULT_LOCATION = "University of Georgia (UGA), Athens, Georgia"
+
+# Latency budget: a guidance call never blocks the script run for longer than
+# CALL_DEADLINE seconds, retries included. Past the deadline, or when Gemini
+# stays unreachable after the retries, the caller gets STATIC_TIPS for the label.
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10.0
+CALL_DEADLINE = 12.0
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 2.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Bump when the prompt or output format changes so cached tips are not reused
+PROMPT_VERSION = 1
+
+# Tips are cached on disk per (label, location, model, prompt version). Fresh
+# for a week; for another 30 days a stale entry is still served instantly
+# while a background request refreshes it.
+TIPS_CACHE_DIR = os.path.join("data", "cache", "gemini")
+TIPS_TTL = 7 * 24 * 3600
+TIPS_STALE_TTL = 30 * 24 * 3600
+
+_tips_cache = TTLDiskCache(TIPS_CACHE_DIR, ttl=TIPS_TTL, stale_ttl=TIPS_STALE_TTL)
+_in_flight = SingleFlight()
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Background workers so callers can sort/log while guidance is generated
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gemini")
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def get_session() -> requests.Session:
+    """Long-lived keep-alive session shared by all guidance calls."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            # Retries are handled in _post_with_retries so they respect the deadline
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=0)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
 
-def get_disposal_tips(item_label: str, location_hint: str = "University of Georgia (UGA), Athens, Georgia") -> str:
+
+def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    # Full jitter
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _post_with_retries(url: str, payload: dict, deadline: float) -> requests.Response:
+    session = get_session()
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded()
+
+        timeout = (min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining))
+        try:
+            r = session.post(url, json=payload, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= MAX_RETRIES:
+                if time.monotonic() >= deadline:
+                    raise DeadlineExceeded()
+                raise
+            delay = _backoff(attempt, None)
+        else:
+            if r.status_code not in RETRY_STATUS or attempt >= MAX_RETRIES:
+                return r
+            delay = _backoff(attempt, r.headers.get("Retry-After"))
+
+        if time.monotonic() + delay >= deadline:
+            raise DeadlineExceeded()
+        time.sleep(delay)
+        attempt += 1
+
+
+def get_disposal_tips(
+    item_label: str,
+    location_hint: str = DEFAULT_LOCATION,
+    deadline: Optional[float] = None,
+) -> str:
+    """
+    Disposal guidance markdown for a label. deadline is the latency budget in
+    seconds (default CALL_DEADLINE); when it runs out STATIC_TIPS is returned.
+    """
     if not GEMINI_API_KEY:
         return "Gemini is not configured. Add GEMINI_API_KEY to your .env file."
 
+    key = [item_label, location_hint, MODEL_NAME, PROMPT_VERSION]
+    hit = _tips_cache.get(key)
+    if hit is not None:
+        tips, fresh = hit
+        metrics.inc("tips_cache_hits" if fresh else "tips_cache_stale")
+        if not fresh:
+            _revalidate(key, item_label, location_hint)
+        return tips
+    metrics.inc("tips_cache_misses")
+
+    # Concurrent sessions asking for the same tips share one request; a caller
+    # that joins someone else's request still waits no longer than its own budget
+    budget = CALL_DEADLINE if deadline is None else deadline
+    try:
+        return _in_flight.do(
+            tuple(key), lambda: _fetch_and_store(key, item_label, location_hint, budget), timeout=budget
+        )
+    except TimeoutError:
+        metrics.inc("tips_deadline_fallbacks")
+        return STATIC_TIPS.get(item_label, STATIC_TIPS["unknown"])
+
+
+def get_disposal_tips_async(
+    item_label: str,
+    location_hint: str = DEFAULT_LOCATION,
+    deadline: Optional[float] = None,
+) -> "Future[str]":
+    """Start get_disposal_tips on a worker thread and return its Future."""
+    return _executor.submit(get_disposal_tips, item_label, location_hint, deadline)
+
+
+def _fetch_and_store(key, item_label: str, location_hint: str, budget: float = CALL_DEADLINE) -> str:
+    tips, ok = _request_tips(item_label, location_hint, time.monotonic() + budget)
+    if ok:
+        _tips_cache.set(key, tips)
+    return tips
+
+
+def _revalidate(key, item_label: str, location_hint: str):
+    if _in_flight.in_flight(tuple(key)):
+        return
+
+    def run():
+        try:
+            _in_flight.do(tuple(key), lambda: _fetch_and_store(key, item_label, location_hint))
+        except Exception:
+            # Keep serving the stale entry; the failure shows up in the metrics
+            metrics.inc("gemini_errors")
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def _request_tips(item_label: str, location_hint: str, deadline: float) -> Tuple[str, bool]:
+    """Call Gemini. Returns (text, ok); only ok responses are cached."""
     prompt = f"""
     Return ONLY valid JSON. No markdown. No extra text.
 
@@ -23,15 +186,6 @@ def get_disposal_tips(item_label: str, location_hint: str = "University of Georg
     Write the "what" field as a definition, not disposal advice.
     """.strip()
 
-
-    resources = [
-        {"name": "UGA Surplus Store & Recycling Center", "url": "https://busfin.uga.edu/surplus"},
-        {"name": "Athens-Clarke County Household Hazardous Waste", "url": "https://www.accgov.com/hhw"},
-        {"name": "Best Buy Recycling", "url": "https://www.bestbuy.com/site/services/recycling/pcmcat149900050025.c"},
-    ]
-
-
-
     payload = {
         "contents": [{"parts": [{"text": prompt}]}],
         "generationConfig": {
@@ -42,26 +196,28 @@ def get_disposal_tips(item_label: str, location_hint: str = "University of Georg
     }
 
     try:
-        model_name = "gemini-2.5-flash"
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent?key={GEMINI_API_KEY}"
+        url = f"{GEMINI_BASE_URL}/v1beta/models/{MODEL_NAME}:generateContent?key={GEMINI_API_KEY}"
 
-        r = requests.post(url, json=payload, timeout=30)
+        with metrics.span("gemini.request"):
+            r = _post_with_retries(url, payload, deadline)
         if r.status_code != 200:
-            return f"Gemini error {r.status_code}: {r.text}"
+            # Still failing after the retries: same fallback as an unreachable Gemini
+            metrics.inc("gemini_errors")
+            return STATIC_TIPS.get(item_label, STATIC_TIPS["unknown"]), False
 
-        data = r.json()
+        try:
+            data = r.json()
+        except ValueError:
+            metrics.inc("gemini_invalid_json")
+            return STATIC_TIPS.get(item_label, STATIC_TIPS["unknown"]), False
         candidates = data.get("candidates", [])
         if not candidates:
-            return "Gemini returned no candidates."
+            return "Gemini returned no candidates.", False
 
         content = candidates[0].get("content", {})
         parts = content.get("parts", [])
         text = "".join(p.get("text", "") for p in parts).strip()
 
-        
-        # DEBUG: print full Gemini response once (remove later)
-        finish = candidates[0].get("finishReason", "UNKNOWN")
-        print("Gemini raw text:", text)
 
         # Parse JSON response
         import json
@@ -80,16 +236,14 @@ def get_disposal_tips(item_label: str, location_hint: str = "University of Georg
 
         json_str = extract_json(text)
         if not json_str:
-            return "Gemini did not return valid JSON. Try again."
-        
-        obj = json.loads(json_str)
-
+            metrics.inc("gemini_invalid_json")
+            return STATIC_TIPS.get(item_label, STATIC_TIPS["unknown"]), False
 
         try:
-            obj = json.loads(text)
-        except json.JSONDecodeError:
-            # If Gemini fails JSON, fall back to raw text
-            return "Gemini returned invalid JSON. Try again."
+            obj = json.loads(json_str)
+        except ValueError:
+            metrics.inc("gemini_invalid_json")
+            return STATIC_TIPS.get(item_label, STATIC_TIPS["unknown"]), False
 
         what = obj.get("what", "")
         safety = obj.get("safety", "")
@@ -110,8 +264,14 @@ def get_disposal_tips(item_label: str, location_hint: str = "University of Georg
             url = r.get("url", "")
             out += f"- **{name}** – {url}\n"
 
-        return out.strip()
+        return out.strip(), True
+
 
+    except DeadlineExceeded:
+        metrics.inc("tips_deadline_fallbacks")
+        return STATIC_TIPS.get(item_label, STATIC_TIPS["unknown"]), False
 
-    except requests.RequestException as e:
-        return f"Gemini request failed: {e}"
+    except requests.RequestException:
+        # Unreachable after retries: same fallback as a blown deadline
+        metrics.inc("gemini_errors")
+        return STATIC_TIPS.get(item_label, STATIC_TIPS["unknown"]), False
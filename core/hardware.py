@@ -1,2 +1,270 @@
-def actuate_sort(bin_name: str):
+"""
+Sorting actuator: a servo driven from its own thread through a command queue.
+
+    controller = ServoController(SimulatedServo())   # or GpioServo(pin=18)
+    cmd = controller.submit("ram_stick")              # returns immediately
+    cmd.wait(1.0); cmd.latency                        # submitted -> position reached
+
+The worker takes commands in order and moves the servo to the label's angle
+(core.config.SERVO_ANGLES), then holds it there for at least `dwell` seconds
+so the item can drop before the next move. Redundant motion is coalesced:
+a command for the angle the servo already holds is acknowledged without
+moving, and a "home" queued ahead of another command is skipped. When the
+queue is full, submit() does not block; the command comes back "dropped".
+
+SimulatedServo sleeps for the travel time instead of touching GPIO, so the
+scheduling can be exercised anywhere (bench/bench_hardware.py).
+"""
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Union
+
+from core import metrics
+from core.config import BIN_MAP, SERVO_ANGLES
+
+HOME_ANGLE = 0
+_EMPTY = object()
+
+
+# ---------------- Servo backends ----------------
+class SimulatedServo:
+    """Sleeps like a hobby servo: `travel_time` for a full 180° sweep, `settle` minimum."""
+
+    name = "simulated"
+
+    def __init__(self, travel_time: float = 0.3, settle: float = 0.05):
+        self.travel_time = travel_time
+        self.settle = settle
+        self.angle = HOME_ANGLE
+        self.moves = 0
+
+    def move(self, angle: float):
+        time.sleep(max(self.settle, abs(angle - self.angle) / 180.0 * self.travel_time))
+        self.angle = angle
+        self.moves += 1
+
+    def close(self):
+        pass
+
+
+class GpioServo:
+    """gpiozero servo on a Raspberry Pi (0.5-2.5 ms pulses for 0-180°)."""
+
+    name = "gpio"
+
+    def __init__(self, pin: int = 18, settle: float = 0.15):
+        from gpiozero import Servo
+
+        self.servo = Servo(pin, min_pulse_width=0.5 / 1000, max_pulse_width=2.5 / 1000)
+        self.settle = settle
+        self.angle = None
+        self.moves = 0
+
+    @staticmethod
+    def angle_to_value(angle: float) -> float:
+        """Angle (0-180°) -> gpiozero Servo value (-1 to +1)."""
+        angle = max(0, min(180, angle))
+        return (angle / 90.0) - 1.0
+
+    def move(self, angle: float):
+        self.servo.value = self.angle_to_value(angle)
+        time.sleep(self.settle)  # give the servo time to get there
+        self.angle = angle
+        self.moves += 1
+
+    def close(self):
+        self.servo.detach()
+
+
+# ---------------- Controller ----------------
+class SortCommand:
+    __slots__ = ("target", "angle", "submitted", "acked_at", "status", "_done")
+
+    def __init__(self, target: str, angle: float):
+        self.target = target
+        self.angle = angle
+        self.submitted = time.monotonic()
+        self.acked_at: Optional[float] = None
+        self.status = "queued"  # -> moved | coalesced | skipped | dropped | failed
+        self._done = threading.Event()
+
+    def _finish(self, status: str):
+        self.status = status
+        self.acked_at = time.monotonic()
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Seconds from submit() until the servo held the target angle."""
+        return None if self.acked_at is None else self.acked_at - self.submitted
+
+
+class ServoController:
+    def __init__(
+        self,
+        servo,
+        angles: Optional[Dict[str, float]] = None,
+        dwell: float = 0.3,
+        queue_size: int = 32,
+    ):
+        self.servo = servo
+        self.angles = dict(SERVO_ANGLES if angles is None else angles)
+        self.dwell = dwell
+        self._queue: "queue.Queue[Optional[SortCommand]]" = queue.Queue(maxsize=queue_size)
+        self._position: Optional[float] = getattr(servo, "angle", None)
+        self._hold_until = 0.0
+        self._latencies: deque = deque(maxlen=512)
+        self._busy = 0.0
+        self._started = time.monotonic()
+        self._count_lock = threading.Lock()
+        self.counts = {"submitted": 0, "moved": 0, "coalesced": 0, "skipped": 0, "dropped": 0, "failed": 0}
+        self._thread = threading.Thread(target=self._run, name="servo", daemon=True)
+        self._thread.start()
+
+    def submit(self, target: Union[str, float]) -> SortCommand:
+        """Queue a move to a label's angle (or a raw angle). Never blocks."""
+        if isinstance(target, str):
+            angle = HOME_ANGLE if target == "home" else self.angles.get(target)
+            if angle is None:
+                raise KeyError(f"no servo angle for {target!r}")
+        else:
+            angle, target = float(target), f"{float(target):g}°"
+        cmd = SortCommand(target, angle)
+        self._count("submitted")
+        try:
+            self._queue.put_nowait(cmd)
+        except queue.Full:
+            self._count("dropped")
+            metrics.inc("servo_dropped")
+            cmd._finish("dropped")
+        return cmd
+
+    def _count(self, key: str):
+        with self._count_lock:
+            self.counts[key] += 1
+
+    def home(self) -> SortCommand:
+        return self.submit("home")
+
+    def _run(self):
+        pending = _EMPTY  # a command taken early by the home check below (None = stop)
+        while True:
+            cmd = pending if pending is not _EMPTY else self._queue.get()
+            pending = _EMPTY
+            if cmd is None:
+                return
+
+            # A home move that another command is already waiting behind is pointless;
+            # one followed by the stop sentinel still runs, then the loop exits
+            if cmd.target == "home":
+                try:
+                    pending = self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                if pending is not _EMPTY and pending is not None:
+                    self._ack(cmd, "skipped")
+                    continue
+
+            if cmd.angle == self._position:
+                # Already there: the item drops through the open gate, restart the dwell
+                self._hold_until = max(self._hold_until, time.monotonic() + self.dwell)
+                self._ack(cmd, "coalesced")
+                continue
+
+            wait = self._hold_until - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)  # let the previous item fall before moving on
+            t0 = time.monotonic()
+            try:
+                self.servo.move(cmd.angle)
+            except Exception as e:
+                print(f"[HARDWARE] servo move to {cmd.angle}° failed: {e}")
+                self._position = None
+                self._ack(cmd, "failed")
+                continue
+            moved_at = time.monotonic()
+            self._busy += moved_at - t0
+            metrics.observe("servo_move", moved_at - t0)
+            self._position = cmd.angle
+            self._hold_until = moved_at + self.dwell
+            self._ack(cmd, "moved")
+
+    def _ack(self, cmd: SortCommand, status: str):
+        cmd._finish(status)
+        self._count(status)
+        if status in ("moved", "coalesced"):
+            self._latencies.append(cmd.latency)
+            metrics.observe("servo_ack", cmd.latency)
+        if status == "coalesced":
+            metrics.inc("servo_coalesced")
+
+    def stats(self) -> Dict[str, float]:
+        lat = sorted(self._latencies)
+        with self._count_lock:
+            out: Dict[str, float] = dict(self.counts)
+        out["queue_depth"] = self._queue.qsize()
+        out["busy"] = self._busy / max(1e-9, time.monotonic() - self._started)
+        if lat:
+            out["ack_p50_ms"] = lat[len(lat) // 2] * 1000
+            out["ack_p95_ms"] = lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000
+        return out
+
+    def close(self, timeout: float = 5.0):
+        """Finish queued moves, then stop the worker and release the servo."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self.servo.close()
+
+
+# ---------------- App entry point ----------------
+# EWIZARD_SERVO=gpio drives the real servo; anything else simulates it
+SERVO_BACKEND = os.getenv("EWIZARD_SERVO", "sim")
+
+_controller: Optional[ServoController] = None
+_controller_lock = threading.Lock()
+
+
+def get_controller() -> ServoController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                servo = GpioServo() if SERVO_BACKEND == "gpio" else SimulatedServo()
+                _controller = ServoController(servo)
+    return _controller
+
+
+_unsortable_warned: set = set()
+
+
+def servo_target(label: Optional[str], bin_name: Optional[str] = None) -> Optional[str]:
+    """
+    The SERVO_ANGLES key that sorts `label`: the label itself, else one that
+    shares its bin (gpu -> the components bin's angle). Warns once per label
+    that has no servo position at all.
+    """
+    if label in SERVO_ANGLES:
+        return label
+    bin_name = bin_name or BIN_MAP.get(label)
+    target = next((l for l, b in BIN_MAP.items() if b == bin_name and l in SERVO_ANGLES), None)
+    if target is None and label not in _unsortable_warned:
+        _unsortable_warned.add(label)
+        print(f"[HARDWARE] No servo angle for {label!r} (bin {bin_name!r}); item is not actuated")
+    return target
+
+
+def actuate_sort(bin_name: str, label: Optional[str] = None) -> Optional[SortCommand]:
+    """Queue the sort for an item and return at once (None if the bin has no servo position)."""
+    target = servo_target(label, bin_name)
     print(f"[HARDWARE] Sort into: {bin_name}")
+    if target is None:
+        return None
+    return get_controller().submit(target)
@@ -1,80 +1,482 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional, Tuple
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
 from PIL import Image
 import numpy as np
-import cv2
-import streamlit as st
-from ultralytics import YOLO
 
+from core import metrics
+from core.config import CLASS_TO_LABEL, DETECT_CONF, SIMILARITY_ENABLED, SIMILARITY_MIN_CONF  # noqa: F401  (re-exported)
+from core.engine import WEIGHTS_PATH, get_engine
+from core.similarity import Match, SimilarityIndex, embed
 
-WEIGHTS_PATH = "ml/best.pt"
+# cv2 / ultralytics (and torch behind it) are imported on first use so that
+# importing this module -- and app.py -- stays cheap. See warm_up().
+if TYPE_CHECKING:
+    from core.backends import Detections
 
-# Map YOLO class names -> your app labels (edit after we read ewaste.yaml)
-CLASS_TO_LABEL = {
-    "CPU": "cpu",
-    "RAM": "ram_stick",
-    "USB_Drive": "flash_drive",
-}
 
+# Result cache: "content" only reuses results for byte-identical frames,
+# "perceptual" also for near-duplicates (same 64-bit difference hash).
+CACHE_HASH = "content"
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Cached annotations are stored at most this many pixels on the long side
+# (~2.4 MB each), so the budget holds dozens of scans rather than one or two
+# full-resolution phone photos. The call that ran the model still gets the
+# full-resolution annotation; later cache hits get the downscaled copy.
+CACHE_ANNOTATION_SIDE = 1024
 
-@st.cache_resource
-def load_model() -> YOLO:
-    return YOLO(WEIGHTS_PATH)
+# annotate: True renders the annotated frame eagerly (default), "lazy" returns
+# a LazyAnnotation handle that renders on first .render(), False skips it.
+# raw: "full" lists every detection, "top" only the best one, "none" -> None.
+Annotate = Union[bool, str]
+RawMode = str
 
-def run_model(image: Image.Image) -> Tuple[str, float, Optional[Image.Image], Optional[Dict[str, Any]]]:
+# Frames are PIL images (RGB) or BGR uint8 arrays as produced by decode_image().
+# A BGR frame is fed to the model as-is and its annotation comes back as a BGR
+# array too (st.image(..., channels="BGR")), so nothing is color-converted.
+Frame = Union[Image.Image, np.ndarray]
+ScanResult = Tuple[str, float, Optional[Union[Image.Image, np.ndarray, "LazyAnnotation"]], Optional[Dict[str, Any]]]
+
+
+_model = None
+_model_lock = threading.Lock()
+_startup: Dict[str, float] = {}
+_warm_thread: Optional[threading.Thread] = None
+
+
+def load_model():
+    """The shared inference engine (local, or the engine server if configured)."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                t0 = time.perf_counter()
+                _model = get_engine()
+                _startup["load_s"] = time.perf_counter() - t0
+    return _model
+
+
+def _warm_up():
+    t0 = time.perf_counter()
+    model = load_model()
+    # One dummy inference builds the CPU/CUDA graph and fills allocator caches
+    t1 = time.perf_counter()
+    model.predict([np.zeros((320, 320, 3), dtype=np.uint8)], conf=DETECT_CONF)
+    _startup["first_predict_s"] = time.perf_counter() - t1
+    _startup["warm_up_s"] = time.perf_counter() - t0
+
+
+def warm_up(background: bool = True) -> Optional[threading.Thread]:
     """
-    Returns: (label, confidence, annotated_image, raw_detections)
+    Load the weights and run one dummy inference, by default on a daemon
+    thread so the UI can render meanwhile. Safe to call on every rerun.
     """
-    model = load_model()
+    global _warm_thread
+    with _model_lock:
+        if _warm_thread is not None or "warm_up_s" in _startup:
+            return _warm_thread
+        if background:
+            _warm_thread = threading.Thread(target=_warm_up, name="model-warm-up", daemon=True)
+            _warm_thread.start()
+            return _warm_thread
+    _warm_up()
+    return None
+
+
+def startup_report() -> Dict[str, float]:
+    """Seconds spent loading the engine and warming it up."""
+    return dict(_startup)
+
+
+# ---------------- Result cache ----------------
+class ResultCache:
+    """LRU of scan results bounded by an approximate byte budget."""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[ScanResult, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Optional[ScanResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        label, conf, annotated, raw = entry[0]
+        return label, conf, annotated, copy.deepcopy(raw)
+
+    def put(self, key: Tuple, result: ScanResult, nbytes: int):
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, size) = self._entries.popitem(last=False)
+                self._bytes -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+_cache = ResultCache()
+
+
+def cache_stats() -> Dict[str, int]:
+    return _cache.stats()
+
+
+def engine_stats() -> Optional[Dict[str, Any]]:
+    """Queue / batching / latency stats when scans go through the engine server."""
+    if _model is None or not hasattr(_model, "server_stats"):
+        return None
+    return _model.server_stats()
+
+
+# ---------------- Similarity short-circuit ----------------
+_similar = SimilarityIndex()
+
+
+def similarity_stats() -> Dict[str, float]:
+    return _similar.stats()
+
+
+def remember_scan(image: Frame, label: str, confidence: float, overridden: bool = False):
+    """
+    Add a confirmed scan to the similarity index, so look-alike items can skip
+    detection. Confirmed means overridden by hand, or a model label with at
+    least SIMILARITY_MIN_CONF confidence; anything else is ignored.
+    """
+    if label == "unknown" or (not overridden and confidence < SIMILARITY_MIN_CONF):
+        return
+    with metrics.span("similarity.add"):
+        vec = embed(_to_bgr(image))
+    _similar.add(vec, label, 1.0 if overridden else confidence, "override" if overridden else "model")
+
+
+def _similar_result(match: Match, raw_mode: RawMode) -> ScanResult:
+    raw: Optional[Dict[str, Any]] = None
+    if raw_mode in ("full", "top"):
+        raw = {"detections": []} if raw_mode == "full" else {}
+        raw["top"] = {"class_name": None, "mapped_label": match.label, "confidence": match.confidence}
+        raw["similar"] = {"similarity": match.similarity, "source": match.source}
+    return match.label, match.confidence, None, raw
+
+
+def _weights_fingerprint() -> Tuple:
+    path = getattr(_model, "weights", WEIGHTS_PATH)
+    backend = getattr(_model, "name", None)
+    try:
+        st_ = os.stat(path)
+    except OSError:
+        return (path, backend)
+    return (path, backend, st_.st_size, st_.st_mtime_ns)
+
+
+def image_hash(image: Frame, mode: Optional[str] = None) -> str:
+    if isinstance(image, np.ndarray):
+        return _array_hash(image, mode)
+    if (mode or CACHE_HASH) == "perceptual":
+        # dHash: sign of horizontal gradients on a 9x8 grayscale thumbnail
+        small = np.asarray(image.convert("L").resize((9, 8), Image.BILINEAR), dtype=np.int16)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return "p" + np.packbits(bits).tobytes().hex()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{image.mode}:{image.size}".encode())
+    h.update(image.tobytes())
+    return "c" + h.hexdigest()
 
-    # PIL -> OpenCV BGR
-    rgb = np.array(image.convert("RGB"))
-    bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
 
-    results = model.predict(bgr, conf=0.05, verbose=False)
-    r0 = results[0]
+def _array_hash(frame: np.ndarray, mode: Optional[str] = None) -> str:
+    if (mode or CACHE_HASH) == "perceptual":
+        import cv2
 
-    raw: Dict[str, Any] = {"detections": []}
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_LINEAR).astype(np.int16)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return "p" + np.packbits(bits).tobytes().hex()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"bgr:{frame.shape}".encode())
+    h.update(memoryview(np.ascontiguousarray(frame)).cast("B"))  # no tobytes() copy
+    return "c" + h.hexdigest()
 
-    if r0.boxes is None or len(r0.boxes) == 0:
+
+def _result_nbytes(result: ScanResult) -> int:
+    annotated = result[2]
+    if isinstance(annotated, np.ndarray):
+        size = annotated.nbytes
+    elif isinstance(annotated, Image.Image):
+        w, h = annotated.size
+        size = w * h * len(annotated.getbands())
+    elif isinstance(annotated, LazyAnnotation):
+        size = annotated.nbytes
+    else:
+        size = 0
+    raw = result[3] or {}
+    return size + 256 + 128 * len(raw.get("detections", ()))
+
+
+def _shrink_image(image: Union[Image.Image, np.ndarray], max_side: int) -> Union[Image.Image, np.ndarray]:
+    if isinstance(image, np.ndarray):
+        scale = max_side / max(image.shape[:2])
+        if scale >= 1:
+            return image
+        import cv2
+
+        return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    scale = max_side / max(image.size)
+    if scale >= 1:
+        return image
+    return image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.BILINEAR)
+
+
+def _cache_copy(result: ScanResult) -> ScanResult:
+    """The result as stored in the cache: annotation downscaled to CACHE_ANNOTATION_SIDE."""
+    label, conf, annotated, raw = result
+    if isinstance(annotated, LazyAnnotation):
+        annotated = annotated.shrunk(CACHE_ANNOTATION_SIDE)
+    elif annotated is not None:
+        annotated = _shrink_image(annotated, CACHE_ANNOTATION_SIDE)
+    return label, conf, annotated, raw
+
+
+def decode_image(data) -> np.ndarray:
+    """
+    Encoded image (bytes, memoryview, or a file-like such as a Streamlit
+    upload) -> BGR uint8 array, decoded by OpenCV in a single allocation.
+    """
+    import cv2
+
+    if hasattr(data, "getbuffer"):
+        data = data.getbuffer()  # BytesIO / UploadedFile: view, not a copy
+    elif hasattr(data, "read"):
+        data = data.read()
+    with metrics.span("decode"):
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("could not decode image")
+    return frame
+
+
+def _to_bgr(image: Frame) -> np.ndarray:
+    if isinstance(image, np.ndarray):
+        return image  # already BGR
+    import cv2
+
+    # PIL -> OpenCV BGR: one view of the pixels, one converted copy
+    rgb = np.asarray(image if image.mode == "RGB" else image.convert("RGB"))
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+def _render(det: "Detections", bgr: bool = False) -> Union[Image.Image, np.ndarray]:
+    with metrics.span("annotate"):
+        annotated_bgr = det.plot()
+        if bgr:
+            return annotated_bgr
+        import cv2
+
+        return Image.fromarray(cv2.cvtColor(annotated_bgr, cv2.COLOR_BGR2RGB))
+
+
+class LazyAnnotation:
+    """Annotated frame that is only drawn (plot, + BGR->RGB for PIL input) when rendered."""
+
+    def __init__(self, result, bgr: bool = False):
+        self._result = result
+        self._bgr = bgr
+        self._image: Optional[Union[Image.Image, np.ndarray]] = None
+
+    @property
+    def nbytes(self) -> int:
+        if isinstance(self._image, np.ndarray):
+            return self._image.nbytes
+        if self._image is not None:
+            w, h = self._image.size
+            return w * h * 3
+        return int(getattr(self._result.orig_img, "nbytes", 0))
+
+    def render(self) -> Union[Image.Image, np.ndarray]:
+        if self._image is None:
+            self._image = _render(self._result, self._bgr)
+            self._result = None
+        return self._image
+
+    def shrunk(self, max_side: int) -> "LazyAnnotation":
+        """A copy at most max_side px on the long side, still drawn only on render()."""
+        from core.backends import Detections
+
+        copy_ = LazyAnnotation(None, self._bgr)
+        if self._image is not None:
+            copy_._image = _shrink_image(self._image, max_side)
+            return copy_
+        det = self._result
+        scale = max_side / max(det.orig_img.shape[:2])
+        if scale >= 1:
+            copy_._result = det
+            return copy_
+        copy_._result = Detections(
+            det.xyxy * scale, det.conf, det.cls, det.names, _shrink_image(det.orig_img, max_side)
+        )
+        return copy_
+
+
+def _postprocess(det: "Detections", annotate: Annotate = True, raw_mode: RawMode = "full", bgr: bool = False) -> ScanResult:
+    raw: Optional[Dict[str, Any]] = None
+    if raw_mode == "full":
+        raw = {"detections": []}
+    elif raw_mode == "top":
+        raw = {}
+
+    if len(det) == 0:
         return "unknown", 0.0, None, raw
 
+    class_names, labels = load_model().label_lookups(det.names)
+    confs = det.conf
+    cls_ids = det.cls
+
     # Pick highest-confidence detection as "the item"
-    best_label = "unknown"
-    best_conf = 0.0
-    best_class_name = None
+    best = int(confs.argmax())
+    best_conf = float(confs[best])
+    best_class_name = class_names[cls_ids[best]]
+    best_label = labels[cls_ids[best]]
+
+    if raw_mode == "full":
+        raw["detections"] = [
+            {"class_name": n, "mapped_label": m, "confidence": c}
+            for n, m, c in zip(class_names[cls_ids], labels[cls_ids], confs.tolist())
+        ]
+    if raw is not None:
+        raw["top"] = {
+            "class_name": best_class_name,
+            "mapped_label": best_label,
+            "confidence": best_conf,
+        }
+
+    # Annotated image
+    if annotate == "lazy":
+        annotated = LazyAnnotation(det, bgr)
+    elif annotate:
+        annotated = _render(det, bgr)
+    else:
+        annotated = None
 
+    return best_label, best_conf, annotated, raw
 
-    names = r0.names  # class id -> class name
 
-    for box in r0.boxes:
-        cls_id = int(box.cls[0])
-        conf = float(box.conf[0])
-        cls_name = str(names.get(cls_id, cls_id))
+def run_model_batch(
+    images: Sequence[Frame],
+    batch_size: int = 16,
+    annotate: Annotate = True,
+    raw: RawMode = "full",
+    cache: bool = True,
+    similar: Optional[bool] = None,
+) -> List[ScanResult]:
+    """
+    Score many images with one model.predict call per batch_size frames.
+    Returns one (label, confidence, annotated_image, raw_detections) per image;
+    images may be PIL images or BGR arrays (see decode_image).
 
-        mapped = CLASS_TO_LABEL.get(cls_name, "unknown")
-        raw["detections"].append({
-            "class_name": cls_name,
-            "mapped_label": mapped,
-            "confidence": conf,
-        })
+    With cache=True, frames already scored with the same weights and settings
+    are answered from the result cache without calling the model. With
+    similar=True (default: SIMILARITY_ENABLED), frames that look like a scan
+    confirmed through remember_scan() reuse its label, with no annotation and
+    raw["similar"] set.
+    """
+    out: List[Optional[ScanResult]] = [None] * len(images)
+    keys: List[Optional[Tuple]] = [None] * len(images)
+    todo = list(range(len(images)))
 
-        if conf > best_conf:
-            best_conf = conf
-            best_label = mapped
-            best_class_name = cls_name
+    if cache:
+        load_model()  # the key includes the backend, which is only known once loaded
+        settings = (_weights_fingerprint(), DETECT_CONF, annotate, raw)
+        todo = []
+        for i, im in enumerate(images):
+            keys[i] = (image_hash(im), isinstance(im, np.ndarray)) + settings
+            hit = _cache.get(keys[i])
+            if hit is None:
+                todo.append(i)
+            else:
+                out[i] = hit
+        metrics.inc("result_cache_hits", len(images) - len(todo))
+        metrics.inc("result_cache_misses", len(todo))
 
-    raw["top"] = {
-    "class_name": best_class_name,
-    "mapped_label": best_label,
-    "confidence": best_conf,
-    }
+    checks: Dict[int, Match] = {}
+    converted: Dict[int, np.ndarray] = {}  # PIL frames already converted for embed()
+    if todo and (SIMILARITY_ENABLED if similar is None else similar):
+        remaining = []
+        for i in todo:
+            with metrics.span("similarity"):
+                converted[i] = _to_bgr(images[i])
+                match = _similar.query(embed(converted[i]))
+            if match is None or match.verify:
+                remaining.append(i)
+                if match is not None:
+                    checks[i] = match
+            else:
+                out[i] = _similar_result(match, raw)
+        metrics.inc("similarity_hits", len(todo) - len(remaining))
+        todo = remaining
 
-    # Annotated image
-    annotated_bgr = r0.plot()
-    annotated_rgb = cv2.cvtColor(annotated_bgr, cv2.COLOR_BGR2RGB)
-    annotated_pil = Image.fromarray(annotated_rgb)
+    if todo:
+        model = load_model()
+        for start in range(0, len(todo), batch_size):
+            idx = todo[start:start + batch_size]
+            frames = [converted[i] if i in converted else _to_bgr(images[i]) for i in idx]
+            with metrics.span("predict"):
+                results = model.predict(frames, conf=DETECT_CONF)
+            for i, r in zip(idx, results):
+                out[i] = _postprocess(r, annotate, raw, bgr=isinstance(images[i], np.ndarray))
+                if cache:
+                    stored = _cache_copy(out[i])
+                    _cache.put(keys[i], stored, _result_nbytes(stored))
+                if i in checks:
+                    _similar.record_verification(out[i][0] == checks[i].label)
+
+    return out
 
-    return best_label, best_conf, annotated_pil, raw
-    
\ No newline at end of file
+
+def run_model(
+    image: Frame,
+    annotate: Annotate = True,
+    raw: RawMode = "full",
+    cache: bool = True,
+    similar: Optional[bool] = None,
+) -> ScanResult:
+    """
+    Returns: (label, confidence, annotated_image, raw_detections)
+
+    Headless callers can pass annotate=False (or "lazy") and raw="none"/"top"
+    to pay only for detection. Repeated frames are served from the result cache,
+    and with similar=True near-duplicates of confirmed scans from the
+    similarity index.
+    """
+    return run_model_batch([image], batch_size=1, annotate=annotate, raw=raw, cache=cache, similar=similar)[0]
@@ -0,0 +1,204 @@
+"""
+Lightweight per-stage timing and counters for the scan path.
+
+    from core import metrics
+
+    with metrics.span("detect"):
+        run_model(frame)
+    metrics.inc("low_confidence")
+
+Spans feed a rolling histogram per stage (last WINDOW samples for p50/p95/p99)
+plus cumulative Prometheus buckets; counters only go up. Everything is off
+unless EWIZARD_METRICS=1 or enable() is called (the app does so in developer
+mode). While off, span() hands back one shared no-op context manager and inc()
+returns at the first check, so instrumented code costs well under a
+microsecond per call.
+
+Export: prometheus_text() for scraping, or start_http_server(port) to serve
+it at /metrics (EWIZARD_METRICS_PORT in the app).
+"""
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+PREFIX = "ewizard"
+WINDOW = 1024
+# Seconds; covers cache hits (~µs) through Gemini round trips (~s)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = os.getenv("EWIZARD_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self):
+        self.recent: deque = deque(maxlen=WINDOW)
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.recent.append(seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {"count": self.count}
+
+        def pct(p):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+
+        return {
+            "count": self.count,
+            "last_ms": self.recent[-1] * 1000,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+        }
+
+
+_histograms: Dict[str, Histogram] = {}
+_counters: Dict[str, int] = {}
+
+
+class _Span:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+# ---------------- Recording ----------------
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def span(name: str):
+    """Context manager timing one stage into the `name` histogram."""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name)
+
+
+def observe(name: str, seconds: float):
+    if not _enabled:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.observe(seconds)
+
+
+def inc(name: str, n: int = 1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+# ---------------- Export ----------------
+def snapshot() -> Dict[str, Dict]:
+    with _lock:
+        return {
+            "spans": {name: h.summary() for name, h in sorted(_histograms.items())},
+            "counters": dict(sorted(_counters.items())),
+        }
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def prometheus_text() -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = [
+        f"# HELP {PREFIX}_stage_seconds Time spent per scan pipeline stage.",
+        f"# TYPE {PREFIX}_stage_seconds histogram",
+    ]
+    with _lock:
+        for name, h in sorted(_histograms.items()):
+            cumulative = 0
+            for le, n in zip(BUCKETS + (float("inf"),), h.buckets):
+                cumulative += n
+                bound = "+Inf" if le == float("inf") else repr(le)
+                lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{name}"}} {h.sum}')
+            lines.append(f'{PREFIX}_stage_seconds_count{{stage="{name}"}} {h.count}')
+        for name, value in sorted(_counters.items()):
+            metric = f"{PREFIX}_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve prometheus_text() at http://host:port/metrics from a daemon thread (once per process)."""
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        _server = ThreadingHTTPServer((host, port), Handler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
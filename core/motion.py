@@ -0,0 +1,122 @@
+"""
+Motion-gated, adaptive inference scheduling for the live loops.
+
+Instead of running YOLO on every third frame, InferenceScheduler asks a cheap
+MotionGate whether anything changed on the belt:
+
+  * MotionGate compares a blurred 80x60 grayscale copy of each frame with the
+    previous one and with a slowly adapting background. A frame is "active"
+    when enough pixels differ from either.
+  * While the scene is active (and for `hold` seconds after it settles, so a
+    stopped item still gets classified), inference runs as often as the CPU
+    budget allows: at most once per ema(inference time) / budget seconds.
+  * While idle, inference only runs every `idle_interval` seconds as a
+    heartbeat, so slow-moving or already present items are not missed.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class MotionGate:
+    def __init__(
+        self,
+        size: Tuple[int, int] = (80, 60),
+        pixel_threshold: int = 18,
+        min_area: float = 0.01,
+        bg_alpha: float = 0.02,
+    ):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.min_area = min_area
+        self.bg_alpha = bg_alpha
+        self._prev = None
+        self._bg = None
+        self.last_score = 0.0
+
+    def update(self, frame) -> bool:
+        """Feed a BGR frame; True when the scene changed enough to look at."""
+        import cv2
+        import numpy as np
+
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        if self._prev is None:
+            self._prev = gray
+            self._bg = gray.astype(np.float32)
+            self.last_score = 1.0
+            return True
+
+        frame_diff = cv2.absdiff(gray, self._prev)
+        bg_diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._bg))
+        changed = np.maximum(frame_diff, bg_diff) > self.pixel_threshold
+        self.last_score = float(changed.mean())
+
+        self._prev = gray
+        cv2.accumulateWeighted(gray, self._bg, self.bg_alpha)
+        return self.last_score >= self.min_area
+
+
+class InferenceScheduler:
+    def __init__(
+        self,
+        gate: Optional[MotionGate] = None,
+        budget: float = 0.6,
+        idle_interval: float = 2.0,
+        hold: float = 1.0,
+        ema: float = 0.2,
+    ):
+        self.gate = gate if gate is not None else MotionGate()
+        self.budget = budget
+        self.idle_interval = idle_interval
+        self.hold = hold
+        self.ema = ema
+
+        self.infer_time: Optional[float] = None
+        self._last_run = float("-inf")
+        self._active_until = float("-inf")
+
+        self.frames = 0
+        self.runs = 0
+        self.skipped_idle = 0
+        self.skipped_budget = 0
+
+    def should_run(self, frame, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+
+        if self.gate.update(frame):
+            self._active_until = now + self.hold
+        active = now <= self._active_until
+
+        if not active:
+            if now - self._last_run < self.idle_interval:
+                self.skipped_idle += 1
+                return False
+        elif self.infer_time is not None and now - self._last_run < self.infer_time / self.budget:
+            self.skipped_budget += 1
+            return False
+
+        self._last_run = now
+        self.runs += 1
+        return True
+
+    def record(self, seconds: float):
+        """Report how long the inference that should_run() allowed took."""
+        if self.infer_time is None:
+            self.infer_time = seconds
+        else:
+            self.infer_time += self.ema * (seconds - self.infer_time)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "frames": self.frames,
+            "inferences": self.runs,
+            "skipped_idle": self.skipped_idle,
+            "skipped_budget": self.skipped_budget,
+            "infer_ms": (self.infer_time or 0.0) * 1000,
+            "motion_score": self.gate.last_score,
+        }
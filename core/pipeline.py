@@ -0,0 +1,279 @@
+"""
+Threaded capture -> inference -> actuation pipeline for the live sorter.
+
+Three threads connected by bounded, drop-oldest queues:
+
+    capture   reads frames as fast as the source delivers them and keeps only
+              the newest one, so inference never works on a stale frame
+    inference runs the detector on the latest frame and emits sort decisions
+    actuator  drives the servo; a slow move never blocks capture or inference
+
+Every stage records its latency, and stats() reports p50/p95 per stage plus
+end-to-end (frame captured -> servo done) latency and throughput.
+
+Sources can be a camera index, a video file, or a directory / glob of images
+(see open_source), so the loop can be exercised without a camera.
+"""
+from __future__ import annotations
+
+import glob
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+
+class DropOldestQueue:
+    """Bounded queue whose put() evicts the oldest item instead of blocking."""
+
+    def __init__(self, maxsize: int):
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._lock:
+            while True:
+                try:
+                    self._q.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self._q.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout: Optional[float] = None):
+        return self._q.get(timeout=timeout)
+
+    def qsize(self) -> int:
+        return self._q.qsize()
+
+
+class StageStats:
+    def __init__(self, window: int = 512):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count}
+        return {
+            "count": self.count,
+            "p50_ms": samples[len(samples) // 2] * 1000,
+            "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+            "max_ms": samples[-1] * 1000,
+        }
+
+
+# ---------------- Sources ----------------
+class ImageFolderSource:
+    """cv2.VideoCapture-like reader over a directory or glob of still images."""
+
+    def __init__(self, pattern: str, loop: bool = False):
+        import cv2
+
+        self._cv2 = cv2
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        self.paths = sorted(
+            p for p in glob.glob(pattern)
+            if p.lower().endswith((".jpg", ".jpeg", ".png", ".bmp"))
+        )
+        self.loop = loop
+        self._i = 0
+
+    def read(self) -> Tuple[bool, Any]:
+        if not self.paths or (self._i >= len(self.paths) and not self.loop):
+            return False, None
+        frame = self._cv2.imread(self.paths[self._i % len(self.paths)])
+        self._i += 1
+        return frame is not None, frame
+
+    def release(self):
+        pass
+
+
+class PacedSource:
+    """Replays a file source at a fixed FPS instead of as fast as it decodes."""
+
+    def __init__(self, source, fps: float):
+        self.source = source
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self._next = time.monotonic()
+
+    def read(self):
+        if self.interval:
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next = max(self._next + self.interval, time.monotonic())
+        return self.source.read()
+
+    def release(self):
+        self.source.release()
+
+
+def open_source(src, width: int = 320, height: int = 240, fps: float = 15, realtime: bool = True):
+    """
+    Camera index ("0"), video file, or image directory / glob. File sources are
+    paced to `fps` when realtime=True, like a camera would deliver them.
+    """
+    import cv2
+
+    if isinstance(src, int) or (isinstance(src, str) and src.isdigit()):
+        cap = cv2.VideoCapture(int(src))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        cap.set(cv2.CAP_PROP_FPS, fps)
+        return cap
+
+    if os.path.isdir(src) or any(c in src for c in "*?["):
+        source = ImageFolderSource(src)
+    else:
+        source = cv2.VideoCapture(src)
+        fps = source.get(cv2.CAP_PROP_FPS) or fps
+    return PacedSource(source, fps) if realtime else source
+
+
+# ---------------- Pipeline ----------------
+class SortingPipeline:
+    """
+    source:  object with read() -> (ok, frame), e.g. cv2.VideoCapture
+    detect:  frame -> label to sort, a list of labels (several items decided
+             on the same frame; each is actuated, in order), or None
+    actuate: label -> None; may block (servo move time). It may instead return
+             a handle with wait(timeout) (core.hardware.SortCommand), which is
+             awaited so "actuate" and "end_to_end" end when the servo is done
+    """
+
+    def __init__(
+        self,
+        source,
+        detect: Callable[[Any], Union[None, str, Sequence[str]]],
+        actuate: Callable[[str], Any],
+        frame_queue: int = 1,
+        action_queue: int = 4,
+        ack_timeout: float = 5.0,
+    ):
+        self.source = source
+        self.detect = detect
+        self.actuate = actuate
+        self.ack_timeout = ack_timeout
+
+        self.frames = DropOldestQueue(frame_queue)
+        self.actions = DropOldestQueue(action_queue)
+        self.stats_capture = StageStats()
+        self.stats_infer = StageStats()
+        self.stats_actuate = StageStats()
+        self.stats_e2e = StageStats()
+
+        self._stop = threading.Event()
+        self._source_done = threading.Event()
+        self._threads = []
+        self._started_at: Optional[float] = None
+
+    # ---------------- Stages ----------------
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            ok, frame = self.source.read()
+            if not ok:
+                break
+            self.stats_capture.add(time.perf_counter() - t0)
+            self.frames.put((time.perf_counter(), frame))
+        self._source_done.set()
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            try:
+                t_capture, frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                if self._source_done.is_set():
+                    break
+                continue
+            t0 = time.perf_counter()
+            decided = self.detect(frame)
+            self.stats_infer.add(time.perf_counter() - t0)
+            if decided is None:
+                continue
+            for label in [decided] if isinstance(decided, str) else decided:
+                self.actions.put((t_capture, label))
+
+    def _actuator_loop(self):
+        while True:
+            try:
+                t_capture, label = self.actions.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set() or not self._threads[1].is_alive():
+                    break
+                continue
+            t0 = time.perf_counter()
+            handle = self.actuate(label)
+            if hasattr(handle, "wait"):
+                handle.wait(self.ack_timeout)
+            done = time.perf_counter()
+            self.stats_actuate.add(done - t0)
+            self.stats_e2e.add(done - t_capture)
+
+    # ---------------- Control ----------------
+    def start(self) -> "SortingPipeline":
+        self._started_at = time.perf_counter()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+            threading.Thread(target=self._actuator_loop, name="actuator", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.join()
+
+    def join(self, timeout: Optional[float] = None):
+        for t in self._threads:
+            t.join(timeout)
+
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - (self._started_at or time.perf_counter())
+        return {
+            "elapsed_s": elapsed,
+            "capture_fps": self.stats_capture.count / elapsed if elapsed else 0.0,
+            "inference_fps": self.stats_infer.count / elapsed if elapsed else 0.0,
+            "frames_dropped": self.frames.dropped,
+            "actions_dropped": self.actions.dropped,
+            "capture": self.stats_capture.summary(),
+            "inference": self.stats_infer.summary(),
+            "actuate": self.stats_actuate.summary(),
+            "end_to_end": self.stats_e2e.summary(),
+        }
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    def stage(name):
+        s = stats[name]
+        if "p50_ms" not in s:
+            return f"{name} n=0"
+        return f"{name} n={s['count']} p50={s['p50_ms']:.1f}ms p95={s['p95_ms']:.1f}ms"
+
+    return (
+        f"[{stats['elapsed_s']:.0f}s] capture {stats['capture_fps']:.1f} fps, "
+        f"inference {stats['inference_fps']:.1f} fps, dropped {stats['frames_dropped']} frames | "
+        + " | ".join(stage(n) for n in ("capture", "inference", "actuate", "end_to_end"))
+    )
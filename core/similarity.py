@@ -0,0 +1,155 @@
+"""
+Near-duplicate short-circuit: reuse the label of a recently confirmed scan.
+
+    vec = embed(bgr_frame)
+    match = index.query(vec)          # None, or the closest confirmed scan
+    index.add(vec, "ram_stick", 0.91) # after the scan was logged (or overridden)
+
+The embedding is a compact appearance vector computed on a 16x16 thumbnail:
+the mean-centred, unit-norm grayscale layout (insensitive to exposure) plus a
+4x4x4 colour histogram, weighted so their cosine similarities blend 70/30.
+Cheap enough to run before every inference, and it works with every engine
+backend (local, ONNX, remote), which pooled model features would not.
+
+SimilarityIndex is a fixed-capacity ring of confirmed scans searched by brute
+force (one matrix-vector product; ~0.1 ms at 2048 entries). A query is a hit
+when the best cosine similarity reaches ``threshold``. A manual override also
+relabels the confirmed neighbours it contradicts, so one correction fixes the
+look-alikes already in the index. To keep the reuse honest, every
+``verify_every``-th hit is still sent through the model and the agreement is
+counted (see stats()).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+
+from core.config import SIMILARITY_CAPACITY, SIMILARITY_THRESHOLD, SIMILARITY_VERIFY_EVERY
+
+THUMB = 16
+HIST_BINS = 4
+DIM = THUMB * THUMB + HIST_BINS ** 3
+_LAYOUT_WEIGHT = np.sqrt(0.7)
+_COLOR_WEIGHT = np.sqrt(0.3)
+# A new entry this close to one with the same label refreshes it instead of taking a slot
+_REFRESH_SIMILARITY = 0.995
+
+
+def embed(frame: np.ndarray) -> np.ndarray:
+    """BGR uint8 frame -> unit-norm float32 vector of length DIM."""
+    import cv2
+
+    small = cv2.resize(frame, (THUMB, THUMB), interpolation=cv2.INTER_AREA)
+    if small.ndim == 2:
+        small = cv2.cvtColor(small, cv2.COLOR_GRAY2BGR)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32).ravel()
+    gray -= gray.mean()
+    gray /= np.linalg.norm(gray) or 1.0
+
+    q = (small // (256 // HIST_BINS)).reshape(-1, 3).astype(np.intp)
+    hist = np.bincount((q[:, 0] * HIST_BINS + q[:, 1]) * HIST_BINS + q[:, 2], minlength=HIST_BINS ** 3)
+    hist = np.sqrt(hist.astype(np.float32))
+    hist /= np.linalg.norm(hist) or 1.0
+
+    return np.concatenate([gray * _LAYOUT_WEIGHT, hist * _COLOR_WEIGHT]).astype(np.float32)
+
+
+class Match(NamedTuple):
+    label: str
+    confidence: float
+    similarity: float
+    source: str  # "model" or "override"
+    verify: bool  # run the model anyway and record_verification() the outcome
+
+
+class SimilarityIndex:
+    def __init__(
+        self,
+        capacity: int = SIMILARITY_CAPACITY,
+        threshold: float = SIMILARITY_THRESHOLD,
+        verify_every: int = SIMILARITY_VERIFY_EVERY,
+    ):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.verify_every = verify_every
+        self._lock = threading.Lock()
+        self._lookup_ms: deque = deque(maxlen=512)
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._vecs = np.zeros((self.capacity, DIM), dtype=np.float32)
+            self._labels = [""] * self.capacity
+            self._conf = np.zeros(self.capacity)
+            self._source = [""] * self.capacity
+            self._size = 0
+            self._next = 0
+            self.counts = {"lookups": 0, "hits": 0, "verified": 0, "agreed": 0, "added": 0, "relabeled": 0}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _similarities(self, vec: np.ndarray) -> np.ndarray:
+        return self._vecs[:self._size] @ vec
+
+    def query(self, vec: np.ndarray) -> Optional[Match]:
+        t0 = time.perf_counter()
+        with self._lock:
+            self.counts["lookups"] += 1
+            match = None
+            if self._size:
+                sims = self._similarities(vec)
+                best = int(sims.argmax())
+                if sims[best] >= self.threshold:
+                    self.counts["hits"] += 1
+                    verify = bool(self.verify_every) and self.counts["hits"] % self.verify_every == 0
+                    match = Match(self._labels[best], float(self._conf[best]), float(sims[best]), self._source[best], verify)
+        self._lookup_ms.append((time.perf_counter() - t0) * 1000)
+        return match
+
+    def record_verification(self, agreed: bool):
+        with self._lock:
+            self.counts["verified"] += 1
+            self.counts["agreed"] += agreed
+
+    def add(self, vec: np.ndarray, label: str, confidence: float, source: str = "model"):
+        with self._lock:
+            slot = None
+            if self._size:
+                sims = self._similarities(vec)
+                if source == "override":
+                    # The operator says this look is `label`: correct the neighbours that disagree
+                    for i in np.flatnonzero(sims >= self.threshold):
+                        if self._labels[i] != label:
+                            self._labels[i], self._source[i], self._conf[i] = label, source, confidence
+                            self.counts["relabeled"] += 1
+                best = int(sims.argmax())
+                if sims[best] >= _REFRESH_SIMILARITY and self._labels[best] == label:
+                    slot = best
+                    if self._source[best] == "override":
+                        source, confidence = "override", max(confidence, float(self._conf[best]))
+            if slot is None:
+                slot = self._next
+                self._next = (self._next + 1) % self.capacity
+                self._size = min(self._size + 1, self.capacity)
+            self._vecs[slot] = vec
+            self._labels[slot] = label
+            self._conf[slot] = confidence
+            self._source[slot] = source
+            self.counts["added"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out: Dict[str, float] = dict(self.counts)
+        out["entries"] = self._size
+        out["hit_rate"] = out["hits"] / out["lookups"] if out["lookups"] else 0.0
+        if out["verified"]:
+            out["agreement"] = out["agreed"] / out["verified"]
+        lat = sorted(self._lookup_ms)
+        if lat:
+            out["lookup_p50_ms"] = lat[len(lat) // 2]
+        return out
@@ -0,0 +1,146 @@
+"""
+Lightweight IoU tracker with per-track temporal voting.
+
+Detections from consecutive inference frames are associated to tracks by
+greedy IoU matching. Each track keeps a sliding window of (label, conf) votes;
+the track "fires" -- exactly once -- when one label's summed confidence over
+the window reaches `fire_score` after at least `min_hits` matched frames.
+A single-frame flicker therefore never moves the servo, and an item that
+stays in view is sorted once instead of on every detection.
+
+Decision latency (first sighting -> fire) is recorded per track.
+"""
+from __future__ import annotations
+
+import itertools
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Box = Tuple[float, float, float, float]  # x1, y1, x2, y2
+Detection = Tuple[Box, str, float]       # box, label, confidence
+
+
+def iou(a: Box, b: Box) -> float:
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    if inter <= 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / (area_a + area_b - inter)
+
+
+class Track:
+    def __init__(self, track_id: int, box: Box, now: float, window: int):
+        self.id = track_id
+        self.box = box
+        self.first_seen = now
+        self.hits = 0
+        self.misses = 0
+        self.fired: Optional[str] = None
+        self.votes: deque = deque(maxlen=window)
+
+    def add(self, box: Box, label: str, conf: float):
+        self.box = box
+        self.hits += 1
+        self.misses = 0
+        self.votes.append((label, conf))
+
+    def best(self) -> Tuple[Optional[str], float]:
+        scores: Dict[str, float] = defaultdict(float)
+        for label, conf in self.votes:
+            scores[label] += conf
+        if not scores:
+            return None, 0.0
+        label = max(scores, key=scores.get)
+        return label, scores[label]
+
+
+class VotingTracker:
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        window: int = 8,
+        fire_score: float = 1.5,
+        min_hits: int = 2,
+        max_misses: int = 5,
+    ):
+        self.iou_threshold = iou_threshold
+        self.window = window
+        self.fire_score = fire_score
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+
+        self.tracks: List[Track] = []
+        self._ids = itertools.count(1)
+        self.created = 0
+        self.fired = 0
+        self._latencies: deque = deque(maxlen=512)
+        self._frames_to_fire: deque = deque(maxlen=512)
+
+    def _associate(self, detections: Sequence[Detection]) -> Dict[int, int]:
+        """Greedy highest-IoU-first matching: detection index -> track index."""
+        pairs = []
+        for di, (box, _, _) in enumerate(detections):
+            for ti, track in enumerate(self.tracks):
+                overlap = iou(box, track.box)
+                if overlap >= self.iou_threshold:
+                    pairs.append((overlap, di, ti))
+        pairs.sort(reverse=True)
+
+        matches: Dict[int, int] = {}
+        used_tracks = set()
+        for _, di, ti in pairs:
+            if di in matches or ti in used_tracks:
+                continue
+            matches[di] = ti
+            used_tracks.add(ti)
+        return matches
+
+    def update(self, detections: Sequence[Detection], now: Optional[float] = None) -> List[Tuple[int, str, float]]:
+        """
+        Feed one inference frame. Returns (track_id, label, score) for every
+        track that reached its decision on this frame.
+        """
+        now = time.monotonic() if now is None else now
+        matches = self._associate(detections)
+        matched_tracks = set(matches.values())
+
+        for di, (box, label, conf) in enumerate(detections):
+            if di in matches:
+                track = self.tracks[matches[di]]
+            else:
+                track = Track(next(self._ids), box, now, self.window)
+                self.tracks.append(track)
+                self.created += 1
+                matched_tracks.add(len(self.tracks) - 1)
+            track.add(box, label, conf)
+
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        decisions = []
+        for track in self.tracks:
+            if track.fired is not None or track.hits < self.min_hits:
+                continue
+            label, score = track.best()
+            if label is not None and score >= self.fire_score:
+                track.fired = label
+                self.fired += 1
+                self._latencies.append(now - track.first_seen)
+                self._frames_to_fire.append(track.hits)
+                decisions.append((track.id, label, score))
+        return decisions
+
+    def stats(self) -> Dict[str, float]:
+        lat = sorted(self._latencies)
+        out = {"tracks": self.created, "active": len(self.tracks), "fired": self.fired}
+        if lat:
+            out["decision_p50_ms"] = lat[len(lat) // 2] * 1000
+            out["decision_p95_ms"] = lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000
+            out["frames_to_fire_avg"] = sum(self._frames_to_fire) / len(self._frames_to_fire)
+        return out
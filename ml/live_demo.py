@@ -1,11 +1,16 @@
-from ultralytics import YOLO
 import cv2
 import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))  # repo root, for core.*
+
+from core.config import LIVE_CONF
+from core.engine import get_engine
 
 if __name__ == '__main__':
-    # Load your trained model
-    HERE = os.path.dirname(__file__)
-    model = YOLO(os.path.join(HERE, "best.pt"))
+    # Same engine (weights, class mapping) as the app
+    engine = get_engine()
     
     cap = cv2.VideoCapture(0)  # Your webcam
     
@@ -14,12 +19,10 @@ if __name__ == '__main__':
         if not ret:
             break
         
-        results = model.predict(frame, conf=0.25, verbose=False)
-        for box in results[0].boxes:
-            cls = int(box.cls[0])
-            conf = float(box.conf[0])
-            print(f"Detected: {model.names[cls]} ({conf:.2f})")
-        annotated = results[0].plot()  # Draw boxes on frame
+        det = engine.predict([frame], conf=LIVE_CONF)[0]
+        for _, label, conf in engine.items(det):
+            print(f"Detected: {label} ({conf:.2f})")
+        annotated = det.plot()  # Draw boxes on frame
         
         cv2.imshow('E-Waste Detector', annotated)
         
@@ -1,15 +1,25 @@
-from ultralytics import YOLO
 import cv2
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))  # repo root, for core.*
+
+from core.config import LIVE_CONF, LIVE_IMGSZ
+from core.engine import get_engine
+from core.motion import InferenceScheduler
 
 if __name__ == '__main__':
-    model = YOLO('best.pt')
+    engine = get_engine()
     
     cap = cv2.VideoCapture(0)
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 320)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 240)
     cap.set(cv2.CAP_PROP_FPS, 15)
     
-    frame_count = 0
+    # Run detection only when something moves on the belt (see core/motion.py)
+    scheduler = InferenceScheduler()
     annotated = None
     
     while True:
@@ -17,17 +27,14 @@ if __name__ == '__main__':
         if not ret:
             break
         
-        frame_count += 1
-        
-        # Only run detection every 3 frames
-        if frame_count % 3 == 0:
-            results = model.predict(frame, conf=0.25, imgsz=320, verbose=False)
-            annotated = results[0].plot()
+        if scheduler.should_run(frame):
+            t0 = time.perf_counter()
+            det = engine.predict([frame], conf=LIVE_CONF, imgsz=LIVE_IMGSZ)[0]
+            scheduler.record(time.perf_counter() - t0)
+            annotated = det.plot()
             
-            for box in results[0].boxes:
-                cls = int(box.cls[0])
-                conf = float(box.conf[0])
-                print(f"Detected: {model.names[cls]} ({conf:.2f})")
+            for _, label, conf in engine.items(det):
+                print(f"Detected: {label} ({conf:.2f})")
         
         if annotated is not None:
             cv2.imshow('E-Waste Detector', annotated)
@@ -35,5 +42,6 @@ if __name__ == '__main__':
         if cv2.waitKey(1) == ord('q'):
             break
     
+    print(scheduler.stats())
     cap.release()
-    cv2.destroyAllWindows()
\ No newline at end of file
+    cv2.destroyAllWindows()
@@ -1,97 +1,105 @@
-from ultralytics import YOLO
-import cv2
-from gpiozero import Servo
+import argparse
+import os
+import sys
+import time
 from time import sleep
 
-# --------------------
-# Servo setup (ONE SERVO)
-# --------------------
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))  # repo root, for core.*
+
+from core.config import LIVE_CONF, LIVE_IMGSZ, SERVO_ANGLES, SORT_SCORE
+from core.engine import Engine, get_engine
+from core.hardware import GpioServo, ServoController, SimulatedServo, servo_target
+from core.motion import InferenceScheduler
+from core.pipeline import SortingPipeline, format_stats, open_source
+from core.tracker import VotingTracker
+
 SERVO_GPIO = 18  # GPIO pin for the servo
 
-servo = Servo(
-    SERVO_GPIO,
-    min_pulse_width=0.5 / 1000,   # 0.5 ms
-    max_pulse_width=2.5 / 1000    # 2.5 ms
-)
-
-def angle_to_value(angle):
-    """
-    Convert angle (0–180°) to gpiozero Servo value (-1 to +1)
-    """
-    angle = max(0, min(180, angle))
-    return (angle / 90.0) - 1.0
-
-def move_servo(angle):
-    servo.value = angle_to_value(angle)
-    sleep(0.15)  # give servo time to move
-
-# Mapping from YOLO labels → servo angles
-ANGLE_MAP = {
-    "USB_Drive": 45,   # Flash drive
-    "RAM": 35,
-    "CPU": 180
-}
-
-# --------------------
-# YOLO + Camera setup
-# --------------------
-model = YOLO("best.pt")
-
-cap = cv2.VideoCapture(0)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 320)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 240)
-cap.set(cv2.CAP_PROP_FPS, 15)
-
-frame_count = 0
-last_label = None  # prevents servo jitter
-
-print("E-Waste sorting started (CTRL+C to stop)")
-
-try:
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame_count += 1
-
-        # Run YOLO every 3 frames
-        if frame_count % 3 == 0:
-            results = model.predict(
-                frame,
-                conf=0.25,
-                imgsz=320,
-                verbose=False
-            )
-
-            if results and results[0].boxes is not None and len(results[0].boxes) > 0:
-                boxes = results[0].boxes
-
-                # Pick highest confidence detection
-                best_i = int(boxes.conf.argmax().item())
-                best_box = boxes[best_i]
-
-                cls = int(best_box.cls[0])
-                conf = float(best_box.conf[0])
-                label = model.names[cls]
-
-                print(f"Detected: {label} ({conf:.2f})")
-
-                # Confidence threshold
-                if conf < 0.5:
-                    continue
-
-                # Move servo only if new object detected
-                if label in ANGLE_MAP and label != last_label:
-                    angle = ANGLE_MAP[label]
-                    print(f"→ Moving servo to {angle}° for {label}")
-                    move_servo(angle)
-                    last_label = label
-
-except KeyboardInterrupt:
-    print("\nStopping system...")
-
-finally:
-    cap.release()
-    move_servo(0)   # reset servo on exit
-    servo.detach()
+def main():
+    ap = argparse.ArgumentParser(description="Live e-waste sorting loop")
+    ap.add_argument("--source", default="0", help="camera index, video file, or image dir/glob")
+    ap.add_argument("--weights", default=None, help="override EWIZARD_WEIGHTS (ignored with EWIZARD_ENGINE)")
+    ap.add_argument("--no-servo", action="store_true", help="simulate the servo (no GPIO)")
+    ap.add_argument("--duration", type=float, default=None, help="stop after N seconds")
+    ap.add_argument("--stats-every", type=float, default=5.0)
+    ap.add_argument("--no-motion-gate", action="store_true", help="run YOLO on every frame")
+    args = ap.parse_args()
+
+    # --------------------
+    # Engine + Camera setup
+    # --------------------
+    engine = Engine(args.weights) if args.weights else get_engine()
+    cap = open_source(args.source)
+    # Moves run on the controller's own thread; actuate() only queues them
+    # (see core/hardware.py)
+    servo = SimulatedServo() if args.no_servo else GpioServo(SERVO_GPIO)
+    controller = ServoController(servo)
+
+    # One sort per physical item: boxes are tracked across frames and a track
+    # fires once its summed confidence for a label reaches SORT_SCORE (e.g.
+    # three frames at 0.5) over the last 8 inference frames (see core/tracker.py)
+    tracker = VotingTracker(fire_score=SORT_SCORE, window=8)
+
+    # Skip YOLO while the belt is empty / unchanged (see core/motion.py)
+    scheduler = None if args.no_motion_gate else InferenceScheduler()
+
+    def detect(frame):
+        if scheduler is not None and not scheduler.should_run(frame):
+            return None
+
+        t0 = time.perf_counter()
+        det = engine.predict([frame], conf=LIVE_CONF, imgsz=LIVE_IMGSZ)[0]
+        if scheduler is not None:
+            scheduler.record(time.perf_counter() - t0)
+
+        detections = engine.items(det)
+
+        # Every track that fired on this frame is sorted, in order; a track
+        # only fires once, so none of them may be dropped here
+        targets = []
+        for track_id, label, score in tracker.update(detections):
+            print(f"Detected: {label} (track {track_id}, score {score:.2f})")
+            # Move servo once per tracked item (labels without an angle use their bin's)
+            target = servo_target(label)
+            if target is not None:
+                targets.append(target)
+        return targets
+
+    def actuate(label):
+        print(f"→ Moving servo to {SERVO_ANGLES[label]}° for {label}")
+        return controller.submit(label)  # the pipeline waits for the ack, so end_to_end ends at the servo
+
+    pipeline = SortingPipeline(cap, detect, actuate).start()
+    print("E-Waste sorting started (CTRL+C to stop)")
+
+    started = time.monotonic()
+    next_report = started + args.stats_every
+    try:
+        while pipeline.running():
+            sleep(0.1)
+            now = time.monotonic()
+            if args.duration is not None and now - started >= args.duration:
+                break
+            if now >= next_report:
+                print(format_stats(pipeline.stats()))
+                if scheduler is not None:
+                    print("  scheduler:", scheduler.stats())
+                print("  tracker:", tracker.stats())
+                print("  servo:", controller.stats())
+                next_report = now + args.stats_every
+
+    except KeyboardInterrupt:
+        print("\nStopping system...")
+
+    finally:
+        pipeline.stop()
+        print(format_stats(pipeline.stats()))
+        cap.release()
+        controller.home()   # reset servo on exit
+        controller.close()
+        print("  servo:", controller.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Re-label an image archive with the current weights.
+
+    python -m ml.rescore images/ --workers 4 --batch-size 16
+    python -m ml.rescore "archive/**/*.jpg" --weights ml/best.onnx --name relabel-v2
+
+Files are streamed from a directory (recursively) or a glob, decoded in a
+process pool, scored in batches by one engine in this process, and written
+through utils.storage to data/rescore/<name>.csv. The results log doubles as
+the checkpoint: rerunning the same command skips every path already in it,
+so an interrupted run picks up where it stopped. Files that cannot be decoded
+are logged too, with label "unreadable", so a resume does not retry them.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))  # repo root, for core.* / utils.*
+
+from core.config import BIN_MAP, DETECT_CONF
+from core.engine import Engine, get_engine
+from utils.storage import rescore_log, rescored_paths
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+UNREADABLE = "unreadable"  # label recorded for files that fail to decode
+
+
+def iter_paths(source: str):
+    """Image paths under a directory (recursive) or matching a glob, lazily."""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTS):
+                    yield os.path.join(root, name)
+    else:
+        for path in glob.iglob(source, recursive=True):
+            if path.lower().endswith(IMAGE_EXTS):
+                yield path
+
+
+def decode(paths, max_side=None):
+    """Worker: read + decode one chunk of files to BGR arrays (None if unreadable)."""
+    import cv2
+
+    out = []
+    for path in paths:
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is not None and max_side:
+            h, w = frame.shape[:2]
+            scale = max_side / max(h, w)
+            if scale < 1:
+                # Shrink before pickling back to the parent: less IPC, same detections
+                frame = cv2.resize(frame, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+        out.append((path, frame))
+    return out
+
+
+def chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Bulk re-scoring of an image directory or glob.")
+    ap.add_argument("source", help="directory (searched recursively) or glob pattern")
+    ap.add_argument("--weights", default=None, help="override EWIZARD_WEIGHTS")
+    ap.add_argument("--name", default=None, help="results name (default: rescore-<weights file>)")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="decode processes")
+    ap.add_argument("--batch-size", type=int, default=16, help="frames per model call")
+    ap.add_argument("--max-side", type=int, default=None, help="downscale larger images before inference")
+    ap.add_argument("--conf", type=float, default=DETECT_CONF)
+    ap.add_argument("--report-every", type=float, default=10.0, help="seconds between progress lines")
+    args = ap.parse_args()
+
+    engine = Engine(args.weights) if args.weights else get_engine()
+    name = args.name or "rescore-" + os.path.splitext(os.path.basename(engine.weights))[0]
+    done = rescored_paths(name)
+    log = rescore_log(name)
+    print(f"{engine.name} / {engine.weights} -> data/rescore/{name}.csv ({len(done)} already scored)")
+
+    todo = (p for p in iter_paths(args.source) if p not in done)
+    scored = failed = 0
+    decode_wait = infer_s = 0.0
+    started = time.perf_counter()
+    next_report = started + args.report_every
+
+    def report(final=False):
+        elapsed = time.perf_counter() - started
+        rate = scored / elapsed if elapsed else 0.0
+        tag = "done" if final else "progress"
+        print(f"[{tag}] {scored} scored, {failed} unreadable, {rate:.1f} img/s, "
+              f"infer {infer_s:.1f}s, waiting on decode {decode_wait:.1f}s, {elapsed:.1f}s total")
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            # Bounded read-ahead: enough chunks in flight to keep every worker busy
+            pending = deque()
+            source = chunks(todo, args.batch_size)
+            for chunk in islice(source, args.workers * 2):
+                pending.append(pool.submit(decode, chunk, args.max_side))
+
+            while pending:
+                t0 = time.perf_counter()
+                decoded = pending.popleft().result()
+                decode_wait += time.perf_counter() - t0
+                for chunk in islice(source, 1):
+                    pending.append(pool.submit(decode, chunk, args.max_side))
+
+                paths = [p for p, f in decoded if f is not None]
+                frames = [f for _, f in decoded if f is not None]
+                stamp = datetime.now().isoformat(timespec="seconds")
+                # Logged so rescored_paths() skips them on resume instead of re-failing
+                unreadable = [
+                    {"path": p, "label": UNREADABLE, "confidence": "", "bin": "", "class_name": "",
+                     "weights": engine.weights, "scored_at": stamp}
+                    for p, f in decoded if f is None
+                ]
+                failed += len(unreadable)
+
+                rows = []
+                if frames:
+                    t0 = time.perf_counter()
+                    dets = engine.predict(frames, conf=args.conf)
+                    infer_s += time.perf_counter() - t0
+
+                    for path, det in zip(paths, dets):
+                        top = engine.top(det)
+                        class_name, label, conf = top if top else ("", "unknown", 0.0)
+                        rows.append({
+                            "path": path,
+                            "label": label,
+                            "confidence": round(conf, 4),
+                            "bin": BIN_MAP.get(label, BIN_MAP["unknown"]),
+                            "class_name": class_name,
+                            "weights": engine.weights,
+                            "scored_at": stamp,
+                        })
+                log.append(unreadable + rows)
+                scored += len(rows)
+
+                if time.perf_counter() >= next_report:
+                    report()
+                    next_report = time.perf_counter() + args.report_every
+    except KeyboardInterrupt:
+        print("\nInterrupted; rerun the same command to resume.")
+    finally:
+        log.flush()
+        report(final=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from utils import columnar
+from utils.scanlog import ScanLog
+
+COLUMNS = ["timestamp", "label", "confidence", "bin", "overridden"]
+
+
+def rows(day, n, label="cpu"):
+    return [
+        {"timestamp": f"2026-04-{day:02d}T10:00:{i:02d}", "label": label, "confidence": 0.9, "bin": "b", "overridden": False}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def setup(tmp_path):
+    log_path = str(tmp_path / "scans.csv")
+    log = ScanLog(log_path, COLUMNS)
+    store = columnar.ColumnarStore(str(tmp_path / "parquet"), log_path)
+    yield log, store
+    log.close()
+
+
+def crash_on_checkpoint(monkeypatch, store):
+    def boom(state):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(store, "_save_checkpoint", boom)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_sync_interrupted_before_checkpoint_is_not_duplicated(setup, monkeypatch, compact):
+    log, store = setup
+    log.append(rows(1, 5))
+    log.flush()
+    store.sync()
+
+    log.append(rows(1, 3) + rows(2, 4, "gpu"))
+    log.flush()
+    with monkeypatch.context() as m:
+        crash_on_checkpoint(m, store)
+        with pytest.raises(KeyboardInterrupt):
+            store.sync()
+    if compact:
+        store.compact(max_parts=0)
+    log.append(rows(3, 2))  # more rows arrive before the next sync
+    log.flush()
+
+    store.sync()
+    df = store.load()
+    assert len(df) == 5 + 3 + 4 + 2
+    assert df["label"].value_counts().to_dict() == {"cpu": 10, "gpu": 4}
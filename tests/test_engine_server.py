@@ -0,0 +1,104 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from core.backends import Detections
+from core.engine_server import EngineBusy, MicroBatcher
+
+
+class GatedPredict:
+    """predict() that blocks until released, recording every batch it ran."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.batches = []
+
+    def __call__(self, frames, conf, imgsz):
+        self.started.set()
+        self.release.wait(5)
+        self.batches.append(len(frames))
+        empty = np.zeros((0,), dtype=np.float32)
+        return [Detections(np.zeros((0, 4), np.float32), empty, empty.astype(np.intp), {}, f) for f in frames]
+
+
+def frame():
+    return np.zeros((8, 8, 3), dtype=np.uint8)
+
+
+def submit_in_thread(batcher, results):
+    def run():
+        try:
+            results.append(batcher.submit([frame()], 0.25, None))
+        except EngineBusy as e:
+            results.append(e)
+
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    return t
+
+
+def wait_for_depth(batcher, depth):
+    deadline = time.monotonic() + 5
+    while batcher.stats()["queue_depth"] < depth and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_full_queue_is_rejected_at_once():
+    predict = GatedPredict()
+    batcher = MicroBatcher(predict, max_batch=1, max_wait=0, max_queue=2)
+    results = []
+    threads = [submit_in_thread(batcher, results)]
+    assert predict.started.wait(5)  # the worker holds the first request
+    threads += [submit_in_thread(batcher, results) for _ in range(2)]
+    wait_for_depth(batcher, 2)
+
+    t0 = time.monotonic()
+    with pytest.raises(EngineBusy):
+        batcher.submit([frame()], 0.25, None)
+    assert time.monotonic() - t0 < 0.5
+    assert batcher.stats()["rejected"] == 1
+
+    predict.release.set()
+    for t in threads:
+        t.join(5)
+    assert len(results) == 3 and not any(isinstance(r, EngineBusy) for r in results)
+    batcher.close()
+
+
+def test_close_with_a_full_queue_does_not_deadlock():
+    predict = GatedPredict()
+    batcher = MicroBatcher(predict, max_batch=1, max_wait=0, max_queue=2)
+    results = []
+    threads = [submit_in_thread(batcher, results)]
+    assert predict.started.wait(5)
+    threads += [submit_in_thread(batcher, results) for _ in range(2)]
+    wait_for_depth(batcher, 2)
+
+    closer = threading.Thread(target=batcher.close, daemon=True)
+    closer.start()
+    time.sleep(0.05)
+    predict.release.set()
+    closer.join(5)
+    assert not closer.is_alive()
+    for t in threads:
+        t.join(5)
+    # The batch in flight finishes; the queued requests are told the engine is going away
+    assert sum(isinstance(r, EngineBusy) for r in results) == 2
+    with pytest.raises(EngineBusy):
+        batcher.submit([frame()], 0.25, None)
+
+
+def test_concurrent_requests_share_a_batch():
+    predict = GatedPredict()
+    predict.release.set()
+    batcher = MicroBatcher(predict, max_batch=4, max_wait=0.2, max_queue=8)
+    results = []
+    threads = [submit_in_thread(batcher, results) for _ in range(4)]
+    for t in threads:
+        t.join(5)
+    batcher.close()
+    assert len(results) == 4
+    assert sum(predict.batches) == 4 and len(predict.batches) < 4
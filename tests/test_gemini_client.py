@@ -0,0 +1,117 @@
+import socket
+import time
+
+import pytest
+
+from bench import stub_gemini
+from bench.stub_gemini import StubGemini
+from core import gemini_client
+from core.config import STATIC_TIPS
+from utils.ttl_cache import TTLDiskCache
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(gemini_client, "GEMINI_API_KEY", "stub")
+    monkeypatch.setattr(gemini_client, "_session", None)
+    monkeypatch.setattr(gemini_client, "_tips_cache", TTLDiskCache(str(tmp_path), ttl=3600))
+    return gemini_client
+
+
+def use(client, monkeypatch, stub):
+    monkeypatch.setattr(client, "GEMINI_BASE_URL", stub.url)
+
+
+def tips_key(label):
+    return [label, gemini_client.DEFAULT_LOCATION, gemini_client.MODEL_NAME, gemini_client.PROMPT_VERSION]
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retryable_status_is_retried(client, monkeypatch, status):
+    with StubGemini(fail_first=1, error_status=status) as stub:
+        use(client, monkeypatch, stub)
+        tips = client.get_disposal_tips("cpu", deadline=5.0)
+    assert stub.requests == 2
+    assert tips.startswith("## What it is")
+
+
+def test_retry_after_is_honored(client, monkeypatch):
+    # Retry-After (0.6 s) is well above the largest first-attempt jitter (BACKOFF_BASE)
+    with StubGemini(fail_first=1, error_status=429, retry_after="0.6") as stub:
+        use(client, monkeypatch, stub)
+        t0 = time.monotonic()
+        tips = client.get_disposal_tips("cpu", deadline=5.0)
+        elapsed = time.monotonic() - t0
+    assert stub.requests == 2
+    assert elapsed >= 0.6
+    assert tips.startswith("## What it is")
+
+
+def test_persistent_error_status_returns_static_tips(client, monkeypatch):
+    with StubGemini(fail_first=10, error_status=503) as stub:
+        use(client, monkeypatch, stub)
+        tips = client.get_disposal_tips("gpu", deadline=5.0)
+    assert stub.requests == client.MAX_RETRIES + 1
+    assert tips == STATIC_TIPS["gpu"]
+    assert client._tips_cache.get(tips_key("gpu")) is None
+
+
+@pytest.mark.parametrize("reply", ["{not json}", "no json here"])
+def test_invalid_json_returns_static_tips(client, monkeypatch, reply):
+    monkeypatch.setattr(stub_gemini, "REPLY", reply)
+    with StubGemini() as stub:
+        use(client, monkeypatch, stub)
+        tips = client.get_disposal_tips("cpu", deadline=5.0)
+    assert tips == STATIC_TIPS["cpu"]
+    assert client._tips_cache.get(tips_key("cpu")) is None
+
+
+def test_deadline_overrun_returns_static_tips_uncached(client, monkeypatch):
+    with StubGemini(latency=1.0) as stub:
+        use(client, monkeypatch, stub)
+        t0 = time.monotonic()
+        tips = client.get_disposal_tips("ram_stick", deadline=0.3)
+        elapsed = time.monotonic() - t0
+    assert tips == STATIC_TIPS["ram_stick"]
+    assert elapsed < 0.9
+    assert client._tips_cache.get(tips_key("ram_stick")) is None
+
+
+def test_unreachable_returns_static_tips(client, monkeypatch):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()  # nothing listens here any more
+    monkeypatch.setattr(client, "GEMINI_BASE_URL", f"http://127.0.0.1:{port}")
+    tips = client.get_disposal_tips("cpu", deadline=5.0)
+    assert tips == STATIC_TIPS["cpu"]
+    assert client._tips_cache.get(tips_key("cpu")) is None
+
+
+def test_pooled_session_reuses_connection(client, monkeypatch):
+    with StubGemini() as stub:
+        use(client, monkeypatch, stub)
+        for _ in range(5):
+            tips, ok = client._request_tips("cpu", client.DEFAULT_LOCATION, time.monotonic() + 5.0)
+            assert ok
+    assert stub.requests == 5
+    assert stub.connections == 1
+
+
+def test_follower_respects_its_own_deadline(client, monkeypatch):
+    import threading
+
+    with StubGemini(latency=1.0) as stub:
+        use(client, monkeypatch, stub)
+        leader = threading.Thread(target=client.get_disposal_tips, args=("cpu",), kwargs={"deadline": 5.0})
+        leader.start()
+        while not client._in_flight.in_flight(tuple(tips_key("cpu"))):
+            time.sleep(0.01)
+        t0 = time.monotonic()
+        tips = client.get_disposal_tips("cpu", deadline=0.2)
+        elapsed = time.monotonic() - t0
+        leader.join()
+    assert tips == STATIC_TIPS["cpu"]
+    assert elapsed < 0.6
+    assert stub.requests == 1
+    assert client._tips_cache.get(tips_key("cpu")) is not None  # the leader still cached its result
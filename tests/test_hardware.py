@@ -0,0 +1,41 @@
+import time
+
+from core.hardware import ServoController, SimulatedServo
+
+
+def test_home_then_close_stops_worker():
+    servo = SimulatedServo(travel_time=0.05, settle=0.01)
+    controller = ServoController(servo, angles={"cpu": 180}, dwell=0.01)
+    controller.submit("cpu").wait(2.0)
+
+    home = controller.home()
+    t0 = time.monotonic()
+    controller.close(timeout=2.0)
+
+    assert time.monotonic() - t0 < 1.0
+    assert not controller._thread.is_alive()
+    assert home.status == "moved"
+    assert servo.angle == 0
+
+
+def test_home_before_another_command_is_skipped():
+    servo = SimulatedServo(travel_time=0.05, settle=0.01)
+    controller = ServoController(servo, angles={"cpu": 180, "ram_stick": 35}, dwell=0.05)
+    first = controller.submit("cpu")
+    home = controller.home()
+    second = controller.submit("ram_stick")
+    second.wait(2.0)
+    controller.close(timeout=2.0)
+
+    assert first.status == "moved"
+    assert home.status == "skipped"
+    assert second.status == "moved"
+
+
+def test_servo_target_falls_back_to_the_bin_angle(capsys):
+    from core.hardware import servo_target
+
+    assert servo_target("ram_stick") == "ram_stick"
+    assert servo_target("gpu") == "cpu"  # same components bin
+    assert servo_target("unknown") is None
+    assert "No servo angle for 'unknown'" in capsys.readouterr().out
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from core import inference
+from core.backends import Detections
+
+
+class FakeEngine:
+    name = "fake"
+    weights = "fake.pt"
+
+    def __init__(self):
+        self.frames = 0
+
+    def label_lookups(self, names):
+        return np.array([], dtype=object), np.array([], dtype=object)
+
+    def predict(self, frames, conf=0.05, imgsz=None):
+        self.frames += len(frames)
+        empty = np.zeros((0,), dtype=np.float32)
+        return [Detections(np.zeros((0, 4), np.float32), empty, empty.astype(np.intp), {}, f) for f in frames]
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    fake = FakeEngine()
+    monkeypatch.setattr(inference, "get_engine", lambda: fake)
+    monkeypatch.setattr(inference, "_model", None)
+    monkeypatch.setattr(inference, "_cache", inference.ResultCache())
+    return fake
+
+
+def test_first_result_is_cached_under_the_loaded_backend(engine):
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    inference.run_model(frame)
+    inference.run_model(frame)
+    assert engine.frames == 1
+    assert inference.cache_stats()["hits"] == 1
+
+
+class BoxEngine(FakeEngine):
+    """One CPU box per frame."""
+
+    def label_lookups(self, names):
+        return np.array(["CPU"], dtype=object), np.array(["cpu"], dtype=object)
+
+    def predict(self, frames, conf=0.05, imgsz=None):
+        self.frames += len(frames)
+        return [
+            Detections(np.array([[10, 10, 200, 200]], np.float32), np.array([0.9], np.float32),
+                       np.array([0], np.intp), {0: "CPU"}, f)
+            for f in frames
+        ]
+
+
+@pytest.mark.parametrize("annotate", [True, "lazy"])
+def test_cache_stores_downscaled_annotation(monkeypatch, annotate):
+    fake = BoxEngine()
+    monkeypatch.setattr(inference, "get_engine", lambda: fake)
+    monkeypatch.setattr(inference, "_model", None)
+    monkeypatch.setattr(inference, "_cache", inference.ResultCache())
+    frame = np.zeros((3000, 4000, 3), dtype=np.uint8)
+
+    label, _, first, _ = inference.run_model(frame, annotate=annotate)
+    _, _, cached, _ = inference.run_model(frame, annotate=annotate)
+    if annotate == "lazy":
+        first, cached = first.render(), cached.render()
+
+    assert label == "cpu" and fake.frames == 1
+    assert first.shape == (3000, 4000, 3)
+    assert max(cached.shape[:2]) == inference.CACHE_ANNOTATION_SIDE
+    assert inference.cache_stats()["bytes"] < 4 * 1024 * 1024
+
+
+def test_only_confirmed_scans_feed_the_similarity_index(monkeypatch):
+    index = inference.SimilarityIndex(capacity=8)
+    monkeypatch.setattr(inference, "_similar", index)
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (64, 64, 3), dtype=np.uint8) for _ in range(4)]
+
+    inference.remember_scan(frames[0], "cpu", inference.SIMILARITY_MIN_CONF - 0.2)
+    inference.remember_scan(frames[1], "unknown", 1.0)
+    assert len(index) == 0
+
+    inference.remember_scan(frames[2], "gpu", 0.3, overridden=True)
+    inference.remember_scan(frames[3], "ram_stick", inference.SIMILARITY_MIN_CONF)
+    assert len(index) == 2
+    assert index.query(inference.embed(frames[2])).source == "override"
+
+
+@pytest.fixture
+def boxes(monkeypatch):
+    fake = BoxEngine()
+    monkeypatch.setattr(inference, "get_engine", lambda: fake)
+    monkeypatch.setattr(inference, "_model", None)
+    monkeypatch.setattr(inference, "_cache", inference.ResultCache())
+    return fake
+
+
+def test_batch_matches_single_frame_results(boxes):
+    frames = [np.full((64, 64, 3), i, dtype=np.uint8) for i in range(5)]
+    batched = inference.run_model_batch(frames, batch_size=2, annotate=False, cache=False)
+    assert boxes.frames == 5
+    single = [inference.run_model(f, annotate=False, cache=False) for f in frames]
+    assert [(l, c, r) for l, c, _, r in batched] == [(l, c, r) for l, c, _, r in single]
+    assert [r[0] for r in batched] == ["cpu"] * 5
+
+
+@pytest.mark.parametrize("raw, keys", [("full", {"detections", "top"}), ("top", {"top"}), ("none", None)])
+def test_raw_payload_modes(boxes, raw, keys):
+    _, _, annotated, payload = inference.run_model(np.zeros((64, 64, 3), np.uint8), annotate=False, raw=raw)
+    assert annotated is None
+    assert (None if payload is None else set(payload)) == keys
+
+
+def test_lazy_annotation_is_drawn_on_render(boxes):
+    frame = np.zeros((64, 64, 3), np.uint8)
+    _, _, lazy, _ = inference.run_model(frame, annotate="lazy", cache=False)
+    assert isinstance(lazy, inference.LazyAnnotation)
+    drawn = lazy.render()
+    assert drawn.shape == frame.shape and drawn.any()  # the box was plotted
+    assert lazy.render() is drawn
@@ -0,0 +1,41 @@
+import numpy as np
+
+from core.motion import InferenceScheduler, MotionGate
+
+
+def still():
+    return np.full((240, 320, 3), 60, dtype=np.uint8)
+
+
+def with_item():
+    frame = still()
+    frame[80:160, 120:220] = 220
+    return frame
+
+
+def test_gate_ignores_a_static_scene_and_sees_an_item():
+    gate = MotionGate()
+    assert gate.update(still())  # first frame primes the gate
+    assert not gate.update(still())
+    assert gate.update(with_item())
+
+
+def test_idle_scene_only_runs_the_heartbeat():
+    sched = InferenceScheduler(idle_interval=2.0, hold=0.0)
+    assert sched.should_run(still(), now=0.0)  # the first frame primes the gate
+    runs = [sched.should_run(still(), now=1 + t * 0.1) for t in range(50)]  # 5 s of an empty belt
+    # One heartbeat every 2 s
+    assert sum(runs) == 2
+    assert sched.stats()["skipped_idle"] == 48
+
+
+def test_active_scene_is_budgeted_by_inference_time():
+    sched = InferenceScheduler(budget=0.5, hold=10.0)
+    sched.should_run(still(), now=0.0)
+    sched.record(0.1)  # 100 ms per inference at a 50% budget: at most one run per 200 ms
+    runs = 0
+    for i in range(1, 21):
+        frame = with_item() if i % 2 else still()  # keeps the scene moving
+        runs += sched.should_run(frame, now=i * 0.05)
+    assert 4 <= runs <= 6
+    assert sched.stats()["skipped_budget"] > 0
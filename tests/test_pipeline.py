@@ -0,0 +1,45 @@
+from core.hardware import ServoController, SimulatedServo
+from core.pipeline import DropOldestQueue, SortingPipeline
+
+
+class ListSource:
+    def __init__(self, n):
+        self.n = n
+
+    def read(self):
+        if self.n == 0:
+            return False, None
+        self.n -= 1
+        return True, object()
+
+    def release(self):
+        pass
+
+
+def test_end_to_end_includes_servo_ack():
+    servo = SimulatedServo(travel_time=0.2, settle=0.2)
+    controller = ServoController(servo, angles={"cpu": 180}, dwell=0.0)
+    pipeline = SortingPipeline(ListSource(1), lambda frame: "cpu", controller.submit).start()
+    pipeline.join(timeout=5.0)
+    controller.close()
+
+    stats = pipeline.stats()
+    assert stats["end_to_end"]["count"] == 1
+    assert stats["end_to_end"]["p50_ms"] >= 190
+    assert stats["actuate"]["p50_ms"] >= 190
+
+
+def test_every_label_decided_on_a_frame_is_actuated():
+    done = []
+    pipeline = SortingPipeline(ListSource(1), lambda frame: ["cpu", "gpu", "ram_stick"], done.append).start()
+    pipeline.join(timeout=5.0)
+    assert done == ["cpu", "gpu", "ram_stick"]
+    assert pipeline.stats()["actuate"]["count"] == 3
+
+
+def test_drop_oldest_queue_keeps_the_newest_items():
+    q = DropOldestQueue(2)
+    for i in range(5):
+        q.put(i)
+    assert [q.get(timeout=1), q.get(timeout=1)] == [3, 4]
+    assert q.dropped == 3
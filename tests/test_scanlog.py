@@ -0,0 +1,43 @@
+import os
+
+from utils.scanlog import LogTail, ScanLog
+
+COLUMNS = ["timestamp", "label", "confidence", "bin", "overridden"]
+
+
+def row(ts, label):
+    return {"timestamp": ts, "label": label, "confidence": 0.9, "bin": "b", "overridden": False}
+
+
+def test_torn_record_from_other_writer_is_dropped(tmp_path):
+    path = str(tmp_path / "scans.csv")
+    a = ScanLog(path, COLUMNS)
+    b = ScanLog(path, COLUMNS)
+    a.append([row("t1", "cpu")])
+    b.append([row("t2", "gpu")])  # b now holds an open fd
+
+    # A third writer crashes halfway through a record
+    with open(path, "ab") as f:
+        f.write(b"t3,ram_st")
+
+    b.append([row("t4", "cpu")])
+    a.close()
+    b.close()
+
+    _, rows = LogTail(path).poll()
+    assert [(r["timestamp"], r["label"]) for r in rows] == [("t1", "cpu"), ("t2", "gpu"), ("t4", "cpu")]
+    with open(path, "rb") as f:
+        assert f.read().endswith(b"\n")
+
+
+def test_header_written_once(tmp_path):
+    path = str(tmp_path / "scans.csv")
+    log = ScanLog(path, COLUMNS)
+    log.append([row("t1", "cpu")])
+    log.append([row("t2", "cpu")])
+    log.close()
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == ",".join(COLUMNS)
+    assert len(lines) == 3
+    assert os.path.exists(path + ".lock")
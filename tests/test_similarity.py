@@ -0,0 +1,62 @@
+import numpy as np
+
+from core.similarity import DIM, SimilarityIndex
+
+
+def unit(seed, near=None, noise=0.01):
+    rng = np.random.default_rng(seed)
+    v = rng.normal(size=DIM).astype(np.float32) if near is None else near + rng.normal(scale=noise, size=DIM).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_hit_only_above_threshold():
+    index = SimilarityIndex(capacity=16, threshold=0.95, verify_every=0)
+    a = unit(0)
+    index.add(a, "cpu", 0.9)
+    match = index.query(unit(1, near=a))
+    assert match is not None and match.label == "cpu" and match.source == "model"
+    assert index.query(unit(2)) is None  # an unrelated item
+
+
+def test_override_relabels_contradicting_neighbours():
+    index = SimilarityIndex(capacity=16, threshold=0.95, verify_every=0)
+    a = unit(0)
+    index.add(unit(1, near=a), "gpu", 0.6)  # the model got these look-alikes wrong
+    index.add(unit(2, near=a), "gpu", 0.7)
+    other = unit(3)
+    index.add(other, "gpu", 0.9)  # a real GPU elsewhere in the index
+
+    index.add(unit(4, near=a), "ram_stick", 1.0, source="override")
+
+    assert index.stats()["relabeled"] == 2
+    match = index.query(unit(5, near=a))
+    assert (match.label, match.source) == ("ram_stick", "override")
+    assert index.query(other).label == "gpu"
+
+
+def test_refresh_keeps_the_override():
+    index = SimilarityIndex(capacity=16, threshold=0.95, verify_every=0)
+    a = unit(0)
+    index.add(a, "cpu", 1.0, source="override")
+    index.add(unit(1, near=a, noise=0.001), "cpu", 0.8)  # same look, model agrees
+    assert len(index) == 1
+    match = index.query(a)
+    assert (match.source, match.confidence) == ("override", 1.0)
+
+
+def test_every_nth_hit_is_verified():
+    index = SimilarityIndex(capacity=16, threshold=0.95, verify_every=3)
+    a = unit(0)
+    index.add(a, "cpu", 0.9)
+    flags = [index.query(a).verify for _ in range(6)]
+    assert flags == [False, False, True, False, False, True]
+
+
+def test_ring_evicts_oldest_at_capacity():
+    index = SimilarityIndex(capacity=2, threshold=0.95, verify_every=0)
+    first = unit(0)
+    index.add(first, "cpu", 0.9)
+    index.add(unit(1), "gpu", 0.9)
+    index.add(unit(2), "ram_stick", 0.9)
+    assert len(index) == 2
+    assert index.query(first) is None
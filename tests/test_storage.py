@@ -0,0 +1,151 @@
+import pytest
+
+from utils import storage
+from utils.rollups import Rollups
+from utils.scanlog import LogTail, ScanLog
+from utils.scanstats import ScanStats
+from utils.sqlite_store import SqliteStore, SqliteTail
+
+ROWS = [
+    {"timestamp": "2026-04-01T10:00:00", "label": "cpu", "confidence": 0.91, "bin": "processors", "overridden": False},
+    {"timestamp": "2026-04-02T11:30:00", "label": "gpu", "confidence": None, "bin": "processors", "overridden": True},
+    {"timestamp": "2026-04-03T12:45:00", "label": "ram_stick", "confidence": 0.5, "bin": "memory", "overridden": False},
+]
+
+DTYPES = {
+    "timestamp": "datetime64[ns]",
+    "label": "string",
+    "confidence": "float64",
+    "bin": "string",
+    "overridden": "bool",
+}
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def store(request, monkeypatch, tmp_path):
+    """utils.storage wired to a fresh history in tmp_path on the given backend."""
+    csv_path = str(tmp_path / "scans.csv")
+    if request.param == "sqlite":
+        log = SqliteStore(str(tmp_path / "scans.db"), storage.COLUMNS)
+        tail = lambda state=None: SqliteTail(log, state)
+    else:
+        log = ScanLog(csv_path, storage.COLUMNS)
+        tail = lambda state=None: LogTail(csv_path, state)
+    monkeypatch.setattr(storage, "BACKEND", request.param)
+    monkeypatch.setattr(storage, "CSV_PATH", csv_path)
+    monkeypatch.setattr(storage, "PARQUET_DIR", str(tmp_path / "parquet"))
+    monkeypatch.setattr(storage, "_log", log)
+    monkeypatch.setattr(storage, "_stats", ScanStats(csv_path, recent=storage.RECENT_LIMIT, tail=tail()))
+    monkeypatch.setattr(storage, "_rollups", Rollups(csv_path, str(tmp_path / "rollups.json"), tail_factory=tail))
+    monkeypatch.setattr(storage, "_columnar", None)
+    storage.ensure_storage()
+    yield storage
+    log.close()
+
+
+def test_load_scans_dtypes_match_across_backends(store):
+    store.append_scans(ROWS)
+    store.flush_scans()
+    for df in (store.load_scans(), store.load_scans(since="2026-04-02")):
+        assert {c: str(t) for c, t in df.dtypes.items()} == DTYPES
+    df = store.load_scans(since="2026-04-02")
+    assert list(df["label"]) == ["gpu", "ram_stick"]
+    assert list(df["overridden"]) == [True, False]
+    assert df["confidence"].isna().tolist() == [True, False]
+
+
+def test_load_scans_dtypes_from_parquet_mirror(store):
+    if store.BACKEND != "csv":
+        pytest.skip("the Parquet mirror follows the CSV log")
+    pytest.importorskip("pyarrow")
+    from utils import columnar
+
+    store.append_scans(ROWS)
+    store.flush_scans()
+    columnar.ColumnarStore(store.PARQUET_DIR, store.CSV_PATH).migrate()
+    df = store.load_scans(since="2026-04-02")
+    assert store._columnar is not None
+    assert {c: str(t) for c, t in df.dtypes.items()} == DTYPES
+    assert list(df["overridden"]) == [True, False]
+
+
+def test_missing_timestamp_is_stored_empty(store):
+    store.append_scan({"timestamp": None, "label": "cpu", "confidence": None, "bin": None, "overridden": False})
+    store.flush_scans()
+    page, _ = store.scan_page(None, 5)
+    assert page["timestamp"].isna().all()
+    assert page["confidence"].isna().all()
+    assert list(page["label"]) == ["cpu"]
+    if store.BACKEND == "sqlite":
+        assert store._log.rows_after(0)[0][1] == ""
+
+
+def scan(i, label="cpu"):
+    return {"timestamp": f"2026-04-01T10:{i // 60:02d}:{i % 60:02d}", "label": label, "confidence": 0.9,
+            "bin": f"b{i}", "overridden": False}
+
+
+def test_pages_walk_history_newest_first(store):
+    store.append_scans([scan(i) for i in range(23)])
+    store.flush_scans()
+    seen, cursor = [], None
+    page, cursor = store.scan_page(cursor, 5)
+    seen += list(page["bin"])
+    # Scans appended while paging land in front of the first page, not in the walk
+    store.append_scans([scan(i, "gpu") for i in range(100, 103)])
+    store.flush_scans()
+    while cursor is not None:
+        page, cursor = store.scan_page(cursor, 5)
+        seen += list(page["bin"])
+    assert seen == [f"b{i}" for i in reversed(range(23))]
+
+
+def test_cursor_from_before_clear_starts_over(store):
+    store.append_scans([scan(i) for i in range(12)])
+    store.flush_scans()
+    _, cursor = store.scan_page(None, 5)
+    assert cursor is not None
+
+    store.clear_scans()
+    store.append_scans([scan(i, "gpu") for i in range(50, 53)])
+    store.flush_scans()
+    page, next_cursor = store.scan_page(cursor, 5)
+    assert list(page["bin"]) == ["b52", "b51", "b50"]
+    assert next_cursor is None
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "1:2:3", ":", "abc:12", "12"])
+def test_malformed_cursor_starts_over(store, cursor):
+    store.append_scans([scan(i) for i in range(8)])
+    store.flush_scans()
+    page, next_cursor = store.scan_page(cursor, 5)
+    assert list(page["bin"]) == [f"b{i}" for i in (7, 6, 5, 4, 3)]
+    assert next_cursor is not None
+
+
+def test_stats_and_recent_follow_appends_and_clear(store):
+    store.append_scans([scan(i) for i in range(3)] + [scan(3, "gpu")])
+    store.flush_scans()
+    stats = store.scan_stats()
+    assert stats["total"] == 4
+    assert stats["by_label"] == {"cpu": 3, "gpu": 1}
+    assert list(store.recent_scans(2)["bin"]) == ["b3", "b2"]
+
+    store.append_scan(scan(4, "ram_stick"))
+    store.flush_scans()
+    assert store.scan_stats()["by_label"]["ram_stick"] == 1
+
+    store.clear_scans()
+    assert store.scan_stats()["total"] == 0
+    assert len(store.recent_scans()) == 0
+
+
+def test_rollups_bucket_counts_and_rates(store):
+    rows = [scan(i) for i in range(3)] + [dict(scan(0, "gpu"), timestamp="2026-04-01T11:05:00", overridden=True)]
+    store.append_scans(rows)
+    store.flush_scans()
+    hourly = store.scan_rollups("hour", since="2026-04-01")
+    assert list(hourly["count"]) == [3, 1]
+    assert list(hourly["cpu"]) == [3, 0]
+    assert list(hourly["override_rate"]) == [0.0, 1.0]
+    assert list(store.scan_rollups("day")["count"]) == [4]
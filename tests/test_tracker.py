@@ -0,0 +1,49 @@
+from core.tracker import VotingTracker
+
+A = (0, 0, 100, 100)
+B = (300, 0, 400, 100)
+
+
+def test_track_fires_once_when_votes_reach_the_score():
+    tracker = VotingTracker(fire_score=1.5, min_hits=2, window=8)
+    assert tracker.update([(A, "cpu", 0.6)], now=0.0) == []
+    assert tracker.update([(A, "cpu", 0.6)], now=0.1) == []  # 1.2 < 1.5
+    fired = tracker.update([(A, "cpu", 0.6)], now=0.2)
+    assert [(label, round(score, 2)) for _, label, score in fired] == [("cpu", 1.8)]
+    # The item stays in view: no second sort
+    for i in range(5):
+        assert tracker.update([(A, "cpu", 0.9)], now=0.3 + i) == []
+    assert tracker.stats()["fired"] == 1
+
+
+def test_single_confident_frame_needs_min_hits():
+    tracker = VotingTracker(fire_score=0.5, min_hits=2)
+    assert tracker.update([(A, "gpu", 0.99)], now=0.0) == []
+    assert [label for _, label, _ in tracker.update([(A, "gpu", 0.99)], now=0.1)] == ["gpu"]
+
+
+def test_flicker_is_outvoted():
+    tracker = VotingTracker(fire_score=1.5, min_hits=2)
+    votes = [("cpu", 0.6), ("ram_stick", 0.4), ("cpu", 0.6), ("cpu", 0.6)]
+    fired = []
+    for i, (label, conf) in enumerate(votes):
+        fired += tracker.update([(A, label, conf)], now=i * 0.1)
+    assert [label for _, label, _ in fired] == ["cpu"]
+
+
+def test_tracks_firing_on_the_same_frame_are_all_reported():
+    tracker = VotingTracker(fire_score=1.0, min_hits=2)
+    tracker.update([(A, "cpu", 0.6), (B, "gpu", 0.6)], now=0.0)
+    fired = tracker.update([(A, "cpu", 0.6), (B, "gpu", 0.6)], now=0.1)
+    assert sorted(label for _, label, _ in fired) == ["cpu", "gpu"]
+    assert len({track_id for track_id, _, _ in fired}) == 2
+
+
+def test_new_item_after_track_expires_fires_again():
+    tracker = VotingTracker(fire_score=1.0, min_hits=2, max_misses=2)
+    tracker.update([(A, "cpu", 0.6)], now=0.0)
+    assert len(tracker.update([(A, "cpu", 0.6)], now=0.1)) == 1
+    for i in range(3):
+        tracker.update([], now=0.2 + i * 0.1)  # item left; its track is dropped
+    tracker.update([(A, "cpu", 0.6)], now=1.0)
+    assert len(tracker.update([(A, "cpu", 0.6)], now=1.1)) == 1
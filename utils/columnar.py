@@ -0,0 +1,304 @@
+"""
+Columnar, day-partitioned mirror of the scan log (Parquet via pyarrow).
+
+The CSV log stays the write path. This store is a read-optimized copy of it:
+
+    data/scans_parquet/
+        _checkpoint.json            # LogTail position in data/scans.csv
+        date=2026-02-06/part-*.parquet
+
+``sync()`` imports only the rows appended to the log since the last
+checkpoint, one small part file per day touched. A part is named after the
+log byte range it holds (part-<start>-<end>.parquet), so a sync interrupted
+between writing parts and saving the checkpoint re-reads the same range on
+the next run and skips the parts that already exist. ``compact()`` merges the
+parts of finished days into a single file. ``load()`` prunes partitions by
+directory name before opening any file and pushes the column projection and
+the remaining timestamp / label filter down into the Parquet reader.
+
+pyarrow is optional. The store is used only after it has been created with
+
+    python -m utils.columnar migrate
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.scanlog import LogTail, hold_lock
+
+CHECKPOINT = "_checkpoint.json"
+PARTITION_PREFIX = "date="
+
+
+def available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _schema():
+    import pyarrow as pa
+
+    # label / bin are dictionary-encoded on disk
+    return pa.schema([
+        ("timestamp", pa.timestamp("s")),
+        ("label", pa.string()),
+        ("confidence", pa.float64()),
+        ("bin", pa.string()),
+        ("overridden", pa.bool_()),
+    ])
+
+
+def _part_name(start: int, end: int) -> str:
+    return f"part-{start:012d}-{end:012d}.parquet"
+
+
+def _part_range(path: str) -> Optional[Tuple[int, int]]:
+    """(start, end) log offsets of a part file, None for other names."""
+    start, _, end = os.path.basename(path)[len("part-"):-len(".parquet")].partition("-")
+    try:
+        return int(start), int(end)
+    except ValueError:
+        return None
+
+
+def _to_day(value) -> Optional[date]:
+    if value is None:
+        return None
+    return pd.Timestamp(value).date()
+
+
+class ColumnarStore:
+    def __init__(self, root: str, log_path: str):
+        self.root = root
+        self.log_path = log_path
+        self._mutex = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.root, CHECKPOINT))
+
+    # ---------------- Locking / checkpoint ----------------
+    @contextmanager
+    def _locked(self):
+        with self._mutex:
+            os.makedirs(self.root, exist_ok=True)
+            fd = os.open(os.path.join(self.root, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                with hold_lock(fd):
+                    yield
+            finally:
+                os.close(fd)
+
+    def _load_checkpoint(self) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.root, CHECKPOINT), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _save_checkpoint(self, state: dict):
+        path = os.path.join(self.root, CHECKPOINT)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    # ---------------- Partitions ----------------
+    def _partitions(self, since: Optional[date] = None, until: Optional[date] = None) -> List[str]:
+        out = []
+        for d in sorted(glob.glob(os.path.join(self.root, PARTITION_PREFIX + "*"))):
+            try:
+                day = date.fromisoformat(os.path.basename(d)[len(PARTITION_PREFIX):])
+            except ValueError:
+                continue
+            if since is not None and day < since:
+                continue
+            if until is not None and day > until:
+                continue
+            out.append(d)
+        return out
+
+    def _wipe(self):
+        for d in self._partitions():
+            shutil.rmtree(d, ignore_errors=True)
+
+    def _parts(self, d: str) -> List[str]:
+        return sorted(glob.glob(os.path.join(d, "part-*.parquet")))
+
+    def _written_through(self, offset: int) -> Optional[int]:
+        """End of the part range that starts at or spans offset, if one was written."""
+        ends = [
+            r[1]
+            for d in self._partitions()
+            for r in map(_part_range, self._parts(d))
+            if r is not None and r[0] <= offset < r[1]
+        ]
+        return max(ends) if ends else None
+
+    def _write(self, df: pd.DataFrame, start: int, end: int):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Rows without a parseable timestamp have no partition and are skipped
+        df = df.dropna(subset=["timestamp"])
+        if df.empty:
+            return
+        schema = _schema()
+        for day, part in df.groupby(df["timestamp"].dt.date):
+            d = os.path.join(self.root, f"{PARTITION_PREFIX}{day.isoformat()}")
+            os.makedirs(d, exist_ok=True)
+            ranges = [r for r in map(_part_range, self._parts(d)) if r is not None]
+            if any(a <= start and end <= b for a, b in ranges):
+                continue  # written before an interrupted sync could save its checkpoint
+            table = pa.Table.from_pandas(part, schema=schema, preserve_index=False)
+            out = os.path.join(d, _part_name(start, end))
+            pq.write_table(table, out + ".tmp", use_dictionary=["label", "bin"], compression="zstd")
+            os.replace(out + ".tmp", out)
+
+    @staticmethod
+    def _frame(rows: Iterable[dict]) -> pd.DataFrame:
+        df = pd.DataFrame(list(rows), columns=["timestamp", "label", "confidence", "bin", "overridden"])
+        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce").dt.floor("s")
+        df["confidence"] = pd.to_numeric(df["confidence"], errors="coerce")
+        df["overridden"] = df["overridden"].map({"True": True, "False": False}).astype("boolean")
+        return df
+
+    # ---------------- Public API ----------------
+    def sync(self, chunk_bytes: int = 32 << 20) -> int:
+        """Import rows appended to the CSV log since the last checkpoint."""
+        total = 0
+        with self._locked():
+            tail = LogTail(self.log_path, self._load_checkpoint())
+            while True:
+                start = tail.state()["offset"]
+                # Re-read exactly the range of parts left behind by an interrupted sync
+                done = self._written_through(start)
+                reset, rows = tail.poll(max_bytes=chunk_bytes if done is None else done - start)
+                if reset:
+                    self._wipe()
+                    total = 0
+                    start = 0
+                if not rows:
+                    break
+                self._write(self._frame(rows), start, tail.state()["offset"])
+                # Checkpoint per chunk so an interrupted migration resumes
+                self._save_checkpoint(tail.state())
+                total += len(rows)
+            self._save_checkpoint(tail.state())
+        return total
+
+    def migrate(self) -> int:
+        """(Re)build the whole store from the CSV log."""
+        with self._locked():
+            self._wipe()
+            try:
+                os.remove(os.path.join(self.root, CHECKPOINT))
+            except FileNotFoundError:
+                pass
+        n = self.sync()
+        self.compact()
+        return n
+
+    def compact(self, max_parts: int = 16) -> int:
+        """
+        Merge part files. Finished days collapse to one file; today's
+        partition is only merged once it has more than max_parts parts.
+        """
+        import pyarrow.parquet as pq
+
+        today = date.today().isoformat()
+        merged = 0
+        with self._locked():
+            for d in self._partitions():
+                parts = self._parts(d)
+                is_today = os.path.basename(d) == PARTITION_PREFIX + today
+                if len(parts) <= 1 or (is_today and len(parts) <= max_parts):
+                    continue
+                table = pq.ParquetDataset(parts, schema=_schema()).read()
+                table = table.sort_by("timestamp")
+                # The merged file keeps covering its parts' log range
+                ranges = [r for r in map(_part_range, parts) if r is not None]
+                name = _part_name(min(a for a, _ in ranges), max(b for _, b in ranges)) if ranges \
+                    else f"part-{time.time_ns()}.parquet"
+                out = os.path.join(d, name)
+                pq.write_table(table, out + ".tmp", use_dictionary=["label", "bin"], compression="zstd")
+                os.replace(out + ".tmp", out)
+                for p in parts:
+                    os.remove(p)
+                merged += 1
+        return merged
+
+    def load(
+        self,
+        since=None,
+        until=None,
+        labels: Optional[Iterable[str]] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Scans with since <= timestamp < until, optionally limited to labels / columns."""
+        import pyarrow.dataset as ds
+
+        schema = _schema()
+        columns = list(columns) if columns else schema.names
+
+        with self._locked():
+            files = []
+            for d in self._partitions(_to_day(since), _to_day(until)):
+                files.extend(self._parts(d))
+            if not files:
+                return pd.DataFrame({c: pd.Series(dtype=object) for c in columns})
+
+            filt = None
+            if since is not None:
+                filt = ds.field("timestamp") >= pd.Timestamp(since).to_pydatetime()
+            if until is not None:
+                f = ds.field("timestamp") < pd.Timestamp(until).to_pydatetime()
+                filt = f if filt is None else filt & f
+            if labels is not None:
+                f = ds.field("label").isin(list(labels))
+                filt = f if filt is None else filt & f
+
+            table = ds.dataset(files, schema=schema, format="parquet").to_table(columns=columns, filter=filt)
+        return table.to_pandas()
+
+
+def main():
+    from utils.storage import CSV_PATH, PARQUET_DIR
+
+    ap = argparse.ArgumentParser(description="Manage the columnar scan-history store.")
+    ap.add_argument("command", choices=["migrate", "sync", "compact"])
+    args = ap.parse_args()
+
+    if not available():
+        raise SystemExit("pyarrow is not installed: pip install pyarrow")
+
+    store = ColumnarStore(PARQUET_DIR, CSV_PATH)
+    t0 = time.perf_counter()
+    if args.command == "migrate":
+        n = store.migrate()
+        print(f"Migrated {n} scans into {PARQUET_DIR}")
+    elif args.command == "sync":
+        n = store.sync()
+        print(f"Imported {n} new scans")
+    else:
+        n = store.compact()
+        print(f"Compacted {n} partitions")
+    print(f"Done in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
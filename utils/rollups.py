@@ -0,0 +1,216 @@
+"""
+Time-bucketed rollups of the scan log for dashboard trends.
+
+Per minute, hour and day bucket:
+
+    count       scans
+    review      scans that went to manual review (label "unknown" or overridden)
+    overridden  scans whose label was set by hand
+    conf_sum    summed confidence (mean = conf_sum / count)
+    labels      {label: count}
+
+``refresh()`` folds only the records appended since the last call (see
+utils/scanlog.LogTail), so keeping the rollups current costs O(new scans),
+and ``query()`` costs O(buckets in range) no matter how long the history is.
+The buckets and the log position are persisted together (atomic replace) to
+data/rollups.json at most every ``save_interval`` seconds and at exit; after a
+crash the fold resumes from the saved position (``tail_factory(state)`` builds
+the reader; the SQLite backend passes one over utils/sqlite_store). Minute buckets are kept for
+two days and hour buckets for 90 days; day buckets are kept forever.
+
+Rebuild from the full history with
+
+    python -m utils.rollups backfill
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from utils.scanlog import LogTail
+
+# granularity -> (key length of an ISO timestamp, retention)
+GRANULARITIES = {
+    "minute": (16, timedelta(days=2)),
+    "hour": (13, timedelta(days=90)),
+    "day": (10, None),
+}
+_KEY_FORMATS = {16: "%Y-%m-%dT%H:%M", 13: "%Y-%m-%dT%H", 10: "%Y-%m-%d"}
+
+
+def _empty_bucket() -> dict:
+    return {"count": 0, "review": 0, "overridden": 0, "conf_sum": 0.0, "labels": {}}
+
+
+class Rollups:
+    def __init__(
+        self,
+        log_path: str,
+        state_path: str,
+        save_interval: float = 60.0,
+        chunk_bytes: int = 8 << 20,
+        tail_factory: Optional[Callable[[Optional[dict]], object]] = None,
+    ):
+        self.log_path = log_path
+        self.tail_factory = tail_factory or (lambda state=None: LogTail(log_path, state))
+        self.state_path = state_path
+        self.save_interval = save_interval
+        self.chunk_bytes = chunk_bytes
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+        atexit.register(self.save)
+
+    # ---------------- Persistence ----------------
+    def _reset(self):
+        self.buckets: Dict[str, Dict[str, dict]] = {g: {} for g in GRANULARITIES}
+        self.latest: Optional[str] = None
+        self._tail = self.tail_factory(None)
+
+    def _load(self):
+        self._reset()
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.buckets = {g: state["buckets"].get(g, {}) for g in GRANULARITIES}
+        self.latest = state.get("latest")
+        self._tail = self.tail_factory(state.get("tail"))
+
+    def _prune(self):
+        if not self.latest:
+            return
+        try:
+            newest = datetime.fromisoformat(self.latest)
+        except ValueError:
+            return
+        for granularity, (size, keep) in GRANULARITIES.items():
+            if keep is None:
+                continue
+            cutoff = (newest - keep).strftime(_KEY_FORMATS[size])
+            stale = [k for k in self.buckets[granularity] if k < cutoff]
+            for k in stale:
+                del self.buckets[granularity][k]
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._prune()
+            state = {"tail": self._tail.state(), "latest": self.latest, "buckets": self.buckets}
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, separators=(",", ":"))
+            os.replace(tmp, self.state_path)
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+    # ---------------- Folding ----------------
+    def _add(self, row: dict):
+        ts = row.get("timestamp") or ""
+        if len(ts) < 16:
+            return
+        label = row.get("label", "")
+        overridden = row.get("overridden") == "True"
+        review = overridden or label == "unknown"
+        try:
+            conf = float(row.get("confidence") or 0.0)
+        except ValueError:
+            conf = 0.0
+        for granularity, (size, _) in GRANULARITIES.items():
+            bucket = self.buckets[granularity].get(ts[:size])
+            if bucket is None:
+                bucket = self.buckets[granularity][ts[:size]] = _empty_bucket()
+            bucket["count"] += 1
+            bucket["review"] += review
+            bucket["overridden"] += overridden
+            bucket["conf_sum"] += conf
+            bucket["labels"][label] = bucket["labels"].get(label, 0) + 1
+        if self.latest is None or ts > self.latest:
+            self.latest = ts
+
+    def refresh(self) -> "Rollups":
+        """Fold scans appended since the last call; rebuild if the log was cleared."""
+        with self._lock:
+            while True:
+                reset, rows = self._tail.poll(max_bytes=self.chunk_bytes)
+                if reset:
+                    self.buckets = {g: {} for g in GRANULARITIES}
+                    self.latest = None
+                    self._dirty = True
+                if not rows:
+                    break
+                for row in rows:
+                    self._add(row)
+                self._dirty = True
+        if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+        return self
+
+    def rebuild(self) -> int:
+        """Backfill: drop every bucket and fold the whole log again."""
+        with self._lock:
+            self._reset()
+            self._dirty = True
+        self.refresh()
+        self.save()
+        return sum(b["count"] for b in self.buckets["day"].values())
+
+    # ---------------- Queries ----------------
+    def query(self, granularity: str = "hour", since: Optional[str] = None, until: Optional[str] = None) -> List[dict]:
+        """
+        Buckets with since <= bucket < until (ISO prefixes, e.g. "2026-03-01"),
+        oldest first, each with mean confidence and review / override rates.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {list(GRANULARITIES)}")
+        with self._lock:
+            items = [
+                (k, dict(v, labels=dict(v["labels"])))
+                for k, v in self.buckets[granularity].items()
+                if (since is None or k >= since[:len(k)]) and (until is None or k < until[:len(k)])
+            ]
+        out = []
+        for key, b in sorted(items):
+            n = b["count"] or 1
+            out.append({
+                "bucket": key,
+                "count": b["count"],
+                "mean_confidence": b["conf_sum"] / n,
+                "review_rate": b["review"] / n,
+                "override_rate": b["overridden"] / n,
+                "labels": b["labels"],
+            })
+        return out
+
+
+def main():
+    from utils import storage
+
+    ap = argparse.ArgumentParser(description="Maintain the scan rollup tables.")
+    ap.add_argument("command", choices=["backfill", "show"])
+    ap.add_argument("--granularity", default="day", choices=list(GRANULARITIES))
+    args = ap.parse_args()
+
+    rollups = storage.rollups()  # the configured backend's log (EWIZARD_STORAGE)
+    if args.command == "backfill":
+        t0 = time.perf_counter()
+        n = rollups.rebuild()
+        print(f"Rebuilt rollups from {n} scans in {time.perf_counter() - t0:.2f}s -> {rollups.state_path}")
+    else:
+        for row in rollups.refresh().query(args.granularity):
+            print(f"{row['bucket']}  {row['count']:>7}  review {row['review_rate']:.1%}  "
+                  f"overridden {row['override_rate']:.1%}  {row['labels']}")
+
+
+if __name__ == "__main__":
+    main()
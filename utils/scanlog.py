@@ -0,0 +1,348 @@
+"""
+Append-only CSV scan log.
+
+Every scan is one line appended to data/scans.csv. Existing history is never
+read or rewritten on the write path, so logging a scan costs the same at 100
+rows as at 1M rows.
+
+Writers (the Streamlit app, the Pi loop) coordinate through an advisory lock
+on a sidecar ``.lock`` file. fsync is batched: the log is synced every
+``sync_every`` rows or ``sync_interval`` seconds, whichever comes first, and
+once more at interpreter exit. A record left half-written by a crash is
+truncated before the next write by any process (the tail is checked under the
+lock on every append, not only when the log is opened).
+"""
+from __future__ import annotations
+
+import atexit
+import csv
+import io
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def hold_lock(fd: int):
+    """Exclusive advisory lock on an open lock-file descriptor."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+    try:
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class ScanLog:
+    def __init__(self, path: str, columns: List[str], sync_every: int = 32, sync_interval: float = 1.0):
+        self.path = path
+        self.columns = list(columns)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        self._header = self._format([dict(zip(self.columns, self.columns))])
+        self._mutex = threading.RLock()
+        self._fd: Optional[int] = None
+        self._ino: Optional[int] = None
+        self._lock_fd: Optional[int] = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        atexit.register(self.close)
+
+    # ---------------- Formatting ----------------
+    def _format(self, rows: Iterable[dict]) -> bytes:
+        buf = io.StringIO()
+        w = csv.writer(buf, lineterminator="\n")
+        for row in rows:
+            w.writerow(["" if row.get(c) is None else row.get(c) for c in self.columns])
+        return buf.getvalue().encode("utf-8")
+
+    # ---------------- Locking ----------------
+    @contextmanager
+    def locked(self):
+        """Hold both the in-process and the cross-process write lock."""
+        with self._mutex:
+            if self._lock_fd is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            with hold_lock(self._lock_fd):
+                yield
+
+    # ---------------- File handle ----------------
+    def _open(self) -> int:
+        # Caller holds the lock. Reopen if the file was removed or replaced
+        # (e.g. by an older writer that rewrote the whole CSV).
+        try:
+            ino = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            ino = None
+
+        if self._fd is not None and ino == self._ino:
+            # Another writer may have died mid-record since our last append
+            self._recover(self._fd)
+            return self._fd
+
+        self._close_fd()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0), 0o644)
+        self._fd = fd
+        self._ino = os.fstat(fd).st_ino
+        self._recover(fd)
+        return fd
+
+    def _recover(self, fd: int):
+        """Write the header to an empty log and drop a torn trailing record."""
+        size = os.fstat(fd).st_size
+        if size == 0:
+            self._write(fd, self._header)
+            os.fsync(fd)
+            return
+
+        os.lseek(fd, size - 1, os.SEEK_SET)
+        if os.read(fd, 1) == b"\n":
+            return
+
+        # Scan backwards for the end of the last complete record
+        end = size
+        chunk = 4096
+        while end > 0:
+            start = max(0, end - chunk)
+            os.lseek(fd, start, os.SEEK_SET)
+            data = os.read(fd, end - start)
+            idx = data.rfind(b"\n")
+            if idx != -1:
+                os.ftruncate(fd, start + idx + 1)
+                os.fsync(fd)
+                return
+            end = start
+
+        # Not even a complete header survived
+        os.ftruncate(fd, 0)
+        self._write(fd, self._header)
+        os.fsync(fd)
+
+    @staticmethod
+    def _write(fd: int, data: bytes):
+        view = memoryview(data)
+        while view:
+            n = os.write(fd, view)
+            view = view[n:]
+
+    def _close_fd(self):
+        if self._fd is not None:
+            if self._pending:
+                os.fsync(self._fd)
+                self._pending = 0
+            os.close(self._fd)
+            self._fd = None
+            self._ino = None
+
+    # ---------------- Public API ----------------
+    def ensure(self):
+        """Create the log (with header) if needed and repair a torn tail."""
+        with self.locked():
+            self._open()
+
+    def append(self, rows: Iterable[dict]):
+        data = self._format(rows)
+        if not data:
+            return
+        with self.locked():
+            fd = self._open()
+            self._write(fd, data)
+            self._pending += data.count(b"\n")
+            now = time.monotonic()
+            if self._pending >= self.sync_every or now - self._last_sync >= self.sync_interval:
+                os.fsync(fd)
+                self._pending = 0
+                self._last_sync = now
+
+    def flush(self):
+        with self.locked():
+            if self._fd is not None and self._pending:
+                os.fsync(self._fd)
+                self._pending = 0
+                self._last_sync = time.monotonic()
+
+    def clear(self):
+        with self.locked():
+            fd = self._open()
+            os.ftruncate(fd, 0)
+            self._write(fd, self._header)
+            os.fsync(fd)
+            self._pending = 0
+
+    def close(self):
+        with self._mutex:
+            self._close_fd()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+
+# Bytes just before the read offset, re-checked on poll to detect a log that
+# was truncated and regrown past our offset.
+_FINGERPRINT = 64
+
+
+class LogTail:
+    """
+    Incremental reader over a ScanLog file.
+
+    ``poll()`` returns the complete records appended since the previous poll,
+    plus a flag telling the caller the log was cleared or replaced and any
+    state derived from earlier rows must be dropped. The reader position can
+    be saved with ``state()`` and restored through the constructor.
+    """
+
+    def __init__(self, path: str, state: Optional[dict] = None):
+        self.path = path
+        self._reset()
+        if state:
+            self._ino = state.get("ino")
+            self._offset = int(state.get("offset", 0))
+            self._fingerprint = bytes.fromhex(state.get("fingerprint", ""))
+            self._header = state.get("header")
+
+    def _reset(self):
+        self._ino: Optional[int] = None
+        self._offset = 0
+        self._fingerprint = b""
+        self._mtime_ns: Optional[int] = None
+        self._header: Optional[List[str]] = None
+
+    def state(self) -> dict:
+        return {
+            "ino": self._ino,
+            "offset": self._offset,
+            "fingerprint": self._fingerprint.hex(),
+            "header": self._header,
+        }
+
+    def _still_valid(self, f, st) -> bool:
+        if st.st_ino != self._ino or st.st_size < self._offset:
+            return False
+        if self._fingerprint:
+            f.seek(self._offset - len(self._fingerprint))
+            if f.read(len(self._fingerprint)) != self._fingerprint:
+                return False
+        return True
+
+    def poll(self, max_bytes: Optional[int] = None) -> Tuple[bool, List[dict]]:
+        """Records appended since the last poll, reading at most max_bytes."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            reset = self._ino is not None
+            self._reset()
+            return reset, []
+
+        # Fast path: nothing changed since the last poll
+        if st.st_ino == self._ino and st.st_size == self._offset and st.st_mtime_ns == self._mtime_ns:
+            return False, []
+
+        reset = False
+        with open(self.path, "rb") as f:
+            if self._ino is not None and not self._still_valid(f, st):
+                self._reset()
+                reset = True
+            self._ino = st.st_ino
+            self._mtime_ns = st.st_mtime_ns
+
+            f.seek(self._offset)
+            size = st.st_size - self._offset
+            data = f.read(size if max_bytes is None else min(size, max_bytes))
+
+        # Only consume complete records; a partial tail is picked up next time
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return reset, []
+        data = data[:end]
+        self._offset += end
+        self._fingerprint = (self._fingerprint + data[-_FINGERPRINT:])[-_FINGERPRINT:]
+
+        reader = csv.reader(io.StringIO(data.decode("utf-8", errors="replace")))
+        if self._header is None:
+            self._header = next(reader, None)
+            if self._header is None:
+                return reset, []
+        header = self._header
+        return reset, [dict(zip(header, values)) for values in reader if values]
+
+
+# ---------------- Newest-first pages ----------------
+_PAGE_BLOCK = 64 * 1024
+
+
+def read_page(path: str, cursor: Optional[str] = None, limit: int = 25) -> Tuple[List[dict], Optional[str]]:
+    """
+    Up to ``limit`` records, newest first, and the cursor for the next (older)
+    page, or None once the start of the log is reached.
+
+    Records are read backwards from the end of the file (or from the cursor)
+    in blocks, so a page costs the same at any history size. A cursor is the
+    byte offset of the oldest record returned, tagged with the file's inode;
+    a cursor from before the log was cleared or replaced, or one that does
+    not parse, starts over at the newest record. Records never contain newlines (ScanLog writes one line per
+    scan), which is what makes splitting a block on b"\\n" safe.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return [], None
+    with f:
+        st = os.fstat(f.fileno())
+        header_line = f.readline()
+        header = next(csv.reader([header_line.decode("utf-8", errors="replace")]), None)
+        data_start = len(header_line)
+        if header is None or not header_line.endswith(b"\n"):
+            return [], None
+
+        end = st.st_size
+        if cursor:
+            try:
+                ino, offset = (int(part) for part in cursor.split(":"))
+            except ValueError:
+                ino = offset = None  # not a cursor we issued: start over like a stale one
+            if ino == st.st_ino and data_start <= offset <= st.st_size:
+                end = offset
+
+        buf = b""
+        pos = end
+        while pos > data_start and buf.count(b"\n") <= limit:
+            step = min(_PAGE_BLOCK, pos - data_start)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+
+    # Drop a torn (unterminated) tail; it belongs to a write still in progress
+    cut = buf.rfind(b"\n") + 1
+    end -= len(buf) - cut
+    lines = buf[:cut].split(b"\n")[:-1]
+    if pos > data_start:
+        lines = lines[1:]  # first piece may start mid-record
+    page = lines[-limit:] if limit > 0 else []
+
+    start = end - sum(len(line) + 1 for line in page)
+    rows = [
+        dict(zip(header, values))
+        for values in csv.reader(line.decode("utf-8", errors="replace") for line in reversed(page))
+        if values
+    ]
+    next_cursor = f"{st.st_ino}:{start}" if start > data_start else None
+    return rows, next_cursor
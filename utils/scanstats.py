@@ -0,0 +1,71 @@
+"""
+Incremental aggregates over the append-only scan log.
+
+ScanStats keeps running per-label / per-bin counters and a ring of the most
+recent scans. ``refresh()`` only parses records appended since the last call
+(see utils/scanlog.LogTail), so a dashboard rerun with no new scans costs one
+``os.stat``. If the log was cleared or replaced, the aggregates are rebuilt.
+Any reader with LogTail's poll() can be passed as ``tail`` (the SQLite
+backend passes a utils/sqlite_store.SqliteTail).
+"""
+from __future__ import annotations
+
+import threading
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from utils.scanlog import LogTail
+
+
+class ScanStats:
+    def __init__(self, path: str, recent: int = 25, chunk_bytes: int = 8 << 20, tail=None):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self._lock = threading.Lock()
+        self._recent_limit = recent
+        self._tail = tail if tail is not None else LogTail(path)
+        self._reset()
+
+    def _reset(self):
+        self.total = 0
+        self.by_label: Counter = Counter()
+        self.by_bin: Counter = Counter()
+        self.recent: deque = deque(maxlen=self._recent_limit)
+
+    def refresh(self) -> "ScanStats":
+        with self._lock:
+            # Chunked, so the first build over a long history stays small in memory
+            while True:
+                reset, rows = self._tail.poll(max_bytes=self.chunk_bytes)
+                if reset:
+                    self._reset()
+                if not rows:
+                    break
+                for row in rows:
+                    self.total += 1
+                    self.by_label[row.get("label", "")] += 1
+                    self.by_bin[row.get("bin", "")] += 1
+                    self.recent.append(row)
+        return self
+
+    # ---------------- Queries ----------------
+    @property
+    def sequence(self) -> int:
+        """Number of scans folded so far (monotonic until the log is cleared)."""
+        return self.total
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "total": self.total,
+                "by_label": dict(self.by_label),
+                "by_bin": dict(self.by_bin),
+                "sequence": self.total,
+            }
+
+    def latest(self, n: Optional[int] = None) -> List[dict]:
+        """Most recent scans, newest first."""
+        with self._lock:
+            rows = list(self.recent)
+        rows.reverse()
+        return rows if n is None else rows[:n]
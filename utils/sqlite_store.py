@@ -0,0 +1,265 @@
+"""
+SQLite scan-history backend (EWIZARD_STORAGE=sqlite).
+
+Same write API as utils/scanlog.ScanLog (ensure / append / flush / clear /
+close), backed by data/scans.db:
+
+    scans(id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp, label, confidence, bin, overridden)
+    meta(key, value)                    -- "generation", bumped by clear()
+    idx_scans_timestamp, idx_scans_label_timestamp
+
+The database runs in WAL mode, so readers never block the writer and the
+writer never blocks readers. Writes are BEGIN IMMEDIATE transactions with a
+busy timeout, which serializes concurrent appenders (threads or processes)
+without lost rows. Batches go through one cached prepared INSERT with
+executemany. Connections are per thread.
+
+SqliteTail gives ScanStats / Rollups the same poll() interface as LogTail,
+keyed on the row id (ids are never reused). A clear() bumps the generation,
+which tails report as a reset.
+
+Import an existing CSV history with
+
+    python -m utils.sqlite_store migrate
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    label TEXT NOT NULL,
+    confidence REAL,
+    bin TEXT,
+    overridden INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_scans_timestamp ON scans(timestamp);
+CREATE INDEX IF NOT EXISTS idx_scans_label_timestamp ON scans(label, timestamp);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+"""
+
+INSERT = "INSERT INTO scans (timestamp, label, confidence, bin, overridden) VALUES (?, ?, ?, ?, ?)"
+# Rough bytes per CSV record, so poll(max_bytes=...) means the same in both tails
+_ROW_BYTES = 64
+
+
+def _flag(value) -> int:
+    return 1 if value in (True, 1, "True", "true", "1") else 0
+
+
+def _text(value) -> str:
+    # None is written as an empty field, the way csv.DictWriter writes it to the log
+    return "" if value is None else str(value)
+
+
+class SqliteStore:
+    def __init__(self, path: str, columns: List[str], busy_timeout: float = 10.0):
+        self.path = path
+        self.columns = list(columns)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    # ---------------- Connections ----------------
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; safe in WAL
+            self._local.conn = conn
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    conn.executescript(SCHEMA)
+                    self._ready = True
+        return conn
+
+    def _write(self, fn):
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    # ---------------- ScanLog API ----------------
+    def ensure(self):
+        self.connect()
+
+    def append(self, rows: Iterable[dict]):
+        params = [
+            (
+                _text(r.get("timestamp")),
+                _text(r.get("label")),
+                None if r.get("confidence") in (None, "") else float(r["confidence"]),
+                r.get("bin"),
+                _flag(r.get("overridden")),
+            )
+            for r in rows
+        ]
+        if params:
+            self._write(lambda conn: conn.executemany(INSERT, params))
+
+    def flush(self):
+        # Each append is its own committed transaction; nothing is buffered
+        pass
+
+    def clear(self):
+        def run(conn):
+            conn.execute("DELETE FROM scans")
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+        self._write(run)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---------------- Reads ----------------
+    def generation(self) -> int:
+        return self.connect().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+    def rows_after(self, last_id: int, limit: Optional[int] = None) -> List[tuple]:
+        sql = "SELECT id, timestamp, label, confidence, bin, overridden FROM scans WHERE id > ? ORDER BY id"
+        if limit:
+            return self.connect().execute(sql + " LIMIT ?", (last_id, limit)).fetchall()
+        return self.connect().execute(sql, (last_id,)).fetchall()
+
+    def page(self, cursor: Optional[str] = None, limit: int = 25) -> Tuple[List[dict], Optional[str]]:
+        """Newest-first keyset page on id; same contract as utils.scanlog.read_page."""
+        conn = self.connect()
+        conn.execute("BEGIN")  # one snapshot for the generation check and the page
+        try:
+            gen = self.generation()
+            before = None
+            if cursor:
+                try:
+                    c_gen, c_id = (int(part) for part in cursor.split(":"))
+                except ValueError:
+                    c_gen = c_id = None  # not a cursor we issued: start over like a stale one
+                if c_gen == gen:
+                    before = c_id
+            sql = "SELECT id, timestamp, label, confidence, bin, overridden FROM scans"
+            if before is not None:
+                fetched = conn.execute(sql + " WHERE id < ? ORDER BY id DESC LIMIT ?", (before, limit)).fetchall()
+            else:
+                fetched = conn.execute(sql + " ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+            has_more = bool(fetched) and conn.execute(
+                "SELECT 1 FROM scans WHERE id < ? LIMIT 1", (fetched[-1][0],)
+            ).fetchone() is not None
+        finally:
+            conn.execute("COMMIT")
+        rows = [_as_record(r) for r in fetched]
+        return rows, (f"{gen}:{fetched[-1][0]}" if has_more else None)
+
+    def load(
+        self,
+        since=None,
+        until=None,
+        labels: Optional[Iterable[str]] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        import pandas as pd
+
+        cols = list(columns) if columns else self.columns
+        where, params = [], []
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(pd.Timestamp(since).isoformat())
+        if until is not None:
+            where.append("timestamp < ?")
+            params.append(pd.Timestamp(until).isoformat())
+        if labels is not None:
+            labels = list(labels)
+            where.append(f"label IN ({', '.join('?' * len(labels))})")
+            params.extend(labels)
+        sql = f"SELECT {', '.join(cols)} FROM scans"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return pd.read_sql_query(sql + " ORDER BY id", self.connect(), params=params)
+
+
+def _as_record(r: tuple) -> dict:
+    """A row in the same string-typed shape LogTail yields from the CSV."""
+    _, ts, label, conf, bin_name, overridden = r
+    return {
+        "timestamp": ts,
+        "label": label,
+        "confidence": "" if conf is None else repr(conf),
+        "bin": bin_name or "",
+        "overridden": "True" if overridden else "False",
+    }
+
+
+class SqliteTail:
+    """LogTail-compatible incremental reader over SqliteStore (keyed on row id)."""
+
+    def __init__(self, store: SqliteStore, state: Optional[dict] = None):
+        self.store = store
+        self._generation = None
+        self._last_id = 0
+        if state and "last_id" in state:
+            self._generation = state.get("generation")
+            self._last_id = int(state["last_id"])
+
+    def state(self) -> dict:
+        return {"generation": self._generation, "last_id": self._last_id}
+
+    def poll(self, max_bytes: Optional[int] = None) -> Tuple[bool, List[dict]]:
+        gen = self.store.generation()
+        reset = False
+        if gen != self._generation:
+            reset = self._generation is not None
+            self._generation = gen
+            self._last_id = 0
+        fetched = self.store.rows_after(self._last_id, max(1, max_bytes // _ROW_BYTES) if max_bytes else None)
+        if fetched:
+            self._last_id = fetched[-1][0]
+        return reset, [_as_record(r) for r in fetched]
+
+
+def main():
+    from utils.scanlog import LogTail
+    from utils.storage import COLUMNS, CSV_PATH, SQLITE_PATH
+
+    ap = argparse.ArgumentParser(description="Manage the SQLite scan-history backend.")
+    ap.add_argument("command", choices=["migrate"])
+    args = ap.parse_args()
+
+    if args.command == "migrate":
+        store = SqliteStore(SQLITE_PATH, COLUMNS)
+        store.clear()
+        tail = LogTail(CSV_PATH)
+        t0 = time.perf_counter()
+        n = 0
+        while True:
+            _, rows = tail.poll(max_bytes=32 << 20)
+            if not rows:
+                break
+            store.append(rows)
+            n += len(rows)
+        print(f"Imported {n} scans from {CSV_PATH} into {SQLITE_PATH} in {time.perf_counter() - t0:.2f}s")
+        print("Use it with EWIZARD_STORAGE=sqlite")
+
+
+if __name__ == "__main__":
+    main()
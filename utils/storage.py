@@ -1,35 +1,200 @@
+from __future__ import annotations
+
 import os
-import pandas as pd
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+from utils.rollups import Rollups
+from utils.scanlog import LogTail, ScanLog, read_page
+from utils.scanstats import ScanStats
+from utils.sqlite_store import SqliteStore, SqliteTail
+
+# pandas (and pyarrow via utils.columnar) are only needed to build frames, so
+# they are imported on first load rather than when the app starts.
+if TYPE_CHECKING:
+    import pandas as pd
 
 DATA_DIR = "data"
 CSV_PATH = os.path.join(DATA_DIR, "scans.csv")
+PARQUET_DIR = os.path.join(DATA_DIR, "scans_parquet")
+SQLITE_PATH = os.path.join(DATA_DIR, "scans.db")
+# "csv" (default) or "sqlite"; import a CSV history with `python -m utils.sqlite_store migrate`
+BACKEND = os.getenv("EWIZARD_STORAGE", "csv")
+ROLLUPS_PATH = os.path.join(DATA_DIR, "rollups-sqlite.json" if BACKEND == "sqlite" else "rollups.json")
 COLUMNS = ["timestamp", "label", "confidence", "bin", "overridden"]
+RECENT_LIMIT = 25
+# Offline re-scoring runs (ml/rescore.py), one log per run name
+RESCORE_DIR = os.path.join(DATA_DIR, "rescore")
+RESCORE_COLUMNS = ["path", "label", "confidence", "bin", "class_name", "weights", "scored_at"]
+
+# Scan history behind append_scan / clear_scans: the append-only CSV log
+# (utils/scanlog.py) or the SQLite database (utils/sqlite_store.py)
+if BACKEND == "sqlite":
+    _log = SqliteStore(SQLITE_PATH, COLUMNS)
+    _tail = lambda state=None: SqliteTail(_log, state)
+else:
+    _log = ScanLog(CSV_PATH, COLUMNS)
+    _tail = lambda state=None: LogTail(CSV_PATH, state)
+# Running counters + recent-scan ring, refreshed incrementally from the log
+_stats = ScanStats(CSV_PATH, recent=RECENT_LIMIT, tail=_tail())
+# Minute / hour / day trend buckets, folded from the log on append and on read
+# (see utils/rollups.py; rebuild with `python -m utils.rollups backfill`)
+_rollups = Rollups(CSV_PATH, ROLLUPS_PATH, tail_factory=_tail)
+# Optional Parquet mirror, used by load_scans once created with
+# `python -m utils.columnar migrate` (see utils/columnar.py)
+_columnar = None
 
 def ensure_storage():
-    os.makedirs(DATA_DIR, exist_ok=True)
-    if not os.path.exists(CSV_PATH) or os.path.getsize(CSV_PATH) == 0:
-        pd.DataFrame(columns=COLUMNS).to_csv(CSV_PATH, index=False)
+    _log.ensure()
 
 def append_scan(row: dict):
-    ensure_storage()
-    df = pd.read_csv(CSV_PATH)
-    df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-    df.to_csv(CSV_PATH, index=False)
+    _log.append([row])
+    _rollups.refresh()
+
+def append_scans(rows: list):
+    _log.append(rows)
+    _rollups.refresh()
+
+def flush_scans():
+    _log.flush()
+
+def _get_columnar():
+    global _columnar
+    if _columnar is None:
+        from utils import columnar
+
+        if not os.path.exists(os.path.join(PARQUET_DIR, columnar.CHECKPOINT)) or not columnar.available():
+            return None
+        _columnar = columnar.ColumnarStore(PARQUET_DIR, CSV_PATH)
+    return _columnar
+
+def _scans_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The same dtypes whichever backend produced the frame: datetime64[ns]
+    timestamp, string label / bin, float confidence, bool overridden.
+    """
+    import pandas as pd
+
+    if "timestamp" in df.columns:
+        ts = pd.to_datetime(df["timestamp"], errors="coerce", format="ISO8601")
+        df["timestamp"] = ts.astype("datetime64[ns]")
+    for col in ("label", "bin"):
+        if col in df.columns:
+            df[col] = df[col].astype("string")
+    if "confidence" in df.columns:
+        df["confidence"] = pd.to_numeric(df["confidence"], errors="coerce").astype("float64")
+    if "overridden" in df.columns:
+        # bool from Parquet / read_csv, 0/1 from SQLite, "True"/"False" from raw log rows
+        flag = df["overridden"]
+        df["overridden"] = (flag.eq(True) | flag.astype("string").eq("True").fillna(False)).astype(bool)
+    return df
+
+def load_scans(
+    since=None,
+    until=None,
+    labels: Optional[Iterable[str]] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Scan history, optionally restricted to since <= timestamp < until,
+    the given labels, and a subset of columns. Column dtypes are the same
+    for every backend (see _scans_frame).
+    """
+    import pandas as pd
+
+    cols = list(columns) if columns else COLUMNS
+    filtered = since is not None or until is not None or labels is not None
+
+    if BACKEND == "sqlite":
+        # Filters become an indexed WHERE clause
+        return _scans_frame(_log.load(since=since, until=until, labels=labels, columns=cols))
+
+    store = _get_columnar() if filtered else None
+    if store is not None:
+        store.sync()
+        return _scans_frame(store.load(since=since, until=until, labels=labels, columns=cols))
 
-def load_scans() -> pd.DataFrame:
     ensure_storage()
     try:
         df = pd.read_csv(CSV_PATH)
     except pd.errors.EmptyDataError:
         # file exists but is empty/corrupt -> recreate
-        pd.DataFrame(columns=COLUMNS).to_csv(CSV_PATH, index=False)
+        clear_scans()
         df = pd.read_csv(CSV_PATH)
     # Ensure required columns exist
     for col in COLUMNS:
         if col not in df.columns:
             df[col] = None
-    return df[COLUMNS]
+    df = _scans_frame(df)
+
+    if filtered:
+        ts = df["timestamp"]
+        mask = pd.Series(True, index=df.index)
+        if since is not None:
+            mask &= ts >= pd.Timestamp(since)
+        if until is not None:
+            mask &= ts < pd.Timestamp(until)
+        if labels is not None:
+            mask &= df["label"].isin(list(labels))
+        df = df[mask]
+    return df[cols]
+
+def scan_stats() -> dict:
+    """Totals per label / bin. O(new rows since last call), not O(history)."""
+    ensure_storage()
+    return _stats.refresh().snapshot()
+
+def _rows_frame(rows: List[dict]) -> pd.DataFrame:
+    import pandas as pd
+
+    return _scans_frame(pd.DataFrame(rows, columns=COLUMNS))
+
+def recent_scans(n: int = RECENT_LIMIT) -> pd.DataFrame:
+    """The last n scans (n <= RECENT_LIMIT), newest first."""
+    ensure_storage()
+    return _rows_frame(_stats.refresh().latest(n))
+
+def scan_rollups(granularity: str = "hour", since=None, until=None) -> pd.DataFrame:
+    """
+    Trend buckets (granularity "minute", "hour" or "day"), oldest first: count,
+    mean confidence, review / override rates and one column per label.
+    Costs O(buckets in range), not O(history).
+    """
+    import pandas as pd
 
-def clear_scans():
     ensure_storage()
-    pd.DataFrame(columns=COLUMNS).to_csv(CSV_PATH, index=False)
+    rows = _rollups.refresh().query(granularity, since, until)
+    df = pd.DataFrame(rows, columns=["bucket", "count", "mean_confidence", "review_rate", "override_rate"])
+    labels = pd.DataFrame([r["labels"] for r in rows], index=df.index).fillna(0).astype(int)
+    return pd.concat([df, labels], axis=1)
+
+def rollups() -> Rollups:
+    """The rollup tables of the configured backend (EWIZARD_STORAGE), for maintenance tools."""
+    return _rollups
+
+def scan_page(cursor: Optional[str] = None, limit: int = RECENT_LIMIT) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    One page of history, newest first, plus the cursor for the next (older)
+    page (None at the end). Cost depends on limit, not on history size.
+    """
+    ensure_storage()
+    if BACKEND == "sqlite":
+        rows, next_cursor = _log.page(cursor, limit)
+    else:
+        rows, next_cursor = read_page(CSV_PATH, cursor, limit)
+    return _rows_frame(rows), next_cursor
+
+def clear_scans():
+    _log.clear()
+    _rollups.refresh()
+
+def rescore_log(name: str) -> ScanLog:
+    """Append-only results log for a re-scoring run (data/rescore/<name>.csv)."""
+    return ScanLog(os.path.join(RESCORE_DIR, f"{name}.csv"), RESCORE_COLUMNS, sync_every=256)
+
+def rescored_paths(name: str) -> set:
+    """Paths a run has already written, so an interrupted run can resume."""
+    path = os.path.join(RESCORE_DIR, f"{name}.csv")
+    if not os.path.exists(path):
+        return set()
+    _, rows = LogTail(path).poll()
+    return {r["path"] for r in rows}
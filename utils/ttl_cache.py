@@ -0,0 +1,124 @@
+"""
+Small on-disk TTL cache and a single-flight helper.
+
+TTLDiskCache stores one JSON file per key. ``get`` returns the value plus a
+``fresh`` flag: entries younger than ``ttl`` are fresh, entries younger than
+``ttl + stale_ttl`` are returned as stale so the caller can serve them while
+it refreshes in the background (stale-while-revalidate). Anything older is a
+miss. A small in-memory layer in front of the files keeps repeat hits off
+the filesystem.
+
+SingleFlight makes concurrent callers asking for the same key share one
+in-flight computation instead of each doing the work.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class TTLDiskCache:
+    def __init__(self, directory: str, ttl: float, stale_ttl: float = 0.0):
+        self.directory = directory
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._mem: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(key) -> str:
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest + ".json")
+
+    def get(self, key) -> Optional[Tuple[Any, bool]]:
+        digest = self._digest(key)
+        with self._lock:
+            entry = self._mem.get(digest)
+        if entry is None:
+            try:
+                with open(self._path(digest), "r", encoding="utf-8") as f:
+                    doc = json.load(f)
+                entry = (float(doc["stored_at"]), doc["value"])
+            except (OSError, ValueError, KeyError):
+                return None
+            with self._lock:
+                self._mem[digest] = entry
+
+        age = time.time() - entry[0]
+        if age < self.ttl:
+            return entry[1], True
+        if age < self.ttl + self.stale_ttl:
+            return entry[1], False
+        return None
+
+    def set(self, key, value):
+        digest = self._digest(key)
+        stored_at = time.time()
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(digest)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "stored_at": stored_at, "value": value}, f)
+        os.replace(tmp, path)
+        with self._lock:
+            self._mem[digest] = (stored_at, value)
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.directory, name))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Any, _Call] = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run fn() once per key at a time; concurrent callers share its result.
+        A follower waits at most `timeout` seconds, then gets TimeoutError
+        (the leader carries on and still delivers to the others).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"in-flight call for {key!r} did not finish within {timeout}s")
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result